@@ -0,0 +1,331 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from backend.planner import label_name, shift_hours
+from backend.uebersicht import TAGE
+
+
+# ======================================================
+# AUSWERTUNG (STUNDEN UND KOSTEN)
+# ======================================================
+#
+# Jede Woche (aktuelle Übersicht oder Kalenderwochen-Snapshot) wird
+# einmal in eine Spaltentabelle übersetzt – eine Zeile pro Einsatz:
+#
+#   [filiale, tag, schicht, mitarbeiter]     (int32-Codes, siehe _Codes)
+#
+# Die Codes stehen für Strings und hängen nicht von den Stammdaten ab.
+# Erst beim Auswerten werden sie über Lookup-Arrays auf Schichtstunden,
+# Mitarbeiter, Soll-Stunden und Stundensätze abgebildet; alle Summen
+# sind danach np.bincount über die Spalten.
+#
+# Caches:
+#   - Chunks der Kalenderwochen (inhaltsadressiert) → Spalten je Filiale;
+#     eine neue Woche übersetzt nur ihre geänderten Filialen
+#   - Version einer Woche (ETag) → Spalten der ganzen Woche
+#   - Versionen aller Wochen + Stammdaten-Stand → fertiges Ergebnis
+
+FILIALE, TAG, SCHICHT, NAME = range(4)
+
+MAX_CHUNKS = 50_000
+MAX_WEEKS = 512
+MAX_RESULTS = 32
+
+_EMPTY = np.zeros((0, 4), dtype=np.int32)
+
+
+class _LRU:
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+
+class _Codes:
+    """
+    String → fortlaufender int-Code (prozessweit, wächst nur).
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+        self.lock = threading.Lock()
+
+    def __call__(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is not None:
+            return code
+
+        with self.lock:
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.strings)
+                self.strings.append(value)
+            return code
+
+
+_codes = _Codes()
+_chunks = _LRU(MAX_CHUNKS)
+_weeks = _LRU(MAX_WEEKS)
+_results = _LRU(MAX_RESULTS)
+_lookups = {}
+_lookups_lock = threading.Lock()
+
+
+# ------------------------------------------------------
+# Wochen → Spalten
+# ------------------------------------------------------
+
+def entry_columns(entry: Any) -> np.ndarray:
+    """
+    Einsätze eines Filial-Eintrags der Übersicht. Zellen ohne Schicht
+    haben keine Stunden und fehlen.
+    """
+    if not isinstance(entry, dict):
+        return _EMPTY
+
+    filiale = _codes(str(entry.get("filiale", "")).strip())
+    tage = entry.get("tage") or {}
+    rows = []
+
+    for day, tag in enumerate(TAGE):
+        cell = tage.get(tag)
+        if not isinstance(cell, dict):
+            continue
+
+        schicht = str(cell.get("schicht") or "").strip()
+        if not schicht:
+            continue
+
+        schicht = _codes(schicht)
+        for label in cell.get("mitarbeiter") or []:
+            rows.append((filiale, day, schicht, _codes(label_name(label))))
+
+    if not rows:
+        return _EMPTY
+
+    return np.array(rows, dtype=np.int32)
+
+
+def _chunk_columns(digest: str, load_chunk: Callable) -> np.ndarray:
+    columns = _chunks.get(digest)
+    if columns is None:
+        columns = entry_columns(load_chunk(digest))
+        _chunks.put(digest, columns)
+    return columns
+
+
+def _stack(parts: list) -> np.ndarray:
+    parts = [p for p in parts if len(p)]
+    return np.concatenate(parts) if parts else _EMPTY
+
+
+def board_columns(version: str, board: Any) -> np.ndarray:
+    """
+    Spalten der aktuellen Übersicht ({"mode", "data": [...]}).
+    """
+    columns = _weeks.get(version)
+    if columns is None:
+        data = board.get("data") if isinstance(board, dict) else board
+        columns = _stack([entry_columns(e) for e in data or []])
+        _weeks.put(version, columns)
+    return columns
+
+
+def snapshot_columns(version: str, packed: dict, load_chunk: Callable) -> np.ndarray:
+    """
+    Spalten einer gepackten Kalenderwoche (KalenderwochenStore.snapshot).
+    """
+    columns = _weeks.get(version)
+    if columns is None:
+        if packed.get("type") == "raw":
+            columns = board_columns(version, packed.get("value"))
+        else:
+            columns = _stack([
+                _chunk_columns(digest, load_chunk) for digest in packed.get("chunks", [])
+            ])
+        _weeks.put(version, columns)
+    return columns
+
+
+# ------------------------------------------------------
+# Stammdaten → Lookup-Arrays
+# ------------------------------------------------------
+
+def _value(number: Optional[float]) -> float:
+    return math.nan if number is None else number
+
+
+def _lookup(mitarbeiter: tuple, schichten: tuple) -> tuple:
+    """
+    (stunden je Code, mitarbeiter je Code) für den aktuellen Code-Stand;
+    neu aufgebaut, wenn Stammdaten oder Codes sich geändert haben.
+    """
+    size = len(_codes.strings)
+    key = (id(mitarbeiter), id(schichten))
+
+    with _lookups_lock:
+        cached = _lookups.get(key)
+        if cached is not None and cached[0] is mitarbeiter and cached[1] is schichten and cached[2] == size:
+            return cached[3]
+
+    hours = np.zeros(size)
+    employee = np.full(size, -1, dtype=np.int64)
+
+    for schicht in schichten:
+        code = _codes.codes.get(schicht.name)
+        if code is not None and code < size:
+            hours[code] = shift_hours(schicht)
+
+    # Doppelte Namen: wie beim Planer zählt der erste Eintrag
+    for i in reversed(range(len(mitarbeiter))):
+        code = _codes.codes.get(mitarbeiter[i].name)
+        if code is not None and code < size:
+            employee[code] = i
+
+    with _lookups_lock:
+        _lookups.clear()
+        _lookups[key] = (mitarbeiter, schichten, size, (hours, employee))
+
+    return hours, employee
+
+
+# ------------------------------------------------------
+# Auswertung
+# ------------------------------------------------------
+
+def _round(values) -> list:
+    return np.round(values, 2).tolist()
+
+
+def summarize(weeks: list, mitarbeiter: tuple, schichten: tuple) -> dict:
+    """
+    weeks: [(label, spalten)], label z.B. {"jahr": 2026, "kalenderwoche": 12}.
+    mitarbeiter/schichten sind Records (backend/records.py).
+    """
+    W, E = len(weeks), len(mitarbeiter)
+
+    columns = _stack([c for _, c in weeks])
+    week = np.repeat(np.arange(W), [len(c) for _, c in weeks])
+    hours_of, employee_of = _lookup(mitarbeiter, schichten)
+
+    hours = hours_of[columns[:, SCHICHT]]
+    emp = employee_of[columns[:, NAME]]
+    known = emp >= 0
+
+    soll = np.array([_value(m.stunden_woche) for m in mitarbeiter])
+    rate = np.array([_value(m.stundensatz) for m in mitarbeiter])
+    rate_of = np.nan_to_num(rate)
+
+    cost = np.zeros(len(columns))
+    cost[known] = hours[known] * rate_of[emp[known]]
+
+    # Mitarbeiter × Woche
+    matrix = np.bincount(
+        emp[known] * W + week[known], hours[known], minlength=E * W
+    ).reshape(E, W)
+
+    total = matrix.sum(axis=1)
+    limit = np.where(np.isnan(soll), np.inf, soll)[:, None]
+    over = np.clip(matrix - limit, 0, None)
+    employee_cost = np.bincount(emp[known], cost[known], minlength=E)
+
+    # Filialen
+    filialen, filiale_pos = np.unique(columns[:, FILIALE], return_inverse=True)
+    filiale_hours = np.bincount(filiale_pos, hours, minlength=len(filialen))
+    filiale_cost = np.bincount(filiale_pos, cost, minlength=len(filialen))
+    filiale_count = np.bincount(filiale_pos, minlength=len(filialen))
+
+    # Wochen und Tage
+    week_hours = np.bincount(week, hours, minlength=W)
+    week_cost = np.bincount(week, cost, minlength=W)
+    week_count = np.bincount(week, minlength=W)
+    day_hours = np.bincount(columns[:, TAG], hours, minlength=len(TAGE))
+
+    unknown = np.unique(columns[~known, NAME])
+    strings = _codes.strings
+
+    return {
+        "gesamt": {
+            "stunden": round(float(hours.sum()), 2),
+            "kosten": round(float(cost.sum()), 2),
+            "einsaetze": len(columns),
+            "wochen": W,
+        },
+        "wochen": [
+            {**label, "stunden": h, "kosten": c, "einsaetze": n}
+            for (label, _), h, c, n in zip(
+                weeks, _round(week_hours), _round(week_cost), week_count.tolist()
+            )
+        ],
+        "mitarbeiter": [
+            {
+                "name": m.name,
+                "soll": m.stunden_woche,
+                "stunden": h,
+                "durchschnitt": a,
+                "max_woche": x,
+                "ueberstunden": o,
+                "wochen_ueber_soll": u,
+                "kosten": c,
+            }
+            for m, h, a, x, o, u, c in zip(
+                mitarbeiter,
+                _round(total),
+                _round(total / W if W else total),
+                _round(matrix.max(axis=1) if W else total),
+                _round(over.sum(axis=1)),
+                (over > 0).sum(axis=1).tolist(),
+                _round(employee_cost),
+            )
+        ],
+        "filialen": [
+            {"filiale": strings[f], "stunden": h, "kosten": c, "einsaetze": n}
+            for f, h, c, n in zip(
+                filialen.tolist(), _round(filiale_hours), _round(filiale_cost),
+                filiale_count.tolist(),
+            )
+        ],
+        "tage": dict(zip(TAGE, _round(day_hours))),
+        # Einträge ohne passenden Mitarbeiter (zählen nur bei Stunden)
+        "unbekannt": sorted(strings[n] for n in unknown.tolist()),
+    }
+
+
+def analyze(weeks: list, mitarbeiter: tuple, schichten: tuple) -> dict:
+    """
+    weeks: [(label, version, spalten_funktion)] – Spalten werden nur für
+    Wochen berechnet, deren Ergebnis nicht schon im Cache liegt. Das
+    Ergebnis ist gecacht und darf nicht verändert werden.
+    """
+    key = tuple(version for _, version, _ in weeks)
+
+    cached = _results.get(key)
+    if cached is not None and cached[0] is mitarbeiter and cached[1] is schichten:
+        return cached[2]
+
+    result = summarize(
+        [(label, columns()) for label, _, columns in weeks], mitarbeiter, schichten
+    )
+    _results.put(key, (mitarbeiter, schichten, result))
+
+    return result
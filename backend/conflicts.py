@@ -0,0 +1,345 @@
+import heapq
+import re
+import threading
+from typing import Any, Optional
+
+from backend.planner import label_name, shift_hours
+from backend.uebersicht import TAGE
+
+
+# ======================================================
+# KONFLIKTE IM PLAN (DOPPELBELEGUNG, ÜBERSCHNEIDUNG, ÜBERSTUNDEN)
+# ======================================================
+#
+# Prüft das Übersichts-Board pro Mitarbeiter (Name wie im Label
+# "Lukas Schneider, 40h/w"):
+#
+#   doppelbelegung   zwei Zellen am selben Tag, Zeiten überschneiden
+#                    sich nicht (oder Schicht ohne Zeiten)
+#   ueberschneidung  Arbeitsblöcke zweier Einsätze überlappen – auch über
+#                    Tagesgrenzen (Nachtschicht → Frühschicht)
+#   ueberstunden     Summe der Schichtstunden > Wochenstunden
+#
+# Intervall-Index: Jeder Mitarbeiter hat seine Einsätze; deren Blöcke
+# (Minuten ab Montag 0:00) werden nach Beginn sortiert und mit einem
+# Heap der offenen Enden durchlaufen – O(k log k) pro Mitarbeiter statt
+# alle Paare des Boards.
+#
+# Inkrementell: Der Index merkt sich je Zelle (filiale, tag) Schicht und
+# Labels. Für ein geändertes Board werden nur die Mitarbeiter geänderter
+# Zellen neu geprüft, der Rest wird übernommen.
+
+DAY = 24 * 60
+
+_HOURS_LABEL = re.compile(r"(\d+(?:[.,]\d+)?)\s*h", re.IGNORECASE)
+
+
+class PlanConflict(Exception):
+    """
+    Eine Änderung erzeugt neue Konflikte (siehe konflikte).
+    """
+
+    def __init__(self, konflikte: list):
+        super().__init__(f"{len(konflikte)} neue Konflikte")
+        self.konflikte = konflikte
+
+
+def label_hours(label: str) -> Optional[float]:
+    """
+    "Lukas Schneider, 40h/w" → 40.0
+    """
+    parts = str(label).rsplit(", ", 1)
+    if len(parts) < 2:
+        return None
+    match = _HOURS_LABEL.match(parts[1].strip())
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def _cells(board: Any, filialen: set = None) -> dict:
+    """
+    (filiale, tag_pos) → (schicht, (labels...)) aller belegten Zellen,
+    mit filialen nur die dieser Filialen.
+    """
+    cells = {}
+    data = board.get("data") if isinstance(board, dict) else None
+
+    for entry in data or []:
+        if not isinstance(entry, dict):
+            continue
+        filiale = str(entry.get("filiale", "")).strip()
+        if filialen is not None and filiale not in filialen:
+            continue
+        tage = entry.get("tage") or {}
+
+        for day, tag in enumerate(TAGE):
+            cell = tage.get(tag)
+            if not isinstance(cell, dict) or not cell.get("mitarbeiter"):
+                continue
+            cells[(filiale, day)] = (
+                str(cell.get("schicht") or "").strip(),
+                tuple(str(label) for label in cell["mitarbeiter"]),
+            )
+
+    return cells
+
+
+class ConflictIndex:
+
+    def __init__(self, mitarbeiter: tuple, schichten: tuple):
+        self.mitarbeiter = mitarbeiter
+        self.schichten = schichten
+
+        self.soll = {}
+        for m in mitarbeiter:
+            self.soll.setdefault(m.name, m.stunden_woche)
+        self.shifts = {s.name: (shift_hours(s), s.blocks()) for s in schichten}
+
+        self.cells = {}        # (filiale, tag_pos) → (schicht, labels)
+        self.einsaetze = {}    # name → {(filiale, tag_pos): label}
+        self.konflikte = {}    # name → [konflikt]
+        self.affected = set()  # bei derive neu geprüfte Mitarbeiter
+
+    # --------------------------------------------------
+    # Aufbau
+    # --------------------------------------------------
+
+    @classmethod
+    def build(cls, board: Any, mitarbeiter: tuple, schichten: tuple) -> "ConflictIndex":
+        index = cls(mitarbeiter, schichten)
+        index.cells = _cells(board)
+
+        for key, (_, labels) in index.cells.items():
+            for label in labels:
+                index.einsaetze.setdefault(label_name(label), {})[key] = label
+
+        for name in index.einsaetze:
+            index._check(name)
+
+        return index
+
+    def derive(self, board: Any, changed: Optional[list] = None) -> "ConflictIndex":
+        """
+        Index für ein geändertes Board. changed sind die geänderten
+        Zellen [(filiale, tag_pos)]; ohne Angabe werden alle Zellen
+        verglichen.
+        """
+        index = ConflictIndex.__new__(ConflictIndex)
+        index.mitarbeiter, index.schichten = self.mitarbeiter, self.schichten
+        index.soll, index.shifts = self.soll, self.shifts
+        index.einsaetze = dict(self.einsaetze)
+        index.konflikte = dict(self.konflikte)
+
+        if changed is None:
+            index.cells = _cells(board)
+            changed = {
+                key for key in self.cells.keys() | index.cells.keys()
+                if self.cells.get(key) != index.cells.get(key)
+            }
+        else:
+            changed = set(changed)
+            index.cells = dict(self.cells)
+            current = _cells(board, {filiale for filiale, _ in changed})
+            for key in changed:
+                if key in current:
+                    index.cells[key] = current[key]
+                else:
+                    index.cells.pop(key, None)
+
+        affected = set()
+        for key in changed:
+            for cells in (self.cells, index.cells):
+                for label in cells.get(key, ((), ()))[1]:
+                    affected.add(label_name(label))
+
+        for name in affected:
+            einsaetze = {
+                key: label for key, label in self.einsaetze.get(name, {}).items()
+                if key not in changed
+            }
+            for key in changed:
+                for label in index.cells.get(key, ((), ()))[1]:
+                    if label_name(label) == name:
+                        einsaetze[key] = label
+
+            if einsaetze:
+                index.einsaetze[name] = einsaetze
+            else:
+                index.einsaetze.pop(name, None)
+            index._check(name)
+
+        index.affected = affected
+        return index
+
+    # --------------------------------------------------
+    # Prüfung eines Mitarbeiters
+    # --------------------------------------------------
+
+    def _einsatz(self, key: tuple) -> dict:
+        filiale, day = key
+        return {"filiale": filiale, "tag": TAGE[day], "schicht": self.cells[key][0]}
+
+    def _check(self, name: str):
+        einsaetze = self.einsaetze.get(name)
+        if not einsaetze:
+            self.konflikte.pop(name, None)
+            return
+
+        konflikte = []
+        keys = sorted(einsaetze, key=lambda key: (key[1], key[0]))
+        order = {key: i for i, key in enumerate(keys)}
+
+        # Intervalle: (beginn, ende, einsatz)
+        intervals = []
+        for key in keys:
+            _, blocks = self.shifts.get(self.cells[key][0], (0.0, []))
+            for start, end in blocks:
+                intervals.append((key[1] * DAY + start, key[1] * DAY + end, order[key]))
+        intervals.sort()
+
+        overlapping = set()
+        active = []  # Heap (ende, einsatz)
+        for start, end, i in intervals:
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, j in active:
+                if j != i:
+                    overlapping.add((min(i, j), max(i, j)))
+            heapq.heappush(active, (end, i))
+
+        for i, j in sorted(overlapping):
+            konflikte.append({
+                "typ": "ueberschneidung",
+                "mitarbeiter": name,
+                "einsaetze": [self._einsatz(keys[i]), self._einsatz(keys[j])],
+            })
+
+        # Gleicher Tag ohne Überschneidung der Zeiten
+        by_day = {}
+        for key in keys:
+            by_day.setdefault(key[1], []).append(key)
+
+        for same_day in by_day.values():
+            for i, first in enumerate(same_day):
+                for second in same_day[i + 1:]:
+                    if (order[first], order[second]) in overlapping:
+                        continue
+                    konflikte.append({
+                        "typ": "doppelbelegung",
+                        "mitarbeiter": name,
+                        "einsaetze": [self._einsatz(first), self._einsatz(second)],
+                    })
+
+        # Wochenstunden
+        soll = self.soll.get(name)
+        if soll is None:
+            soll = next(
+                (h for h in map(label_hours, einsaetze.values()) if h is not None), None
+            )
+
+        if soll is not None:
+            stunden = sum(self.shifts.get(self.cells[key][0], (0.0, []))[0] for key in keys)
+            if stunden > soll + 1e-9:
+                konflikte.append({
+                    "typ": "ueberstunden",
+                    "mitarbeiter": name,
+                    "einsaetze": [self._einsatz(key) for key in keys],
+                    "stunden": stunden,
+                    "soll": soll,
+                })
+
+        if konflikte:
+            self.konflikte[name] = konflikte
+        else:
+            self.konflikte.pop(name, None)
+
+    # --------------------------------------------------
+    # Ergebnis
+    # --------------------------------------------------
+
+    def all(self) -> list:
+        return [k for name in sorted(self.konflikte) for k in self.konflikte[name]]
+
+    def new_since(self, previous: "ConflictIndex", names=None) -> list:
+        """
+        Konflikte, die es in previous (für diese Mitarbeiter) nicht gab.
+        """
+        if names is None:
+            names = self.konflikte.keys()
+
+        result = []
+        for name in sorted(names):
+            before = {_key(k) for k in previous.konflikte.get(name, ())}
+            result += [k for k in self.konflikte.get(name, ()) if _key(k) not in before]
+        return result
+
+
+def _key(konflikt: dict) -> tuple:
+    return (
+        konflikt["typ"],
+        konflikt["mitarbeiter"],
+        tuple((e["filiale"], e["tag"], e["schicht"]) for e in konflikt["einsaetze"]),
+    )
+
+
+# ======================================================
+# CACHE (EIN INDEX PRO BOARD-STAND)
+# ======================================================
+#
+# Wie beim Listen-Index hängt der Index an der Identität des Boards aus
+# dem Dokument-Cache. Ein neues Board wird vom zuletzt gebauten Index
+# abgeleitet statt komplett neu geprüft.
+
+_latest = None  # (board, index)
+_latest_lock = threading.Lock()
+
+
+def _remember(board: Any, index: ConflictIndex):
+    global _latest
+    with _latest_lock:
+        _latest = (board, index)
+
+
+def _base(mitarbeiter: tuple, schichten: tuple) -> Optional[tuple]:
+    with _latest_lock:
+        latest = _latest
+    if latest is None:
+        return None
+    if latest[1].mitarbeiter is not mitarbeiter or latest[1].schichten is not schichten:
+        return None
+    return latest
+
+
+def check_board(board: Any, mitarbeiter: tuple, schichten: tuple) -> ConflictIndex:
+    """
+    Index (und damit alle Konflikte) eines Boards.
+    """
+    latest = _base(mitarbeiter, schichten)
+
+    if latest is not None and latest[0] is board:
+        return latest[1]
+
+    if latest is None:
+        index = ConflictIndex.build(board, mitarbeiter, schichten)
+    else:
+        index = latest[1].derive(board)
+
+    _remember(board, index)
+    return index
+
+
+def check_change(
+    old: Any, new: Any, mitarbeiter: tuple, schichten: tuple, changed: Optional[list] = None
+) -> list:
+    """
+    Neue Konflikte durch den Wechsel old → new. changed sind die
+    geänderten Zellen [(filiale, tag)] – dann werden nur diese geprüft.
+    """
+    before = check_board(old, mitarbeiter, schichten)
+
+    if changed is not None:
+        changed = [(str(f).strip(), TAGE.index(tag)) for f, tag in changed]
+
+    index = before.derive(new, changed)
+    _remember(new, index)
+
+    return index.new_since(before, index.affected)
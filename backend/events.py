@@ -0,0 +1,283 @@
+import asyncio
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: nur Sperren innerhalb des Prozesses
+    fcntl = None
+
+from backend.executors import run_io
+
+
+# ======================================================
+# ÄNDERUNGS-EVENTS (BROKER ÜBER GETEILTE DATEI)
+# ======================================================
+#
+# Storage-Schreibvorgänge melden Änderungen als kleine Diff-Events
+# (siehe storage.add_change_listener). Alle gunicorn-Worker hängen sie als
+# JSON-Zeile an dieselbe Datei an (O_APPEND) – die Datei ist der Broker.
+# Jeder Worker liest die Datei fortlaufend mit und verteilt neue Zeilen
+# an seine SSE-Clients (GET /events).
+#
+# Event-ID ist "<inode>:<offset>" hinter der Zeile. Ein Client, der mit
+# Last-Event-ID neu verbindet, bekommt die verpassten Events aus der
+# Datei nachgeliefert. Nach einer Rotation (Datei > max_bytes) ist das
+# nicht mehr möglich – dann kommt ein "reset"-Event und der Client lädt
+# neu.
+#
+# Anhängen, Größe prüfen und Rotieren laufen unter fcntl.flock auf
+# <datei>.lock, damit nicht zwei Worker gleichzeitig rotieren.
+
+MAX_BYTES = int(os.environ.get("GMATRIX_EVENTS_MAX_BYTES", 4 * 1024 * 1024))
+POLL_SECONDS = float(os.environ.get("GMATRIX_EVENTS_POLL", 0.25))
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 256
+
+_RESET = object()
+
+
+def format_sse(event_id: str, name: str, data: str) -> str:
+    return f"id: {event_id}\nevent: {name}\ndata: {data}\n\n"
+
+
+class _Subscriber:
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def wants(self, resource: str) -> bool:
+        return self.resources is None or resource in self.resources
+
+
+class EventLog:
+
+    def __init__(self, path: str, max_bytes: int = MAX_BYTES, poll_seconds: float = POLL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.poll_seconds = poll_seconds
+
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+        # Lesezustand des Tails (nur unter _read_lock)
+        self._started = False
+        self._file = None
+        self._ino = None
+        self._position = 0
+        self._partial = b""
+
+        # Zustand im Event-Loop; _mark = (inode, offset) bis wohin verteilt
+        self._subscribers = set()
+        self._tail_task = None
+        self._mark = None
+
+    # --------------------------------------------------
+    # Schreiben (aus beliebigen Threads)
+    # --------------------------------------------------
+
+    def publish(self, resource: str, event: dict):
+        line = json.dumps(
+            {"resource": resource, **event}, ensure_ascii=False, separators=(",", ":")
+        )
+        raw = (line + "\n").encode("utf-8")
+
+        with self._write_lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # Pro Aufruf öffnen: eine über fork geerbte Sperre wäre geteilt
+            lock = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, raw)
+                    size = os.fstat(fd).st_size
+                finally:
+                    os.close(fd)
+
+                if size > self.max_bytes:
+                    # Leser halten die alte Datei offen und lesen sie zu Ende
+                    os.replace(self.path, self.path + ".1")
+            finally:
+                os.close(lock)
+
+    # --------------------------------------------------
+    # Mitlesen (ein Tail pro Prozess)
+    # --------------------------------------------------
+
+    def _open(self, from_start: bool):
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        self._file = file
+        self._ino = os.fstat(file.fileno()).st_ino
+        self._position = 0 if from_start else file.seek(0, os.SEEK_END)
+        self._partial = b""
+
+    def _read_new(self) -> tuple:
+        """
+        Liest neue vollständige Zeilen. Liefert ([(event_id, resource, zeile)],
+        (inode, offset) hinter der letzten Zeile).
+        """
+        with self._read_lock:
+            lines = self._read_locked()
+            return lines, (self._ino, self._position - len(self._partial))
+
+    def _read_locked(self) -> list:
+        lines = []
+
+        if self._file is None:
+            # Erst ab Start des Mitlesens; später angelegte Datei von vorn
+            self._open(from_start=self._started)
+            self._started = True
+            if self._file is None:
+                return lines
+
+        while True:
+            lines += self._split(self._file.read())
+
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+
+            if current is None or current == self._ino:
+                return lines
+
+            # Rotiert: alte Datei ist zu Ende gelesen, neue von vorn
+            self._file.close()
+            self._file = None
+            self._open(from_start=True)
+            if self._file is None:
+                return lines
+
+    def _split(self, data: bytes) -> list:
+        lines = []
+        if not data:
+            return lines
+
+        data = self._partial + data
+        start = self._position - len(self._partial)
+        *complete, self._partial = data.split(b"\n")
+
+        for raw in complete:
+            start += len(raw) + 1
+            try:
+                resource = json.loads(raw).get("resource", "")
+            except ValueError:
+                continue
+            lines.append((f"{self._ino}:{start}", resource, raw.decode("utf-8")))
+
+        self._position = start + len(self._partial)
+        return lines
+
+    async def _catch_up(self):
+        lines, mark = await run_io(self._read_new)
+        for event_id, resource, line in lines:
+            self._dispatch(event_id, resource, line)
+        self._mark = mark
+
+    async def _tail(self):
+        try:
+            while self._subscribers:
+                await self._catch_up()
+                await asyncio.sleep(self.poll_seconds)
+        finally:
+            self._tail_task = None
+
+    def _dispatch(self, event_id: str, resource: str, line: str):
+        for subscriber in list(self._subscribers):
+            if not subscriber.wants(resource):
+                continue
+            try:
+                subscriber.queue.put_nowait((event_id, resource, line))
+            except asyncio.QueueFull:
+                # Zu langsamer Client: abkoppeln, er holt per Last-Event-ID nach
+                self._subscribers.discard(subscriber)
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(_RESET)
+
+    # --------------------------------------------------
+    # Nachliefern ab Last-Event-ID
+    # --------------------------------------------------
+
+    def _replay(self, last_event_id: str, ino, end: int):
+        """
+        Zeilen zwischen last_event_id und end aus der aktuellen Datei.
+        None, wenn die ID nicht mehr zur Datei passt (rotiert).
+        """
+        try:
+            event_ino, offset = (int(part) for part in last_event_id.split(":"))
+        except ValueError:
+            return None
+
+        if event_ino != ino or offset > end:
+            return None
+
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_ino != ino:
+                return None
+            file.seek(offset)
+            data = file.read(end - offset)
+
+        lines = []
+        for raw in data.split(b"\n")[:-1]:
+            offset += len(raw) + 1
+            try:
+                resource = json.loads(raw).get("resource", "")
+            except ValueError:
+                continue
+            lines.append((f"{ino}:{offset}", resource, raw.decode("utf-8")))
+        return lines
+
+    # --------------------------------------------------
+    # SSE
+    # --------------------------------------------------
+
+    async def stream(self, resources=None, last_event_id: str = None):
+        subscriber = _Subscriber(resources)
+
+        if self._mark is None:
+            await self._catch_up()
+
+        # Stand merken und sofort anmelden – alles danach kommt über die Queue
+        ino, position = self._mark
+        self._subscribers.add(subscriber)
+        if self._tail_task is None:
+            self._tail_task = asyncio.ensure_future(self._tail())
+
+        try:
+            yield "retry: 2000\n\n"
+
+            if last_event_id:
+                missed = await run_io(self._replay, last_event_id, ino, position)
+                if missed is None:
+                    yield format_sse(f"{ino}:{position}", "reset", "{}")
+                else:
+                    for event_id, resource, line in missed:
+                        if subscriber.wants(resource):
+                            yield format_sse(event_id, resource, line)
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if item is _RESET:
+                    yield format_sse("{}:{}".format(*self._mark), "reset", "{}")
+                    return
+
+                yield format_sse(*item)
+        finally:
+            self._subscribers.discard(subscriber)
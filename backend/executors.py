@@ -0,0 +1,272 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from backend.metrics import captured, replay
+
+
+# ======================================================
+# EXECUTORS
+# ======================================================
+#
+# Blockierende Arbeit läuft nicht im gemeinsamen Starlette-Threadpool,
+# sondern in eigenen, begrenzten Pools:
+#
+#   io  → Datei-/Datenbankzugriffe der Storage-Schicht (GMATRIX_IO_WORKERS)
+#   pdf → ReportLab-Rendering der Rechnungen (GMATRIX_PDF_WORKERS, pro Worker)
+#   stream → Erzeuger für gestreamte Antworten (GMATRIX_STREAM_WORKERS)
+#
+# Ein langsamer PDF-Export belegt so nie die Threads, die /mitarbeiter
+# und Co. bedienen. Das Rendering hält den GIL, deshalb laufen PDFs in
+# eigenen Prozessen ("spawn": kein fork eines Prozesses mit laufenden
+# IO-Threads). Threads und Prozesse entstehen erst beim ersten Auftrag,
+# shutdown() (Lifespan der App) beendet sie wieder.
+#
+# Alle Pools gibt es einmal pro Prozess, unter gunicorn also in jedem
+# Worker. GMATRIX_PDF_WORKERS gilt deshalb pro Worker; ohne Angabe teilen
+# sich die Worker die CPU-Kerne (Anzahl aus GMATRIX_WORKERS bzw.
+# WEB_CONCURRENCY, gunicorn.conf.py setzt sie), mindestens ein Prozess.
+
+IO_WORKERS = int(os.environ.get("GMATRIX_IO_WORKERS", 8))
+WEB_WORKERS = max(1, int(
+    os.environ.get("GMATRIX_WORKERS") or os.environ.get("WEB_CONCURRENCY") or 1
+))
+PDF_WORKERS = int(
+    os.environ.get("GMATRIX_PDF_WORKERS") or max(1, (os.cpu_count() or 2) // WEB_WORKERS)
+)
+STREAM_WORKERS = int(os.environ.get("GMATRIX_STREAM_WORKERS", 4))
+
+
+
+# ------------------------------------------------------
+# Pools (erst beim ersten Auftrag)
+# ------------------------------------------------------
+
+def _create_io():
+    return ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="gmatrix-io")
+
+
+def _create_pdf():
+    return ProcessPoolExecutor(
+        max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _create_stream():
+    return ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="gmatrix-stream")
+
+
+POOLS = {"io": _create_io, "pdf": _create_pdf, "stream": _create_stream}
+
+
+def _reset():
+    global _pools, _pools_lock, _manager, _manager_lock
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+    # Queues für gestreamte PDFs (stream_from_process), erst bei Bedarf
+    _manager = None
+    _manager_lock = threading.Lock()
+
+
+_reset()
+
+# Per fork erzeugte Worker (gunicorn mit preload_app) legen eigene Pools
+# an – die Queues eines Prozess-Pools im Master wären sonst geteilt
+os.register_at_fork(after_in_child=_reset)
+
+
+def pool(name: str):
+    """
+    Pool "io", "pdf" oder "stream"; wird beim ersten Aufruf angelegt.
+    """
+    created = _pools.get(name)
+    if created is None:
+        with _pools_lock:
+            created = _pools.get(name)
+            if created is None:
+                created = _pools[name] = POOLS[name]()
+    return created
+
+
+def shutdown():
+    """
+    Beendet alle Pools und den Manager-Prozess (Lifespan der App in
+    main.py). Offene Aufträge werden verworfen, laufende abgewartet –
+    danach sind keine PDF-Prozesse oder Semaphoren mehr übrig.
+    """
+    global _manager
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    with _manager_lock:
+        manager, _manager = _manager, None
+
+    for running in pools:
+        running.shutdown(wait=True, cancel_futures=True)
+    if manager is not None:
+        manager.shutdown()
+
+
+async def run_in(executor, fn, *args, **kwargs):
+    """
+    Führt fn(*args, **kwargs) im angegebenen Pool aus und wartet darauf.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_io(fn, *args, **kwargs):
+    return await run_in(pool("io"), fn, *args, **kwargs)
+
+
+async def run_pdf(fn, *args, **kwargs):
+    # Metriken aus dem Worker-Prozess hier eintragen (metrics.captured)
+    result, samples = await run_in(pool("pdf"), captured, fn, *args, **kwargs)
+    replay(samples)
+    return result
+
+
+# ------------------------------------------------------
+# Gestreamte Erzeuger
+# ------------------------------------------------------
+
+class StreamClosed(Exception):
+    """Der Client hat die Verbindung beendet."""
+
+
+async def stream_from_thread(produce, *args, maxsize: int = 4):
+    """
+    Ruft produce(*args, emit) im Stream-Pool auf und liefert alles, was
+    über emit(bytes) kommt, als async Iterator.
+
+    Die Warteschlange fasst maxsize Blöcke; ist sie voll, blockiert emit
+    bis der Client nachgelesen hat. Bricht der Client ab, wirft emit
+    StreamClosed und der Erzeuger endet.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize)
+    closed = threading.Event()
+    done = object()
+
+    def emit(chunk: bytes):
+        if closed.is_set():
+            raise StreamClosed()
+        asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+
+    def run():
+        result = done
+        try:
+            produce(*args, emit)
+        except StreamClosed:
+            return
+        except Exception as e:
+            result = e
+        asyncio.run_coroutine_threadsafe(queue.put(result), loop)
+
+    loop.run_in_executor(pool("stream"), run)
+
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        closed.set()
+        # Blockiertes emit freigeben, damit der Erzeuger StreamClosed sieht
+        while not queue.empty():
+            queue.get_nowait()
+
+
+# ------------------------------------------------------
+# Gestreamte Erzeuger im PDF-Pool
+# ------------------------------------------------------
+#
+# Für Erzeuger, die den GIL halten (ReportLab): produce läuft in einem
+# Prozess des PDF-Pools, die Blöcke kommen über eine Queue eines
+# Manager-Prozesses zurück (Queues lassen sich an Pool-Aufträge übergeben,
+# anders als multiprocessing.Queue). Die Queue fasst maxsize Blöcke –
+# dieselbe Rückstauung wie bei stream_from_thread.
+
+POLL_SECONDS = 0.5
+
+
+def _queues():
+    global _manager
+
+    with _manager_lock:
+        if _manager is None:
+            _manager = multiprocessing.get_context("spawn").Manager()
+        return _manager
+
+
+def _produce_into(chunks, closed, produce, *args):
+    """
+    Läuft im PDF-Prozess: produce(*args, emit), emit legt in chunks ab.
+    """
+    def emit(chunk: bytes):
+        while True:
+            if closed.is_set():
+                raise StreamClosed()
+            try:
+                chunks.put(chunk, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
+
+    try:
+        produce(*args, emit)
+        emit(None)   # Ende
+    except StreamClosed:
+        pass
+
+
+def _next_chunk(chunks, future):
+    """
+    Läuft im Stream-Pool: nächster Block oder None am Ende.
+    """
+    while True:
+        try:
+            return chunks.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            # Erzeuger mit Fehler beendet oder abgestürzt
+            if future.done():
+                return None
+
+
+async def stream_from_process(produce, *args, maxsize: int = 4):
+    """
+    Wie stream_from_thread, aber produce(*args, emit) läuft in einem
+    Prozess des PDF-Pools und hält dort den GIL statt im Server-Prozess.
+    """
+    loop = asyncio.get_running_loop()
+    stream_executor = pool("stream")
+    manager = await loop.run_in_executor(stream_executor, _queues)
+    chunks = manager.Queue(maxsize)
+    closed = manager.Event()
+
+    future = loop.run_in_executor(
+        pool("pdf"), functools.partial(captured, _produce_into, chunks, closed, produce, *args)
+    )
+
+    try:
+        while True:
+            chunk = await loop.run_in_executor(stream_executor, _next_chunk, chunks, future)
+            if chunk is None:
+                break
+            yield chunk
+
+        _, samples = await future
+        replay(samples)
+    finally:
+        if not future.done():
+            # Abbruch durch den Client: Erzeuger beim nächsten emit beenden
+            await loop.run_in_executor(stream_executor, closed.set)
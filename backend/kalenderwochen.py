@@ -0,0 +1,463 @@
+import bisect
+import copy
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+
+from backend.storage import (
+    load_json, save_json, file_exists, remove_json, etag_json, document_etag,
+    publish_change, store_lock,
+)
+
+
+# ======================================================
+# KALENDERWOCHEN SPEICHER (PRO WOCHE + GETEILTE CHUNKS)
+# ======================================================
+#
+# Früher lag jede Woche mit einer vollständigen Kopie der Übersicht in
+# einer einzigen kalenderwochen.json. Jetzt:
+#
+#   kalenderwochen/weeks.json              → Liste [[jahr, kw], ...]
+#   kalenderwochen/weeks/2026-05.json      → eine Woche (nur Hashes)
+#   kalenderwochen/chunks/ab/ab12….json    → ein Filial-Eintrag der Übersicht
+#
+# Die Filial-Einträge (filiale + tage) werden über den SHA-256 ihres
+# kanonischen JSON adressiert. Unveränderte Filialen teilen sich so den
+# Chunk mit der Vorwoche; pro Woche kommen nur geänderte Filialen hinzu.
+# Einzelne Wochen lesen/schreiben nur ihren eigenen Datensatz.
+
+
+def chunk_hash(entry: Any) -> str:
+    canonical = json.dumps(
+        entry, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def filialen_of(entries: list) -> list:
+    """
+    Filialnummer je Übersichts-Eintrag (parallel zu den Chunks), damit
+    Abfragen für eine Filiale nur deren Chunks lesen müssen.
+    """
+    return [
+        str(e.get("filiale", "")).strip() if isinstance(e, dict) else None
+        for e in entries
+    ]
+
+
+class WeekIndex:
+    """
+    Index (jahr, kw) → Pfad des Wochen-Datensatzes, zusätzlich sortierte
+    Schlüssel für Bereichsabfragen (z.B. alle Wochen 2026, KW 10–20).
+    """
+
+    def __init__(self, keys: list, location):
+        self.locations = {key: location(key) for key in keys}
+        self.sorted_keys = sorted(self.locations)
+
+    def __contains__(self, key) -> bool:
+        return key in self.locations
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def add(self, key: tuple, path: str):
+        if key not in self.locations:
+            bisect.insort(self.sorted_keys, key)
+        self.locations[key] = path
+
+    def remove(self, key: tuple):
+        if self.locations.pop(key, None) is not None:
+            del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+
+    def range(self, start: tuple, end: tuple) -> list:
+        """
+        Alle Schlüssel mit start <= (jahr, kw) <= end, chronologisch.
+        """
+        lo = bisect.bisect_left(self.sorted_keys, start)
+        hi = bisect.bisect_right(self.sorted_keys, end)
+        return self.sorted_keys[lo:hi]
+
+
+class KalenderwochenStore:
+
+    def __init__(self, directory: str, legacy_path: str = None):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.manifest_path = os.path.join(directory, "weeks.json")
+        self._lock = threading.RLock()
+        self._migrated = False
+        self._index = None
+        self._index_source = None
+
+    # --------------------------------------------------
+    # Pfade
+    # --------------------------------------------------
+
+    def week_path(self, kw: int, jahr: int) -> str:
+        return os.path.join(self.directory, "weeks", f"{jahr}-{kw:02d}.json")
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "chunks", digest[:2], digest + ".json")
+
+    # --------------------------------------------------
+    # Übersicht ↔ Chunks
+    # --------------------------------------------------
+
+    def _store_chunks(self, entries: list) -> list:
+        digests = []
+
+        for entry in entries:
+            digest = chunk_hash(entry)
+            chunk = self.chunk_path(digest)
+
+            # Inhaltsadressiert: vorhandener Chunk ist identisch
+            if not file_exists(chunk):
+                save_json(chunk, copy.deepcopy(entry))
+
+            digests.append(digest)
+
+        return digests
+
+    def _pack(self, uebersicht: Any) -> dict:
+        if isinstance(uebersicht, dict) and isinstance(uebersicht.get("data"), list):
+            meta = {k: v for k, v in uebersicht.items() if k != "data"}
+            return {
+                "type": "board",
+                "meta": meta,
+                "chunks": self._store_chunks(uebersicht["data"]),
+                "filialen": filialen_of(uebersicht["data"]),
+            }
+
+        if isinstance(uebersicht, list):
+            return {
+                "type": "list",
+                "chunks": self._store_chunks(uebersicht),
+                "filialen": filialen_of(uebersicht),
+            }
+
+        return {"type": "raw", "value": uebersicht}
+
+    def _unpack(self, packed: dict, filiale: str = None) -> Any:
+        kind = packed.get("type")
+
+        if kind == "raw":
+            return copy.deepcopy(packed.get("value"))
+
+        digests = packed.get("chunks", [])
+        filialen = packed.get("filialen")
+
+        # Nur die Chunks der gewünschten Filiale lesen
+        if filiale is not None and filialen is not None:
+            digests = [d for d, f in zip(digests, filialen) if f == filiale]
+
+        entries = [
+            copy.deepcopy(load_json(self.chunk_path(d), default={}))
+            for d in digests
+        ]
+
+        # Ältere Datensätze ohne "filialen": nach dem Laden filtern
+        if filiale is not None and filialen is None:
+            entries = [e for e in entries if filialen_of([e]) == [filiale]]
+
+        if kind == "list":
+            return entries
+
+        return {**copy.deepcopy(packed.get("meta", {})), "data": entries}
+
+    # --------------------------------------------------
+    # Manifest
+    # --------------------------------------------------
+
+    def _keys(self) -> list:
+        self._migrate_legacy()
+        return [tuple(k) for k in load_json(self.manifest_path, default=[])]
+
+    def _save_keys(self, keys: list):
+        save_json(self.manifest_path, [list(k) for k in keys])
+
+    def index(self) -> WeekIndex:
+        """
+        Liefert den Index. Er wird nur neu aufgebaut, wenn sich das
+        Manifest geändert hat – der Dokument-Cache liefert solange
+        dasselbe Objekt.
+        """
+        self._migrate_legacy()
+        manifest = load_json(self.manifest_path, default=[])
+
+        if self._index is None or manifest is not self._index_source:
+            with self._lock:
+                manifest = load_json(self.manifest_path, default=[])
+                self._index = WeekIndex(
+                    [tuple(k) for k in manifest],
+                    lambda key: self.week_path(key[1], key[0]),
+                )
+                self._index_source = manifest
+
+        return self._index
+
+    def _sync_index(self, index: WeekIndex):
+        # Nach eigenem Schreiben des Manifests Neuaufbau vermeiden
+        self._index = index
+        self._index_source = load_json(self.manifest_path, default=[])
+
+    # --------------------------------------------------
+    # Öffentliche API
+    # --------------------------------------------------
+
+    def get(self, kw: int, jahr: int, with_uebersicht: bool = True, filiale: str = None):
+        """
+        Liefert eine Woche im bisherigen Format oder None. Mit filiale
+        enthält die Übersicht nur den Eintrag dieser Filiale.
+        """
+        location = self.index().locations.get((jahr, kw))
+
+        if location is None:
+            return None
+
+        record = load_json(location, default={})
+
+        if not record:
+            return None
+
+        entry = {
+            "kalenderwoche": record["kalenderwoche"],
+            "jahr": record["jahr"],
+            "tage": copy.deepcopy(record.get("tage", {})),
+        }
+
+        if with_uebersicht:
+            entry["uebersicht"] = self._unpack(record["uebersicht"], filiale)
+
+        return entry
+
+    def version(self, kw: int, jahr: int):
+        """
+        ETag einer Woche oder None. Der Datensatz enthält die Hashes
+        aller Chunks und bestimmt den Inhalt damit vollständig.
+        """
+        location = self.index().locations.get((jahr, kw))
+
+        if location is None:
+            return None
+
+        record = load_json(location, default={})
+        return etag_json(location, record) if record else None
+
+    def snapshot(self, kw: int, jahr: int):
+        """
+        (version, gepackte Übersicht) einer Woche oder None – ohne Kopie,
+        nur lesend verwenden. Chunks über chunk(digest).
+        """
+        location = self.index().locations.get((jahr, kw))
+
+        if location is None:
+            return None
+
+        record = load_json(location, default={})
+
+        if not record:
+            return None
+
+        return etag_json(location, record), record["uebersicht"]
+
+    def chunk(self, digest: str) -> Any:
+        """
+        Filial-Eintrag eines Chunks (gecacht, nur lesend verwenden).
+        """
+        return load_json(self.chunk_path(digest), default={})
+
+    def get_uebersicht(self, kw: int, jahr: int):
+        entry = self.get(kw, jahr)
+        return None if entry is None else entry["uebersicht"]
+
+    def all(self) -> list:
+        return [self.get(kw, jahr) for jahr, kw in self._keys()]
+
+    def range(self, start: tuple, end: tuple, with_uebersicht: bool = True) -> list:
+        """
+        Wochen von start bis end (jeweils (jahr, kw), inklusive),
+        chronologisch sortiert.
+        """
+        return [
+            self.get(kw, jahr, with_uebersicht)
+            for jahr, kw in self.index().range(start, end)
+        ]
+
+    def query(
+        self,
+        start: tuple = None,
+        end: tuple = None,
+        offset: int = 0,
+        limit: int = None,
+        fields: set = None,
+        filiale: str = None,
+    ):
+        """
+        Seitenweise Abfrage: liefert (gesamt, wochen). Nur die Wochen der
+        Seite werden gelesen; ohne "uebersicht" in fields auch keine Chunks.
+
+        Ohne start/end in Speicherreihenfolge (wie all()), sonst
+        chronologisch über den Index (wie range()).
+        """
+        total, page = self._page(start, end, offset, limit)
+        with_uebersicht = fields is None or "uebersicht" in fields
+
+        entries = []
+        for jahr, kw in page:
+            entry = self.get(kw, jahr, with_uebersicht, filiale)
+            if entry is None:
+                continue
+            if fields is not None:
+                entry = {k: v for k, v in entry.items() if k in fields}
+            entries.append(entry)
+
+        return total, entries
+
+    def query_version(
+        self,
+        start: tuple = None,
+        end: tuple = None,
+        offset: int = 0,
+        limit: int = None,
+        fields: set = None,
+        filiale: str = None,
+    ):
+        """
+        (gesamt, ETag) derselben Abfrage wie query() – aus Manifest und
+        den Versionen der Wochen der Seite, ohne Chunks zu lesen.
+        """
+        total, page = self._page(start, end, offset, limit)
+
+        return total, document_etag({
+            "wochen": [[jahr, kw, self.version(kw, jahr)] for jahr, kw in page],
+            "felder": None if fields is None else sorted(fields),
+            "filiale": filiale,
+        })
+
+    def _page(self, start: tuple, end: tuple, offset: int, limit: int) -> tuple:
+        if start is None:
+            keys = self._keys()
+        else:
+            keys = self.index().range(start, end)
+
+        stop = None if limit is None else offset + limit
+        return len(keys), keys[offset:stop]
+
+    def put(self, entry: dict) -> bool:
+        """
+        Speichert (oder ersetzt) eine Woche. Liefert True bei Ersetzen.
+        """
+        kw, jahr = entry["kalenderwoche"], entry["jahr"]
+
+        with self._lock, store_lock(self.manifest_path):
+            index = self.index()
+            replaced = (jahr, kw) in index
+
+            old_chunks = set()
+            if replaced:
+                old_chunks = self._record_chunks(kw, jahr)
+
+            record = {
+                "kalenderwoche": kw,
+                "jahr": jahr,
+                "tage": entry.get("tage", {}),
+                "uebersicht": self._pack(entry.get("uebersicht", [])),
+            }
+            save_json(self.week_path(kw, jahr), record)
+
+            if not replaced:
+                keys = self._keys()
+                keys.append((jahr, kw))
+                self._save_keys(keys)
+                index.add((jahr, kw), self.week_path(kw, jahr))
+                self._sync_index(index)
+            else:
+                self._collect_garbage(old_chunks - set(record["uebersicht"].get("chunks", [])))
+
+            publish_change("kalenderwochen", {
+                "op": "update" if replaced else "insert",
+                "kalenderwoche": kw,
+                "jahr": jahr,
+                "etag": self.version(kw, jahr),
+            })
+
+        return replaced
+
+    def delete(self, kw: int, jahr: int) -> bool:
+        with self._lock, store_lock(self.manifest_path):
+            index = self.index()
+
+            if (jahr, kw) not in index:
+                return False
+
+            old_chunks = self._record_chunks(kw, jahr)
+
+            keys = self._keys()
+            keys.remove((jahr, kw))
+            self._save_keys(keys)
+            index.remove((jahr, kw))
+            self._sync_index(index)
+            remove_json(self.week_path(kw, jahr))
+
+            self._collect_garbage(old_chunks)
+
+            publish_change("kalenderwochen", {"op": "delete", "kalenderwoche": kw, "jahr": jahr})
+
+        return True
+
+    # --------------------------------------------------
+    # Aufräumen
+    # --------------------------------------------------
+
+    def _record_chunks(self, kw: int, jahr: int) -> set:
+        record = load_json(self.week_path(kw, jahr), default={})
+        return set(record.get("uebersicht", {}).get("chunks", []))
+
+    def _collect_garbage(self, candidates: set):
+        """
+        Entfernt Chunks aus candidates, die keine andere Woche mehr nutzt.
+        Liest dafür nur die (kleinen) Wochen-Datensätze, keine Chunks.
+        """
+        if not candidates:
+            return
+
+        for jahr, kw in self._keys():
+            candidates -= self._record_chunks(kw, jahr)
+            if not candidates:
+                return
+
+        for digest in candidates:
+            remove_json(self.chunk_path(digest))
+
+    # --------------------------------------------------
+    # Migration aus kalenderwochen.json
+    # --------------------------------------------------
+
+    def _migrate_legacy(self):
+        """
+        Übernimmt einmalig die alte kalenderwochen.json (Liste vollständiger
+        Wochen). Die Datei selbst bleibt unverändert (sie ist eingecheckt);
+        als erledigt gilt die Migration, sobald das Manifest existiert.
+        """
+        if self._migrated or not self.legacy_path:
+            return
+
+        with self._lock, store_lock(self.manifest_path):
+            if self._migrated:
+                return
+            self._migrated = True
+
+            if file_exists(self.manifest_path):
+                return
+
+            legacy = load_json(self.legacy_path, default=[])
+            if isinstance(legacy, list):
+                for entry in legacy:
+                    if isinstance(entry, dict) and "kalenderwoche" in entry and "jahr" in entry:
+                        self.put(entry)
+
+            if not file_exists(self.manifest_path):
+                self._save_keys([])
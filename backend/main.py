@@ -1,16 +1,74 @@
-from fastapi import FastAPI, Body, HTTPException
+from fastapi import FastAPI, Body, File, Header, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from backend.storage import load_json, save_json
+from backend.storage import (
+    aload_json,
+    asave_json,
+    aappend_json,
+    aupdate_json_index,
+    adelete_json_index,
+    abatch_json,
+    aload_ids,
+    aget_json_id,
+    aupdate_json_id,
+    adelete_json_id,
+    amodify_json,
+    aetag_json,
+    aencoded_json,
+    encode_json,
+    load_json,
+    etag_json,
+    VersionConflict,
+    cache_stats,
+    watch_resource,
+    add_change_listener,
+)
+from backend import executors
+from backend.executors import run_io, run_pdf, stream_from_process, stream_from_thread
+from backend.events import EventLog
+from backend.models import AutoPlanPayload, BatchPayload, RechnungBatchPayload, UebersichtPatch
+from backend.uebersicht import TAGE, patch_board
+from backend.query import query_list
+from backend.search import MasterDataSearch
+from backend import transfer
+from backend.records import MitarbeiterRecord, SchichtRecord, load_records
+from backend.planner import plan_week
+from backend.conflicts import PlanConflict, check_board, check_change
+from backend.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from backend.profiler import profiler_from_env
+import asyncio
+import hashlib
+import importlib
 import os
-from fastapi.responses import StreamingResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm
-import io
-from reportlab.lib.utils import ImageReader
-import base64
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# ======================================================
+# JSON-ANTWORTEN
+# ======================================================
+#
+# Antworten werden mit dem Serializer der Stores kodiert (orjson, falls
+# installiert – siehe storage.encode_json). Unveränderte Dokumente gehen
+# als bereits kodierte Bytes raus (siehe encoded).
+
+class GMatrixJSONResponse(JSONResponse):
 
-app = FastAPI(title="GMatrix API")
+    def render(self, content) -> bytes:
+        return encode_json(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # PDF-Prozesse, Manager und Threads beenden (sonst bleiben Prozesse
+    # und Semaphoren nach dem Worker übrig)
+    executors.shutdown()
+
+
+app = FastAPI(
+    title="GMatrix API", default_response_class=GMatrixJSONResponse, lifespan=lifespan
+)
 
 # ======================================================
 # CORS
@@ -22,186 +80,810 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "ETag"],
 )
 
+# ======================================================
+# METRIKEN
+# ======================================================
+#
+# Jede Anfrage wird pro Routen-Vorlage gemessen (backend/metrics.py);
+# GET /metrics liefert alle Histogramme im Prometheus-Format. Mit
+# GMATRIX_PROFILE_SLOW_MS=500 nimmt der Profiler Stacks langsamer
+# Anfragen auf (GET /metrics/profile, backend/profiler.py).
+
+slow_profiler = profiler_from_env()
+app.add_middleware(MetricsMiddleware, profiler=slow_profiler)
+
 # ======================================================
 # PATH SETUP
 # ======================================================
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+DATA_DIR = os.environ.get("GMATRIX_DATA_DIR", os.path.join(BASE_DIR, "..", "data"))
 
 def path(filename: str):
     return os.path.join(DATA_DIR, filename)
 
 
+# ======================================================
+# SCHWERE MODULE (ERST BEIM ERSTEN GEBRAUCH)
+# ======================================================
+#
+# ReportLab/PIL (backend/pdf.py) braucht nur /rechnung/pdf, numpy
+# (backend/analytics.py) nur /auswertung. Beide werden beim ersten Aufruf
+# importiert – Start und Speicher eines Workers, der sie nie braucht,
+# bleiben klein. Mit gunicorn.conf.py (preload_app) importiert der Master
+# sie vorab und die Worker teilen sie (backend/startup.py).
+
+LAZY_MODULES = ("backend.pdf", "backend.analytics")
+
+
+def pdf_module():
+    return importlib.import_module("backend.pdf")
+
+
+def analytics_module():
+    return importlib.import_module("backend.analytics")
+
+
 # ======================================================
 # ROOT
 # ======================================================
 
 @app.get("/")
-def root():
+async def root():
     return {"status": "GMatrix Backend läuft"}
 
 
+@app.get("/storage/cache")
+async def get_storage_cache():
+    return cache_stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/metrics/profile")
+async def get_metrics_profile():
+    if slow_profiler is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Profiler nicht aktiv (GMATRIX_PROFILE_SLOW_MS setzen)",
+        )
+    return list(slow_profiler.profiles)
+
+
+# ======================================================
+# ÄNDERUNGS-EVENTS (SERVER-SENT EVENTS)
+# ======================================================
+#
+# GET /events?resources=uebersicht,mitarbeiter liefert jede Änderung an
+# den Stores als Diff-Event (siehe storage.watch_resource), auch wenn sie
+# in einem anderen Worker passiert ist. Event-Name ist die Ressource:
+#
+#   const es = new EventSource(API + "/events?resources=uebersicht");
+#   es.addEventListener("uebersicht", e => ... JSON.parse(e.data) ...);
+#
+# Bei "reset" sind Events verloren gegangen → Daten neu laden.
+
+events = EventLog(path("events.log"))
+add_change_listener(events.publish)
+
+
+@app.get("/events")
+async def get_events(
+    resources: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    wanted = None
+    if resources:
+        wanted = {r.strip() for r in resources.split(",") if r.strip()}
+
+    return StreamingResponse(
+        events.stream(wanted, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ======================================================
+# BEDINGTE ANFRAGEN (ETAG)
+# ======================================================
+#
+# GET-Antworten tragen eine starke ETag (Hash des Inhalts, siehe
+# storage.etag_json). Schickt der Client sie als If-None-Match zurück und
+# hat sich nichts geändert, kommt 304 ohne Body. Cache-Control: no-cache
+# lässt den Browser vor jeder Verwendung so nachfragen.
+
+def etag_list(header: Optional[str]) -> set:
+    return {tag.strip() for tag in header.split(",")} if header else set()
+
+
+def variant_etag(etag: str, variant: str) -> str:
+    """
+    ETag für eine abgeleitete Antwort (Seite, Filter, IDs) desselben Stands.
+    """
+    if not variant:
+        return etag
+    digest = hashlib.sha256(f"{etag}|{variant}".encode("utf-8")).hexdigest()
+    return '"' + digest[:32] + '"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    response.headers.update(headers)
+
+    tags = etag_list(request.headers.get("if-none-match"))
+    if "*" in tags or etag in tags or f"W/{etag}" in tags:
+        return Response(status_code=304, headers=headers)
+
+    return None
+
+
+def encoded(response: Response, body: bytes) -> Response:
+    """
+    Schickt bereits kodiertes JSON (storage.encoded_json) samt der auf
+    response gesetzten Header.
+    """
+    headers = {
+        key: value for key, value in response.headers.items()
+        if key not in ("content-length", "content-type")
+    }
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# ======================================================
+# BATCH (gemeinsam für alle Listen)
+# ======================================================
+
+async def run_batch(file: str, payload: BatchPayload, label: str):
+    """
+    Wendet alle Operationen mit einem Lesen und einem Schreiben an.
+    Indizes beziehen sich auf den Stand vor dem Batch.
+    """
+    operations = [op.model_dump(exclude_unset=True) for op in payload.operations]
+
+    try:
+        counts = await abatch_json(file, operations)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Index ungültig")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"message": f"{label} Batch ausgeführt", **counts}
+
+
+# ======================================================
+# LISTEN ABFRAGEN (gemeinsam für alle Listen)
+# ======================================================
+#
+# ?offset=&limit= liefert eine Seite, Filter (z.B. ?name=, ?filiale=)
+# laufen über einen In-Memory-Index (backend/query.py). Die Gesamtzahl
+# der Treffer steht im Header X-Total-Count. Ohne Parameter kommt wie
+# bisher die ganze Liste.
+
+async def list_page(
+    file: str, request: Request, response: Response, spec: dict, offset: int, limit, **filters
+):
+    rows = await aload_json(file)
+
+    etag = variant_etag(await aetag_json(file, rows), request.url.query)
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    if not offset and limit is None and all(v is None for v in filters.values()):
+        # Ganze Liste: einmal kodiert pro Stand
+        response.headers["X-Total-Count"] = str(len(rows))
+        return encoded(response, await aencoded_json(file, rows))
+
+    total, page = await run_io(query_list, file, spec, filters, offset, limit, rows)
+    response.headers["X-Total-Count"] = str(total)
+    return page
+
+
+async def list_ids(file: str, request: Request, response: Response):
+    data = await aload_json(file)
+
+    etag = variant_etag(await aetag_json(file, data), "ids")
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    return await aload_ids(file)
+
+
+# ======================================================
+# ZUGRIFF ÜBER STABILE ID (gemeinsam für alle Listen)
+# ======================================================
+#
+# Die Index-Routen verschieben sich nach jedem Löschen; die ID einer Zeile
+# bleibt gleich. GET /{resource}/ids liefert die IDs parallel zur Liste.
+
+async def get_by_id(file: str, item_id: int, request: Request, response: Response):
+    data = await aload_json(file)
+
+    etag = variant_etag(await aetag_json(file, data), f"id/{item_id}")
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    try:
+        return await aget_json_id(file, item_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="ID ungültig")
+
+
+async def update_by_id(file: str, item_id: int, item: list):
+    try:
+        await aupdate_json_id(file, item_id, item)
+    except (KeyError, IndexError, ValueError):
+        raise HTTPException(status_code=404, detail="ID ungültig")
+
+
+async def delete_by_id(file: str, item_id: int):
+    try:
+        await adelete_json_id(file, item_id)
+    except (KeyError, IndexError, ValueError):
+        raise HTTPException(status_code=404, detail="ID ungültig")
+
+
+# ======================================================
+# IMPORT / EXPORT (gemeinsam für alle Listen)
+# ======================================================
+#
+# POST /{resource}/import nimmt eine CSV- oder NDJSON-Datei (Formularfeld
+# "datei") und schreibt alle Zeilen mit einem Schreibvorgang – erst wenn
+# jede Zeile gültig ist (sonst 400 mit Zeilennummern). ?modus=ersetzen
+# ersetzt die Liste statt anzuhängen. GET /{resource}/export streamt die
+# Liste als CSV oder NDJSON. Formate siehe backend/transfer.py.
+
+IMPORT_MODI = ("anhaengen", "ersetzen")
+
+
+async def import_upload(
+    file: str, resource: str, datei: UploadFile, format: Optional[str], modus: str,
+    zeichensatz: str, label: str,
+):
+    if modus not in IMPORT_MODI:
+        raise HTTPException(status_code=400, detail=f"Unbekannter Modus: {modus}")
+
+    try:
+        fmt = transfer.detect_format(format, datei.filename, datei.content_type)
+        result = await run_io(
+            transfer.import_file, file, resource, datei.file, fmt, zeichensatz,
+            modus == "ersetzen",
+        )
+    except transfer.ImportRejected as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": f"{label} nicht importiert", "fehler": e.fehler},
+        )
+    except LookupError:
+        raise HTTPException(status_code=400, detail=f"Unbekannter Zeichensatz: {zeichensatz}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await datei.close()
+
+    return {"message": f"{label} importiert", **result}
+
+
+def export_response(produce, args: tuple, format: str, filename: str):
+    if format not in transfer.FORMATE:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format: {format}")
+
+    return StreamingResponse(
+        stream_from_thread(produce, *args, format),
+        media_type=transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{format}"},
+    )
+
+
+def export_list(file: str, resource: str, format: str):
+    return export_response(transfer.export_list, (resource, file), format, resource)
+
+
 # ======================================================
 # MITARBEITER
 # ======================================================
 
 MITARBEITER_FILE = path("mitarbeiter.json")
+watch_resource(MITARBEITER_FILE, "mitarbeiter")
+MITARBEITER_FILTER = {"name": ("text", (0, 1))}
 
 @app.get("/mitarbeiter")
-def get_mitarbeiter():
-    return load_json(MITARBEITER_FILE)
+async def get_mitarbeiter(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    name: Optional[str] = None,
+):
+    return await list_page(
+        MITARBEITER_FILE, request, response, MITARBEITER_FILTER, offset, limit, name=name
+    )
 
 
 @app.post("/mitarbeiter")
-def create_mitarbeiter(mitarbeiter: list = Body(...)):
-    data = load_json(MITARBEITER_FILE)
-    data.append(mitarbeiter)
-    save_json(MITARBEITER_FILE, data)
-    return {"message": "Mitarbeiter gespeichert"}
+async def create_mitarbeiter(mitarbeiter: list = Body(...)):
+    new_id = await aappend_json(MITARBEITER_FILE, mitarbeiter)
+    return {"message": "Mitarbeiter gespeichert", "id": new_id}
 
 
 @app.put("/mitarbeiter/{index}")
-def update_mitarbeiter(index: int, mitarbeiter: list = Body(...)):
-    data = load_json(MITARBEITER_FILE)
-    if not (0 <= index < len(data)):
+async def update_mitarbeiter(index: int, mitarbeiter: list = Body(...)):
+    try:
+        await aupdate_json_index(MITARBEITER_FILE, index, mitarbeiter)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data[index] = mitarbeiter
-    save_json(MITARBEITER_FILE, data)
+
     return {"message": "Mitarbeiter aktualisiert"}
 
 
 @app.delete("/mitarbeiter/{index}")
-def delete_mitarbeiter(index: int):
-    data = load_json(MITARBEITER_FILE)
-    if not (0 <= index < len(data)):
+async def delete_mitarbeiter(index: int):
+    try:
+        await adelete_json_index(MITARBEITER_FILE, index)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data.pop(index)
-    save_json(MITARBEITER_FILE, data)
+
+    return {"message": "Mitarbeiter gelöscht"}
+
+
+@app.get("/mitarbeiter/ids")
+async def get_mitarbeiter_ids(request: Request, response: Response):
+    return await list_ids(MITARBEITER_FILE, request, response)
+
+
+@app.get("/mitarbeiter/id/{item_id}")
+async def get_mitarbeiter_by_id(item_id: int, request: Request, response: Response):
+    return await get_by_id(MITARBEITER_FILE, item_id, request, response)
+
+
+@app.put("/mitarbeiter/id/{item_id}")
+async def update_mitarbeiter_by_id(item_id: int, mitarbeiter: list = Body(...)):
+    await update_by_id(MITARBEITER_FILE, item_id, mitarbeiter)
+    return {"message": "Mitarbeiter aktualisiert"}
+
+
+@app.delete("/mitarbeiter/id/{item_id}")
+async def delete_mitarbeiter_by_id(item_id: int):
+    await delete_by_id(MITARBEITER_FILE, item_id)
     return {"message": "Mitarbeiter gelöscht"}
 
 
+@app.post("/mitarbeiter/batch")
+async def batch_mitarbeiter(payload: BatchPayload):
+    return await run_batch(MITARBEITER_FILE, payload, "Mitarbeiter")
+
+
+@app.post("/mitarbeiter/import")
+async def import_mitarbeiter(
+    datei: UploadFile = File(...),
+    format: Optional[str] = None,
+    modus: str = "anhaengen",
+    zeichensatz: str = "utf-8",
+):
+    return await import_upload(
+        MITARBEITER_FILE, "mitarbeiter", datei, format, modus, zeichensatz, "Mitarbeiter"
+    )
+
+
+@app.get("/mitarbeiter/export")
+async def export_mitarbeiter(format: str = "csv"):
+    return export_list(MITARBEITER_FILE, "mitarbeiter", format)
+
+
 # ======================================================
 # FILIALEN
 # ======================================================
 
 FILIALEN_FILE = path("filialen.json")
+watch_resource(FILIALEN_FILE, "filialen")
+FILIALEN_FILTER = {"filiale": ("exact", (0,)), "name": ("text", (1, 3))}
 
 @app.get("/filialen")
-def get_filialen():
-    return load_json(FILIALEN_FILE)
+async def get_filialen(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    filiale: Optional[str] = None,
+    name: Optional[str] = None,
+):
+    return await list_page(
+        FILIALEN_FILE, request, response, FILIALEN_FILTER, offset, limit,
+        filiale=filiale, name=name,
+    )
 
 
 @app.post("/filialen")
-def create_filiale(filiale: list = Body(...)):
-    data = load_json(FILIALEN_FILE)
-    data.append(filiale)
-    save_json(FILIALEN_FILE, data)
-    return {"message": "Filiale gespeichert"}
+async def create_filiale(filiale: list = Body(...)):
+    new_id = await aappend_json(FILIALEN_FILE, filiale)
+    return {"message": "Filiale gespeichert", "id": new_id}
 
 
 @app.put("/filialen/{index}")
-def update_filiale(index: int, filiale: list = Body(...)):
-    data = load_json(FILIALEN_FILE)
-    if not (0 <= index < len(data)):
+async def update_filiale(index: int, filiale: list = Body(...)):
+    try:
+        await aupdate_json_index(FILIALEN_FILE, index, filiale)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data[index] = filiale
-    save_json(FILIALEN_FILE, data)
+
     return {"message": "Filiale aktualisiert"}
 
 
 @app.delete("/filialen/{index}")
-def delete_filiale(index: int):
-    data = load_json(FILIALEN_FILE)
-    if not (0 <= index < len(data)):
+async def delete_filiale(index: int):
+    try:
+        await adelete_json_index(FILIALEN_FILE, index)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data.pop(index)
-    save_json(FILIALEN_FILE, data)
+
     return {"message": "Filiale gelöscht"}
 
 
+@app.get("/filialen/ids")
+async def get_filialen_ids(request: Request, response: Response):
+    return await list_ids(FILIALEN_FILE, request, response)
+
+
+@app.get("/filialen/id/{item_id}")
+async def get_filiale_by_id(item_id: int, request: Request, response: Response):
+    return await get_by_id(FILIALEN_FILE, item_id, request, response)
+
+
+@app.put("/filialen/id/{item_id}")
+async def update_filiale_by_id(item_id: int, filiale: list = Body(...)):
+    await update_by_id(FILIALEN_FILE, item_id, filiale)
+    return {"message": "Filiale aktualisiert"}
+
+
+@app.delete("/filialen/id/{item_id}")
+async def delete_filiale_by_id(item_id: int):
+    await delete_by_id(FILIALEN_FILE, item_id)
+    return {"message": "Filiale gelöscht"}
+
+
+@app.post("/filialen/batch")
+async def batch_filialen(payload: BatchPayload):
+    return await run_batch(FILIALEN_FILE, payload, "Filialen")
+
+
+@app.post("/filialen/import")
+async def import_filialen(
+    datei: UploadFile = File(...),
+    format: Optional[str] = None,
+    modus: str = "anhaengen",
+    zeichensatz: str = "utf-8",
+):
+    return await import_upload(
+        FILIALEN_FILE, "filialen", datei, format, modus, zeichensatz, "Filialen"
+    )
+
+
+@app.get("/filialen/export")
+async def export_filialen(format: str = "csv"):
+    return export_list(FILIALEN_FILE, "filialen", format)
+
+
 # ======================================================
 # SCHICHTEN
 # ======================================================
 
 SCHICHTEN_FILE = path("schichten.json")
+watch_resource(SCHICHTEN_FILE, "schichten")
+SCHICHTEN_FILTER = {"name": ("text", (0,))}
 
 @app.get("/schichten")
-def get_schichten():
-    return load_json(SCHICHTEN_FILE)
+async def get_schichten(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    name: Optional[str] = None,
+):
+    return await list_page(
+        SCHICHTEN_FILE, request, response, SCHICHTEN_FILTER, offset, limit, name=name
+    )
 
 
 @app.post("/schichten")
-def create_schicht(schicht: list = Body(...)):
-    data = load_json(SCHICHTEN_FILE)
-    data.append(schicht)
-    save_json(SCHICHTEN_FILE, data)
-    return {"message": "Schicht gespeichert"}
+async def create_schicht(schicht: list = Body(...)):
+    new_id = await aappend_json(SCHICHTEN_FILE, schicht)
+    return {"message": "Schicht gespeichert", "id": new_id}
 
 
 @app.put("/schichten/{index}")
-def update_schicht(index: int, schicht: list = Body(...)):
-    data = load_json(SCHICHTEN_FILE)
-    if not (0 <= index < len(data)):
+async def update_schicht(index: int, schicht: list = Body(...)):
+    try:
+        await aupdate_json_index(SCHICHTEN_FILE, index, schicht)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data[index] = schicht
-    save_json(SCHICHTEN_FILE, data)
+
     return {"message": "Schicht aktualisiert"}
 
 
 @app.delete("/schichten/{index}")
-def delete_schicht(index: int):
-    data = load_json(SCHICHTEN_FILE)
-    if not (0 <= index < len(data)):
+async def delete_schicht(index: int):
+    try:
+        await adelete_json_index(SCHICHTEN_FILE, index)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data.pop(index)
-    save_json(SCHICHTEN_FILE, data)
+
+    return {"message": "Schicht gelöscht"}
+
+
+@app.get("/schichten/ids")
+async def get_schichten_ids(request: Request, response: Response):
+    return await list_ids(SCHICHTEN_FILE, request, response)
+
+
+@app.get("/schichten/id/{item_id}")
+async def get_schicht_by_id(item_id: int, request: Request, response: Response):
+    return await get_by_id(SCHICHTEN_FILE, item_id, request, response)
+
+
+@app.put("/schichten/id/{item_id}")
+async def update_schicht_by_id(item_id: int, schicht: list = Body(...)):
+    await update_by_id(SCHICHTEN_FILE, item_id, schicht)
+    return {"message": "Schicht aktualisiert"}
+
+
+@app.delete("/schichten/id/{item_id}")
+async def delete_schicht_by_id(item_id: int):
+    await delete_by_id(SCHICHTEN_FILE, item_id)
     return {"message": "Schicht gelöscht"}
 
 
+@app.post("/schichten/batch")
+async def batch_schichten(payload: BatchPayload):
+    return await run_batch(SCHICHTEN_FILE, payload, "Schichten")
+
+
+@app.post("/schichten/import")
+async def import_schichten(
+    datei: UploadFile = File(...),
+    format: Optional[str] = None,
+    modus: str = "anhaengen",
+    zeichensatz: str = "utf-8",
+):
+    return await import_upload(
+        SCHICHTEN_FILE, "schichten", datei, format, modus, zeichensatz, "Schichten"
+    )
+
+
+@app.get("/schichten/export")
+async def export_schichten(format: str = "csv"):
+    return export_list(SCHICHTEN_FILE, "schichten", format)
+
+
 # ======================================================
 # ÜBERSICHT
 # ======================================================
 
 UEBERSICHT_FILE = path("uebersicht.json")
+watch_resource(UEBERSICHT_FILE, "uebersicht")
 
 @app.get("/uebersicht")
-def get_uebersicht():
-    return load_json(UEBERSICHT_FILE)
+async def get_uebersicht(request: Request, response: Response):
+    data = await aload_json(UEBERSICHT_FILE)
+
+    cached = not_modified(request, response, await aetag_json(UEBERSICHT_FILE, data))
+    if cached:
+        return cached
+
+    return encoded(response, await aencoded_json(UEBERSICHT_FILE, data))
+
+
+# ------------------------------------------------------
+# Konflikte (Doppelbelegung, Überschneidung, Überstunden)
+# ------------------------------------------------------
+#
+# Siehe backend/conflicts.py. Mit ?pruefen=true lehnen POST und PATCH
+# Änderungen ab (409), die neue Konflikte erzeugen – bestehende
+# Konflikte an anderer Stelle blockieren das Speichern nicht.
+
+async def plan_stammdaten() -> tuple:
+    # Vor modify laden – im Callback keine weiteren Stores öffnen
+    return (
+        await run_io(load_records, MITARBEITER_FILE, MitarbeiterRecord),
+        await run_io(load_records, SCHICHTEN_FILE, SchichtRecord),
+    )
+
+
+def konflikt_response(error: PlanConflict) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={"message": "Änderung erzeugt Konflikte im Plan", "konflikte": error.konflikte},
+    )
+
+
+@app.get("/uebersicht/konflikte")
+async def get_uebersicht_konflikte(request: Request, response: Response):
+    board = await aload_json(UEBERSICHT_FILE, {})
+    mitarbeiter, schichten = await plan_stammdaten()
+
+    etag = variant_etag("|".join([
+        await aetag_json(UEBERSICHT_FILE, board),
+        await aetag_json(MITARBEITER_FILE),
+        await aetag_json(SCHICHTEN_FILE),
+    ]), "konflikte")
+
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    index = await run_io(check_board, board, mitarbeiter, schichten)
+    konflikte = index.all()
+    return {"anzahl": len(konflikte), "konflikte": konflikte}
 
 
 # Komplettes Objekt speichern (nicht append)
 @app.post("/uebersicht")
-def save_full_uebersicht(payload = Body(...)):
-    save_json(UEBERSICHT_FILE, payload)
+async def save_full_uebersicht(response: Response, payload = Body(...), pruefen: bool = False):
+    if not pruefen:
+        await asave_json(UEBERSICHT_FILE, payload)
+        response.headers["ETag"] = await aetag_json(UEBERSICHT_FILE)
+        return {"message": "Übersicht vollständig gespeichert"}
+
+    mitarbeiter, schichten = await plan_stammdaten()
+
+    def validate(old):
+        konflikte = check_change(old, payload, mitarbeiter, schichten)
+        if konflikte:
+            raise PlanConflict(konflikte)
+        return payload
+
+    try:
+        board = await amodify_json(UEBERSICHT_FILE, validate, default={})
+    except PlanConflict as error:
+        raise konflikt_response(error)
+
+    response.headers["ETag"] = await aetag_json(UEBERSICHT_FILE, board)
     return {"message": "Übersicht vollständig gespeichert"}
 
 
+# ------------------------------------------------------
+# Einzelne Zellen ändern (Filiale × Tag)
+# ------------------------------------------------------
+#
+# Statt des ganzen Boards nur die geänderten Zellen, z.B.
+#   {"aenderungen": [{"filiale": "101", "tag": "Montag", "schicht": "Frühschicht A"}]}
+# Mit If-Match: <ETag> wird nur gespeichert, wenn niemand sonst das
+# Board inzwischen geändert hat (sonst 412).
+
+@app.patch("/uebersicht")
+async def patch_uebersicht(
+    payload: UebersichtPatch,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    pruefen: bool = False,
+):
+    aenderungen = [a.model_dump(exclude_unset=True) for a in payload.aenderungen]
+
+    for aenderung in aenderungen:
+        if aenderung["tag"] not in TAGE:
+            raise HTTPException(status_code=400, detail=f"Unbekannter Tag: {aenderung['tag']}")
+
+    tags = etag_list(if_match)
+    expected = None if not tags or "*" in tags else tags
+
+    mitarbeiter, schichten = await plan_stammdaten()
+    konflikte = []
+
+    def apply(data):
+        board = patch_board(data, aenderungen)
+
+        # Nur die geänderten Zellen neu prüfen
+        changed = [(a["filiale"], a["tag"]) for a in aenderungen]
+        konflikte[:] = check_change(data, board, mitarbeiter, schichten, changed)
+        if konflikte and pruefen:
+            raise PlanConflict(konflikte)
+
+        return board
+
+    try:
+        board = await amodify_json(
+            UEBERSICHT_FILE,
+            apply,
+            default={},
+            if_match=expected,
+            event={"op": "patch", "aenderungen": aenderungen},
+        )
+    except VersionConflict:
+        raise HTTPException(
+            status_code=412, detail="Übersicht wurde inzwischen geändert"
+        )
+    except PlanConflict as error:
+        raise konflikt_response(error)
+
+    response.headers["ETag"] = await aetag_json(UEBERSICHT_FILE, board)
+    return {
+        "message": "Übersicht aktualisiert",
+        "geaendert": len(aenderungen),
+        "konflikte": konflikte,
+    }
+
+
+# ------------------------------------------------------
+# Automatische Planung
+# ------------------------------------------------------
+#
+# Besetzt alle Zellen mit gewählter Schicht (siehe backend/planner.py).
+# Ohne speichern nur Vorschlag; mit speichern wird das Board unter der
+# Store-Sperre geplant und geschrieben.
+
+@app.post("/uebersicht/auto-plan")
+async def auto_plan_uebersicht(payload: AutoPlanPayload, response: Response):
+    statistik = {}
+    mitarbeiter, schichten = await plan_stammdaten()
+
+    def plan(board):
+        new_board, stats = plan_week(
+            board, mitarbeiter, schichten, payload.pro_schicht, payload.ueberschreiben
+        )
+        statistik.update(stats)
+        return new_board
+
+    if payload.speichern:
+        board = await amodify_json(UEBERSICHT_FILE, plan, default={})
+        response.headers["ETag"] = await aetag_json(UEBERSICHT_FILE, board)
+    else:
+        board = await run_io(plan, await aload_json(UEBERSICHT_FILE, {}))
+
+    return {"uebersicht": board, "statistik": statistik}
+
+
 @app.put("/uebersicht/{index}")
-def update_uebersicht(index: int, eintrag: list = Body(...)):
-    data = load_json(UEBERSICHT_FILE)
-    if not (0 <= index < len(data)):
+async def update_uebersicht(index: int, eintrag: list = Body(...)):
+    try:
+        await aupdate_json_index(UEBERSICHT_FILE, index, eintrag)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data[index] = eintrag
-    save_json(UEBERSICHT_FILE, data)
+
     return {"message": "Eintrag aktualisiert"}
 
 
 @app.delete("/uebersicht/{index}")
-def delete_uebersicht(index: int):
-    data = load_json(UEBERSICHT_FILE)
-    if not (0 <= index < len(data)):
+async def delete_uebersicht(index: int):
+    try:
+        await adelete_json_index(UEBERSICHT_FILE, index)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
-    data.pop(index)
-    save_json(UEBERSICHT_FILE, data)
+
+    return {"message": "Eintrag gelöscht"}
+
+
+@app.get("/uebersicht/ids")
+async def get_uebersicht_ids(request: Request, response: Response):
+    return await list_ids(UEBERSICHT_FILE, request, response)
+
+
+@app.get("/uebersicht/id/{item_id}")
+async def get_uebersicht_by_id(item_id: int, request: Request, response: Response):
+    return await get_by_id(UEBERSICHT_FILE, item_id, request, response)
+
+
+@app.put("/uebersicht/id/{item_id}")
+async def update_uebersicht_by_id(item_id: int, eintrag: list = Body(...)):
+    await update_by_id(UEBERSICHT_FILE, item_id, eintrag)
+    return {"message": "Eintrag aktualisiert"}
+
+
+@app.delete("/uebersicht/id/{item_id}")
+async def delete_uebersicht_by_id(item_id: int):
+    await delete_by_id(UEBERSICHT_FILE, item_id)
     return {"message": "Eintrag gelöscht"}
 
 
 @app.delete("/uebersicht")
-def clear_uebersicht():
-    save_json(UEBERSICHT_FILE, [])
+async def clear_uebersicht():
+    await asave_json(UEBERSICHT_FILE, [])
     return {"message": "Übersicht vollständig geleert"}
 
 
@@ -210,17 +892,98 @@ def clear_uebersicht():
 # ======================================================
 
 from datetime import datetime, timedelta
+from backend.kalenderwochen import KalenderwochenStore
 
+# Alte Einzeldatei – wird beim ersten Zugriff in den Wochen-Speicher migriert
 KALENDERWOCHEN_FILE = path("kalenderwochen.json")
+KALENDERWOCHEN_DIR = path("kalenderwochen")
+
+kalenderwochen = KalenderwochenStore(KALENDERWOCHEN_DIR, legacy_path=KALENDERWOCHEN_FILE)
 
 
 # ------------------------------------------------------
 # Alle gespeicherten Kalenderwochen abrufen
 # ------------------------------------------------------
 
+KALENDERWOCHEN_FELDER = {"kalenderwoche", "jahr", "tage", "uebersicht"}
+
+
 @app.get("/kalenderwochen")
-def get_all_calendar_weeks():
-    return load_json(KALENDERWOCHEN_FILE)
+async def get_all_calendar_weeks(
+    request: Request,
+    response: Response,
+    jahr: Optional[int] = None,
+    von: Optional[int] = None,
+    bis: Optional[int] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    felder: Optional[str] = None,
+    filiale: Optional[str] = None,
+):
+    # Ohne jahr: alle Wochen in Speicherreihenfolge (wie bisher)
+    start = end = None
+
+    if jahr is None:
+        if von is not None or bis is not None:
+            raise HTTPException(status_code=400, detail="von/bis nur zusammen mit jahr")
+    else:
+        # Bereichsabfrage über den (jahr, kw)-Index, z.B. ?jahr=2026&von=10&bis=20
+        start = (jahr, von if von is not None else 1)
+        end = (jahr, bis if bis is not None else 53)
+
+    # Projektion, z.B. ?felder=kalenderwoche,jahr (ohne Übersicht)
+    fields = None
+    if felder is not None:
+        fields = {f.strip() for f in felder.split(",") if f.strip()}
+        unbekannt = fields - KALENDERWOCHEN_FELDER
+        if unbekannt:
+            raise HTTPException(
+                status_code=400, detail=f"Unbekannte Felder: {', '.join(sorted(unbekannt))}"
+            )
+
+    # ETag aus Manifest und Wochen-Versionen: 304 ohne einen Chunk zu lesen
+    total, version = await run_io(
+        kalenderwochen.query_version, start, end, offset, limit, fields, filiale
+    )
+    response.headers["X-Total-Count"] = str(total)
+
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+
+    total, entries = await run_io(
+        kalenderwochen.query, start, end, offset, limit, fields, filiale
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return entries
+
+
+# ------------------------------------------------------
+# Verlauf exportieren (eine Zeile pro belegter Zelle)
+# ------------------------------------------------------
+#
+# GET /kalenderwochen/export?format=csv&jahr=2026&von=1&bis=26&filiale=101
+# Ohne jahr alle Wochen chronologisch. Gelesen wird Woche für Woche.
+
+@app.get("/kalenderwochen/export")
+async def export_calendar_weeks(
+    format: str = "csv",
+    jahr: Optional[int] = None,
+    von: Optional[int] = None,
+    bis: Optional[int] = None,
+    filiale: Optional[str] = None,
+):
+    index = await run_io(kalenderwochen.index)
+
+    if jahr is None:
+        if von is not None or bis is not None:
+            raise HTTPException(status_code=400, detail="von/bis nur zusammen mit jahr")
+        keys = list(index.sorted_keys)
+    else:
+        keys = index.range((jahr, von if von is not None else 1), (jahr, bis if bis is not None else 53))
+
+    name = "kalenderwochen" if jahr is None else f"kalenderwochen-{jahr}"
+    return export_response(transfer.export_weeks, (kalenderwochen, keys, filiale), format, name)
 
 
 # ------------------------------------------------------
@@ -228,14 +991,22 @@ def get_all_calendar_weeks():
 # ------------------------------------------------------
 
 @app.get("/kalenderwochen/{kw}/{jahr}")
-def get_calendar_week(kw: int, jahr: int):
-    data = load_json(KALENDERWOCHEN_FILE)
+async def get_calendar_week(kw: int, jahr: int, request: Request, response: Response):
+    version = await run_io(kalenderwochen.version, kw, jahr)
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Kalenderwoche nicht gefunden")
+
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+
+    entry = await run_io(kalenderwochen.get, kw, jahr)
 
-    for entry in data:
-        if entry.get("kalenderwoche") == kw and entry.get("jahr") == jahr:
-            return entry
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Kalenderwoche nicht gefunden")
 
-    raise HTTPException(status_code=404, detail="Kalenderwoche nicht gefunden")
+    return entry
 
 
 # ------------------------------------------------------
@@ -243,7 +1014,7 @@ def get_calendar_week(kw: int, jahr: int):
 # ------------------------------------------------------
 
 @app.post("/kalenderwochen/{kw}/{jahr}")
-def create_calendar_week(kw: int, jahr: int):
+async def create_calendar_week(kw: int, jahr: int):
 
     # ISO Montag berechnen
     try:
@@ -254,7 +1025,7 @@ def create_calendar_week(kw: int, jahr: int):
     daten = [(montag + timedelta(days=i)).strftime("%d.%m.%Y") for i in range(7)]
 
     # Übersicht laden (Snapshot)
-    uebersicht = load_json(UEBERSICHT_FILE)
+    uebersicht = await aload_json(UEBERSICHT_FILE)
 
     tage_mit_datum = {
         f"{tag} ({daten[i]})": daten[i]
@@ -270,20 +1041,8 @@ def create_calendar_week(kw: int, jahr: int):
         "uebersicht": uebersicht
     }
 
-    data = load_json(KALENDERWOCHEN_FILE)
-
     # Replace falls existiert
-    replaced = False
-    for i, entry in enumerate(data):
-        if entry.get("kalenderwoche") == kw and entry.get("jahr") == jahr:
-            data[i] = new_entry
-            replaced = True
-            break
-
-    if not replaced:
-        data.append(new_entry)
-
-    save_json(KALENDERWOCHEN_FILE, data)
+    replaced = await run_io(kalenderwochen.put, new_entry)
 
     return {
         "message": f"Kalenderwoche KW {kw} – {jahr} gespeichert",
@@ -296,21 +1055,10 @@ def create_calendar_week(kw: int, jahr: int):
 # ------------------------------------------------------
 
 @app.delete("/kalenderwochen/{kw}/{jahr}")
-def delete_calendar_week(kw: int, jahr: int):
-    data = load_json(KALENDERWOCHEN_FILE)
-
-    new_data = [
-        entry for entry in data
-        if not (
-            entry.get("kalenderwoche") == kw and entry.get("jahr") == jahr
-        )
-    ]
-
-    if len(new_data) == len(data):
+async def delete_calendar_week(kw: int, jahr: int):
+    if not await run_io(kalenderwochen.delete, kw, jahr):
         raise HTTPException(status_code=404, detail="Kalenderwoche nicht gefunden")
 
-    save_json(KALENDERWOCHEN_FILE, new_data)
-
     return {"message": f"Kalenderwoche KW {kw} – {jahr} gelöscht"}
 
 
@@ -319,15 +1067,83 @@ def delete_calendar_week(kw: int, jahr: int):
 # ------------------------------------------------------
 
 @app.post("/kalenderwochen/{kw}/{jahr}/restore")
-def restore_calendar_week(kw: int, jahr: int):
-    data = load_json(KALENDERWOCHEN_FILE)
+async def restore_calendar_week(kw: int, jahr: int):
+    uebersicht = await run_io(kalenderwochen.get_uebersicht, kw, jahr)
+
+    if uebersicht is None:
+        raise HTTPException(status_code=404, detail="Kalenderwoche nicht gefunden")
+
+    await asave_json(UEBERSICHT_FILE, uebersicht)
+    return {"message": "Übersicht wiederhergestellt"}
+
+
+# ======================================================
+# AUSWERTUNG (STUNDEN UND KOSTEN)
+# ======================================================
+#
+# Ohne jahr: aktuelle Übersicht als eine Woche. Mit jahr (und von/bis
+# wie bei GET /kalenderwochen): die gespeicherten Kalenderwochen.
+# Rechnung in backend/analytics.py, gecacht pro Wochen-Version.
+
+def auswertung_weeks(start: Optional[tuple], end: Optional[tuple]) -> list:
+    if start is None:
+        board = load_json(UEBERSICHT_FILE, default={})
+        version = etag_json(UEBERSICHT_FILE, board)
+        return [({}, version, partial(analytics_module().board_columns, version, board))]
+
+    snapshot_columns = analytics_module().snapshot_columns
+    weeks = []
+    for jahr, kw in kalenderwochen.index().range(start, end):
+        snapshot = kalenderwochen.snapshot(kw, jahr)
+        if snapshot is None:
+            continue
+        version, packed = snapshot
+        weeks.append((
+            {"jahr": jahr, "kalenderwoche": kw},
+            version,
+            partial(snapshot_columns, version, packed, kalenderwochen.chunk),
+        ))
+    return weeks
+
+
+@app.get("/auswertung")
+async def get_auswertung(
+    request: Request,
+    response: Response,
+    jahr: Optional[int] = None,
+    von: Optional[int] = None,
+    bis: Optional[int] = None,
+):
+    start = end = None
+
+    if jahr is None:
+        if von is not None or bis is not None:
+            raise HTTPException(status_code=400, detail="von/bis nur zusammen mit jahr")
+    else:
+        start = (jahr, von if von is not None else 1)
+        end = (jahr, bis if bis is not None else 53)
+
+    weeks = await run_io(auswertung_weeks, start, end)
 
-    for entry in data:
-        if entry.get("kalenderwoche") == kw and entry.get("jahr") == jahr:
-            save_json(UEBERSICHT_FILE, entry.get("uebersicht", []))
-            return {"message": "Übersicht wiederhergestellt"}
+    mitarbeiter_rows = await aload_json(MITARBEITER_FILE)
+    schichten_rows = await aload_json(SCHICHTEN_FILE)
+
+    versions = [version for _, version, _ in weeks] + [
+        await aetag_json(MITARBEITER_FILE, mitarbeiter_rows),
+        await aetag_json(SCHICHTEN_FILE, schichten_rows),
+    ]
+    cached = not_modified(request, response, variant_etag("|".join(versions), "auswertung"))
+    if cached:
+        return cached
+
+    def auswerten():
+        return analytics_module().analyze(
+            weeks,
+            load_records(MITARBEITER_FILE, MitarbeiterRecord, mitarbeiter_rows),
+            load_records(SCHICHTEN_FILE, SchichtRecord, schichten_rows),
+        )
 
-    raise HTTPException(status_code=404, detail="Kalenderwoche nicht gefunden")
+    return await run_io(auswerten)
 
 
 # ======================================================
@@ -335,15 +1151,22 @@ def restore_calendar_week(kw: int, jahr: int):
 # ======================================================
 
 TEAMS_FILE = path("teams.json")
+watch_resource(TEAMS_FILE, "teams")
 
 @app.get("/teams")
-def get_teams():
-    return load_json(TEAMS_FILE)
+async def get_teams(request: Request, response: Response):
+    data = await aload_json(TEAMS_FILE)
+
+    cached = not_modified(request, response, await aetag_json(TEAMS_FILE, data))
+    if cached:
+        return cached
+
+    return encoded(response, await aencoded_json(TEAMS_FILE, data))
 
 
 @app.post("/teams")
-def save_teams(data: list):
-    save_json(TEAMS_FILE, data)
+async def save_teams(data: list = Body(...)):
+    await asave_json(TEAMS_FILE, data)
     return {"message": "Teams gespeichert"}
 
 
@@ -352,270 +1175,185 @@ def save_teams(data: list):
 # ======================================================
 
 ARBEIT_FILE = path("arbeitstaetigkeiten.json")
+watch_resource(ARBEIT_FILE, "arbeitstaetigkeiten")
+ARBEIT_FILTER = {"name": ("text", (0, 1, 2, 3))}
 
 
 @app.get("/arbeitstaetigkeiten")
-def get_arbeitstaetigkeiten():
-    return load_json(ARBEIT_FILE)
+async def get_arbeitstaetigkeiten(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    name: Optional[str] = None,
+):
+    return await list_page(
+        ARBEIT_FILE, request, response, ARBEIT_FILTER, offset, limit, name=name
+    )
 
 
 @app.post("/arbeitstaetigkeiten")
-def create_arbeitstaetigkeit(eintrag: list = Body(...)):
-    data = load_json(ARBEIT_FILE)
-    data.append(eintrag)
-    save_json(ARBEIT_FILE, data)
-    return {"message": "Arbeitstätigkeit gespeichert"}
+async def create_arbeitstaetigkeit(eintrag: list = Body(...)):
+    new_id = await aappend_json(ARBEIT_FILE, eintrag)
+    return {"message": "Arbeitstätigkeit gespeichert", "id": new_id}
 
 
 @app.put("/arbeitstaetigkeiten/{index}")
-def update_arbeitstaetigkeit(index: int, eintrag: list = Body(...)):
-    data = load_json(ARBEIT_FILE)
-
-    if not (0 <= index < len(data)):
+async def update_arbeitstaetigkeit(index: int, eintrag: list = Body(...)):
+    try:
+        await aupdate_json_index(ARBEIT_FILE, index, eintrag)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
 
-    data[index] = eintrag
-    save_json(ARBEIT_FILE, data)
     return {"message": "Arbeitstätigkeit aktualisiert"}
 
 
 @app.delete("/arbeitstaetigkeiten/{index}")
-def delete_arbeitstaetigkeit(index: int):
-    data = load_json(ARBEIT_FILE)
-
-    if not (0 <= index < len(data)):
+async def delete_arbeitstaetigkeit(index: int):
+    try:
+        await adelete_json_index(ARBEIT_FILE, index)
+    except (IndexError, ValueError):
         raise HTTPException(status_code=404, detail="Index ungültig")
 
-    data.pop(index)
-    save_json(ARBEIT_FILE, data)
     return {"message": "Arbeitstätigkeit gelöscht"}
 
 
-# ======================================================
-# RECHNUNG
-# ======================================================
-
-@app.post("/rechnung/pdf")
-def create_rechnung_pdf(payload: dict = Body(...)):
+@app.get("/arbeitstaetigkeiten/ids")
+async def get_arbeitstaetigkeiten_ids(request: Request, response: Response):
+    return await list_ids(ARBEIT_FILE, request, response)
 
-    rechnung = payload.get("rechnung", {})
-    briefkopf = payload.get("briefkopf", {})
 
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
+@app.get("/arbeitstaetigkeiten/id/{item_id}")
+async def get_arbeitstaetigkeit_by_id(item_id: int, request: Request, response: Response):
+    return await get_by_id(ARBEIT_FILE, item_id, request, response)
 
-    width, height = A4
-    left = 25 * mm
-    right = width - 25 * mm
-    y = height - 25 * mm
 
-    def check_page_space(y_pos, needed=20):
-        if y_pos < 60:
-            c.showPage()
-            c.setFont("Helvetica", 10)
-            return height - 25 * mm
-        return y_pos
-
-    # --------------------------------------------------
-    # LOGO (ganz oben rechts – über Absender)
-    # --------------------------------------------------
-
-    logo_base64 = briefkopf.get("logo")
-
-    if logo_base64:
-        try:
-            header, encoded = logo_base64.split(",", 1)
-            logo_bytes = base64.b64decode(encoded)
-            image = ImageReader(io.BytesIO(logo_bytes))
-
-            logo_width = 120
-            logo_height = 60
-
-            # 🔥 Direkt unter dem oberen Seitenrand
-            logo_y = height - 5 * mm - logo_height
-
-            c.drawImage(
-                image,
-                right - logo_width,
-                logo_y,
-                width=logo_width,
-                height=logo_height,
-                preserveAspectRatio=True,
-                mask='auto'
-            )
-
-        except Exception as e:
-            print("Logo Fehler:", e)
-
-    # --------------------------------------------------
-    # ABSENDER
-    # --------------------------------------------------
-    c.setFont("Helvetica", 10)
-
-    for line in briefkopf.get("name", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
-
-    for line in briefkopf.get("adresse", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
-
-    y -= 20
-
-    # --------------------------------------------------
-    # KUNDE
-    # --------------------------------------------------
-    kunde = rechnung.get("kunde", {})
-
-    for line in kunde.get("firma", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
-
-    for line in kunde.get("kontakt", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
-
-    for line in kunde.get("adresse", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
-
-    y -= 20
-
-    # --------------------------------------------------
-    # RECHNUNGSDATEN (rechtsbündig)
-    # --------------------------------------------------
-    c.drawRightString(right, y, f"Rechnungsnummer: {rechnung.get('nummer', '')}")
-    y -= 14
-    c.drawRightString(right, y, f"Rechnungsdatum: {rechnung.get('datum', '')}")
-    y -= 25
-    # --------------------------------------------------
-    # TEXTBEREICH NACH TABELLE
-    # --------------------------------------------------
-    c.setFont("Helvetica", 10)
-    y -= 14
-    y = check_page_space(y)
-
-    c.drawString(left, y, "Sehr geehrte Damen und Herren,")
-    y -= 16
-
-    for line in briefkopf.get("einleitung", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
+@app.put("/arbeitstaetigkeiten/id/{item_id}")
+async def update_arbeitstaetigkeit_by_id(item_id: int, eintrag: list = Body(...)):
+    await update_by_id(ARBEIT_FILE, item_id, eintrag)
+    return {"message": "Arbeitstätigkeit aktualisiert"}
 
-    y -= 20
-    y = check_page_space(y)
 
+@app.delete("/arbeitstaetigkeiten/id/{item_id}")
+async def delete_arbeitstaetigkeit_by_id(item_id: int):
+    await delete_by_id(ARBEIT_FILE, item_id)
+    return {"message": "Arbeitstätigkeit gelöscht"}
 
-    # --------------------------------------------------
-    # TABELLE HEADER
-    # --------------------------------------------------
-    col_datum = left
-    col_text = left + 70
-    col_std = right - 90
-    col_satz = right - 50
-    col_betrag = right
 
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(col_datum, y, "Datum")
-    c.drawString(col_text, y, "Beschreibung")
-    c.drawRightString(col_std, y, "Std")
-    c.drawRightString(col_satz, y, "Satz")
-    c.drawRightString(col_betrag, y, "Betrag")
-    y -= 12
+@app.post("/arbeitstaetigkeiten/batch")
+async def batch_arbeitstaetigkeiten(payload: BatchPayload):
+    return await run_batch(ARBEIT_FILE, payload, "Arbeitstätigkeiten")
 
-    c.line(left, y, right, y)
-    y -= 12
-    c.setFont("Helvetica", 10)
 
-    netto = 0.0
+@app.post("/arbeitstaetigkeiten/import")
+async def import_arbeitstaetigkeiten(
+    datei: UploadFile = File(...),
+    format: Optional[str] = None,
+    modus: str = "anhaengen",
+    zeichensatz: str = "utf-8",
+):
+    return await import_upload(
+        ARBEIT_FILE, "arbeitstaetigkeiten", datei, format, modus, zeichensatz, "Arbeitstätigkeiten"
+    )
 
-    # --------------------------------------------------
-    # POSITIONEN
-    # --------------------------------------------------
-    for p in rechnung.get("positionen", []):
 
-        y = check_page_space(y)
+@app.get("/arbeitstaetigkeiten/export")
+async def export_arbeitstaetigkeiten(format: str = "csv"):
+    return export_list(ARBEIT_FILE, "arbeitstaetigkeiten", format)
 
-        stunden = float(p.get("stunden", 0))
-        satz = float(p.get("satz", 0))
-        betrag = stunden * satz
-        netto += betrag
 
-        c.drawString(col_datum, y, p.get("datum", ""))
-        c.drawString(col_text, y, p.get("text", ""))
-        c.drawRightString(col_std, y, f"{stunden:.2f}")
-        c.drawRightString(col_satz, y, f"{satz:.2f}")
-        c.drawRightString(col_betrag, y, f"{betrag:.2f}")
-
-        y -= 16
-
-
-
-    # --------------------------------------------------
-    # SUMMEN
-    # --------------------------------------------------
-    steuer = 0.0
+# ======================================================
+# SUCHE (MITARBEITER, FILIALEN, ARBEITSTÄTIGKEITEN)
+# ======================================================
+#
+# GET /search?q=mueller&typ=mitarbeiter,filialen&limit=20
+#
+# Tippfehler- und umlauttolerant über einen Index im Speicher
+# (backend/search.py), der bei jedem Schreibvorgang nachgeführt wird.
+# Jeder Treffer enthält Typ, Index, ID, Punkte und den Eintrag selbst.
+
+SUCHE_SPALTEN = {
+    "mitarbeiter": (MITARBEITER_FILE, (0, 1, 3, 9)),          # Name, Anschrift, Sub-Unternehmen
+    "filialen": (FILIALEN_FILE, (0, 1, 2, 3, 4, 5)),          # Nummer, Name, PLZ, Ort, Straße, Leitung
+    "arbeitstaetigkeiten": (ARBEIT_FILE, (0, 1, 2, 3)),      # Branche, Bereich, Rolle, Tätigkeit
+}
+
+suche = MasterDataSearch()
+for resource, (file, columns) in SUCHE_SPALTEN.items():
+    suche.add(resource, file, columns)
+add_change_listener(suche.on_change)
+
+
+@app.get("/search")
+async def search(
+    q: str = Query(..., min_length=1),
+    typ: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+):
+    resources = list(SUCHE_SPALTEN)
+    if typ:
+        resources = [t.strip() for t in typ.split(",") if t.strip()]
+        unknown = [t for t in resources if t not in SUCHE_SPALTEN]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unbekannter Typ: {unknown[0]}")
+
+    return await run_io(suche.search, q, resources, limit)
 
-    if not briefkopf.get("steuer_befreit", True):
-        steuer = netto * float(briefkopf.get("steuer_prozent", 19)) / 100
-
-    y -= 20
-    y = check_page_space(y)
-
-    c.drawRightString(col_satz, y, "Zwischensumme:")
-    c.drawRightString(col_betrag, y, f"{netto:.2f}")
-    y -= 14
-
-    if not briefkopf.get("steuer_befreit", True):
-        c.drawRightString(col_satz, y, f"MwSt ({briefkopf.get('steuer_prozent', 19)}%):")
-        c.drawRightString(col_betrag, y, f"{steuer:.2f}")
-        y -= 14
-    else:
-        for line in briefkopf.get("steuer_text", "").split("\n"):
-            c.drawString(left, y, line)
-            y -= 14
 
-    c.setFont("Helvetica-Bold", 11)
-    c.drawRightString(col_satz, y, "Gesamtbetrag:")
-    c.drawRightString(col_betrag, y, f"{netto + steuer:.2f}")
+# ======================================================
+# RECHNUNG
+# ======================================================
 
-    c.setFont("Helvetica", 10)
-    y -= 40
-    y = check_page_space(y)
+@app.post("/rechnung/pdf")
+async def create_rechnung_pdf(payload: dict = Body(...)):
 
+    rechnung = payload.get("rechnung", {})
+    briefkopf = payload.get("briefkopf", {})
 
-    y -= 20
-    y = check_page_space(y)
+    # Seiten gehen raus, sobald sie fertig sind – auch bei tausenden
+    # Positionen bleibt der Speicher konstant. Gerendert wird im PDF-Pool,
+    # der Server-Prozess reicht die Seiten nur weiter
+    return StreamingResponse(
+        stream_from_process(pdf_module().stream_rechnung, rechnung, briefkopf),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={rechnung.get('nummer','Rechnung')}.pdf"}
+    )
 
-    for line in briefkopf.get("zahlungs_text", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 30
 
-    for line in briefkopf.get("abschluss_text", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
+# ------------------------------------------------------
+# Viele Rechnungen mit gemeinsamem Briefkopf (ZIP)
+# ------------------------------------------------------
 
-    y -= 30
-    y = check_page_space(y)
+@app.post("/rechnung/pdf/batch")
+async def create_rechnung_pdf_batch(payload: RechnungBatchPayload):
 
-    for line in briefkopf.get("gruss", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
+    if not payload.rechnungen:
+        raise HTTPException(status_code=400, detail="Keine Rechnungen übergeben")
 
-    y -= 20
-    c.drawString(left, y, briefkopf.get("name", ""))
+    pdf = pdf_module()
 
-    y -= 20
+    async def render(position: int, rechnung: dict):
+        document = await run_pdf(pdf.render_rechnung, rechnung, payload.briefkopf)
+        return pdf.pdf_filename(rechnung, position), document
 
-    for line in briefkopf.get("bank", "").split("\n"):
-        c.drawString(left, y, line)
-        y -= 14
+    # Alle Rechnungen verteilt auf die Worker-Prozesse rendern;
+    # jede fertige Datei geht sofort als ZIP-Eintrag raus
+    tasks = [
+        asyncio.ensure_future(render(i, r))
+        for i, r in enumerate(payload.rechnungen)
+    ]
 
-    c.save()
-    buffer.seek(0)
+    async def body():
+        try:
+            async for chunk in pdf.stream_zip(asyncio.as_completed(tasks)):
+                yield chunk
+        finally:
+            # Abbruch durch den Client: ausstehende Aufträge verwerfen
+            for task in tasks:
+                task.cancel()
 
     return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={rechnung.get('nummer','Rechnung')}.pdf"}
+        body(),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=Rechnungen.zip"}
     )
@@ -0,0 +1,271 @@
+import bisect
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+# ======================================================
+# METRIKEN (PROMETHEUS-TEXTFORMAT)
+# ======================================================
+#
+# Prozesslokale Histogramme ohne Zusatzpaket. GET /metrics liefert sie im
+# Prometheus-Textformat (Version 0.0.4):
+#
+#   gmatrix_http_request_seconds     pro Route (Vorlage, z.B. /mitarbeiter/{index})
+#   gmatrix_storage_seconds          pro storage-Aufruf (load_json, save_json, …) und Store
+#   gmatrix_storage_phase_seconds    read / decode / encode / write einer Datei
+#   gmatrix_storage_bytes            gelesene bzw. geschriebene Bytes
+#   gmatrix_pdf_phase_seconds        logo / layout / save beim Rechnungs-PDF
+#
+# Unter gunicorn zählt jeder Worker für sich; ein Scrape sieht den Worker,
+# der ihn beantwortet. Jede Serie trägt deshalb das Label pid.
+#
+# GMATRIX_METRICS=0 schaltet das Erfassen ab (Middleware und Timer
+# kosten dann nichts).
+
+ENABLED = os.environ.get("GMATRIX_METRICS", "1") not in ("", "0")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BYTE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))   # 1 KiB … 256 MiB
+
+# Beobachtungen im PDF-Worker-Prozess (siehe captured)
+_capture = threading.local()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histogramm mit festen Buckets; eine Serie pro Kombination der
+    Label-Werte (positionsgleich zu labels).
+    """
+
+    def __init__(self, name: str, documentation: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels) + ("pid",)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not ENABLED:
+            return
+
+        samples = getattr(_capture, "samples", None)
+        if samples is not None:
+            samples.append((self.name, labels, value))
+            return
+
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Zähler pro Bucket (nicht kumuliert), +Inf, Summe
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        if not ENABLED:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self, pid: str) -> list:
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+
+        for key in sorted(series):
+            values = series[key]
+            base = _labels(self.labels, key + (pid,))
+            total = 0
+
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                total += count
+                lines.append(f'{self.name}_bucket{{{base},le="{_number(bound)}"}} {total}')
+
+            lines.append(f"{self.name}_sum{{{base}}} {values[-1]!r}")
+            lines.append(f"{self.name}_count{{{base}}} {total}")
+
+        return lines
+
+
+# ------------------------------------------------------
+# Registry
+# ------------------------------------------------------
+
+_metrics = {}
+_collectors = []
+
+
+def histogram(name: str, documentation: str, labels: tuple, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics[name] = Histogram(name, documentation, labels, buckets)
+    return metric
+
+
+def add_collector(collect):
+    """
+    collect() → [(name, typ, hilfe, [(labels-dict, wert), ...]), ...]
+    wird bei jedem Scrape aufgerufen (z.B. Cache-Zähler).
+    """
+    _collectors.append(collect)
+
+
+def render_metrics() -> bytes:
+    # Erst hier: Worker von gunicorn --preload erben den Import des Masters
+    pid = str(os.getpid())
+    lines = []
+
+    for metric in _metrics.values():
+        lines.extend(metric.render(pid))
+
+    for collect in _collectors:
+        for name, kind, documentation, samples in collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                names = tuple(labels) + ("pid",)
+                values = tuple(labels.values()) + (pid,)
+                lines.append(f"{name}{{{_labels(names, values)}}} {_number(value)}")
+
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# ------------------------------------------------------
+# Beobachtungen aus Worker-Prozessen
+# ------------------------------------------------------
+#
+# Die Batch-PDFs rendern im Prozess-Pool (backend/executors.py). Dort
+# gesammelte Werte kommen mit dem Ergebnis zurück und werden im
+# Hauptprozess eingetragen.
+
+def captured(fn, *args, **kwargs):
+    """
+    Läuft im Worker: fn(*args, **kwargs) → (ergebnis, beobachtungen).
+    """
+    _capture.samples = []
+    try:
+        return fn(*args, **kwargs), _capture.samples
+    finally:
+        _capture.samples = None
+
+
+def replay(samples: list):
+    for name, labels, value in samples:
+        _metrics[name].observe(value, *labels)
+
+
+# ======================================================
+# STORE-LABEL
+# ======================================================
+#
+# Dateiname als Label; variable Namen (Kalenderwochen: weeks/2026-05.json,
+# chunks/ab/<sha256>.json) werden zu Mustern, damit die Zahl der Serien
+# begrenzt bleibt.
+
+_VARIABLE = re.compile(r"[0-9a-f]{16,}|\d+")
+_SHARD = re.compile(r"[0-9a-f]{2}")
+
+
+@lru_cache(maxsize=4096)
+def store_label(path: str) -> str:
+    name = os.path.basename(path)
+    pattern = _VARIABLE.sub("*", name)
+    if pattern == name:
+        return name
+
+    directory = os.path.dirname(path)
+    if _SHARD.fullmatch(os.path.basename(directory)):
+        directory = os.path.dirname(directory)
+        pattern = "*/" + pattern
+
+    return f"{os.path.basename(directory)}/{pattern}"
+
+
+# ======================================================
+# HTTP-MIDDLEWARE
+# ======================================================
+
+HTTP_SECONDS = histogram(
+    "gmatrix_http_request_seconds",
+    "Dauer einer Anfrage bis zum letzten Byte der Antwort",
+    ("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-Middleware: misst jede Anfrage bis zum Ende der Antwort und trägt
+    sie unter der Routen-Vorlage ein. Endlose Streams (text/event-stream)
+    werden nicht gemessen. profiler (backend/profiler.py) ist optional.
+    """
+
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stream = False
+
+        async def send_wrapper(message):
+            nonlocal status, stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        stream = True
+            await send(message)
+
+        start = time.perf_counter()
+        token = self.profiler.begin() if self.profiler else None
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unbekannt"
+
+            if not stream:
+                HTTP_SECONDS.observe(duration, scope["method"], route, str(status))
+            if token is not None:
+                self.profiler.end(token, scope["method"], route, duration, stream)
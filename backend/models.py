@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+from typing import Any, List, Dict, Literal, Optional
 
 class Mitarbeiter(BaseModel):
     vorname: str
@@ -23,4 +23,37 @@ class UebersichtEintrag(BaseModel):
 
 class UebersichtPayload(BaseModel):
     mode: str
-    data: List[UebersichtEintrag]
\ No newline at end of file
+    data: List[UebersichtEintrag]
+
+
+class UebersichtZelle(BaseModel):
+    filiale: str
+    tag: str
+    schicht: Optional[str] = None
+    notiz: Optional[str] = None
+    mitarbeiter: Optional[List[str]] = None
+
+
+class UebersichtPatch(BaseModel):
+    aenderungen: List[UebersichtZelle]
+
+
+class AutoPlanPayload(BaseModel):
+    pro_schicht: int = Field(1, ge=1, le=20)
+    ueberschreiben: bool = False
+    speichern: bool = False
+
+
+class BatchOperation(BaseModel):
+    op: Literal["insert", "update", "delete"]
+    index: Optional[int] = None
+    item: Optional[List[Any]] = None
+
+
+class BatchPayload(BaseModel):
+    operations: List[BatchOperation]
+
+
+class RechnungBatchPayload(BaseModel):
+    briefkopf: Dict[str, Any] = {}
+    rechnungen: List[Dict[str, Any]]
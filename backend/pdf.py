@@ -0,0 +1,469 @@
+import base64
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+from PIL import Image
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+
+from backend.metrics import histogram
+from backend.pdf_stream import StreamingCanvas
+
+
+# ======================================================
+# RECHNUNG PDF
+# ======================================================
+#
+# Reine Funktionen ohne FastAPI-Bezug, damit sie im Prozess-Pool
+# (backend/executors.py) laufen können: Argumente und Ergebnis
+# werden zwischen den Prozessen gepickelt.
+
+LOGO_WIDTH = 120
+LOGO_HEIGHT = 60
+
+# Logos werden einmal auf Druckauflösung (300 dpi) verkleinert; größere
+# Bilder würden pro Dokument nur mehr Bytes hashen und komprimieren
+LOGO_MAX_PIXELS = (LOGO_WIDTH * 300 // 72, LOGO_HEIGHT * 300 // 72)
+
+# Phasen pro Rechnung (GET /metrics):
+#
+#   logo    Logo dekodieren und verkleinern (nur ohne Cache-Treffer,
+#           steckt zusätzlich in layout)
+#   layout  draw_rechnung
+#   save    Abschluss (Objekte, xref) bzw. letzte Seite beim Streaming
+#   emit    Streaming: Warten, bis der Client Seiten abgenommen hat
+#           (ist aus layout und save herausgerechnet)
+PDF_SECONDS = histogram(
+    "gmatrix_pdf_phase_seconds",
+    "Dauer einer Phase beim Rendern einer Rechnung",
+    ("phase",),
+)
+
+
+# ======================================================
+# BRIEFKOPF CACHE
+# ======================================================
+#
+# Der Briefkopf ist für alle Rechnungen eines Kunden gleich. Pro
+# Worker-Prozess werden deshalb gehalten:
+#
+#   Logo-Cache       SHA-256(logo) → dekodiertes ImageReader
+#   Briefkopf-Cache  SHA-256(logo, name, adresse) → Letterhead
+#
+# Beide sind LRU-begrenzt (GMATRIX_PDF_LOGO_CACHE /
+# GMATRIX_PDF_LETTERHEAD_CACHE Einträge). Pro Rechnung bleiben so nur
+# Kunde, Positionen und Summen zu rendern.
+
+class LRUCache:
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        value = build()
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+        return value
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_logo_cache = LRUCache(int(os.environ.get("GMATRIX_PDF_LOGO_CACHE", 16)))
+_letterhead_cache = LRUCache(int(os.environ.get("GMATRIX_PDF_LETTERHEAD_CACHE", 64)))
+
+
+def _decode_logo(logo_base64: str):
+    """
+    data:-URL → ImageReader, verkleinert auf LOGO_MAX_PIXELS.
+    Liefert None bei ungültigem Logo (wird ebenfalls gecacht).
+    """
+    start = time.perf_counter()
+    try:
+        header, encoded = logo_base64.split(",", 1)
+        image = Image.open(io.BytesIO(base64.b64decode(encoded)))
+        image.load()
+        image.thumbnail(LOGO_MAX_PIXELS)
+        reader = ImageReader(image)
+        # RGB-Daten einmal erzeugen; ImageReader behält sie
+        reader.getRGBData()
+        return reader
+    except Exception as e:
+        print("Logo Fehler:", e)
+        return None
+    finally:
+        PDF_SECONDS.observe(time.perf_counter() - start, "logo")
+
+
+class Letterhead:
+    """
+    Vorberechneter Briefkopf: Logo und Absenderzeilen mit festen
+    Positionen. stamp() legt ihn einmal pro Dokument als Form-XObject
+    an und referenziert ihn danach nur noch.
+    """
+
+    def __init__(self, key: str, logo, lines: list):
+        self.form_name = "briefkopf_" + key[:16]
+        self.logo = logo
+
+        width, height = A4
+        self.left = 25 * mm
+        self.right = width - 25 * mm
+        self.logo_y = height - 5 * mm - LOGO_HEIGHT
+
+        y = height - 25 * mm
+        self.lines = []
+        for line in lines:
+            self.lines.append((y, line))
+            y -= 14
+
+        # Startposition für den Kundenblock
+        self.y_after = y - 20
+
+    def stamp(self, c) -> float:
+        if not c.hasForm(self.form_name):
+            c.beginForm(self.form_name)
+
+            # Logo ganz oben rechts – über Absender
+            if self.logo is not None:
+                c.drawImage(
+                    self.logo,
+                    self.right - LOGO_WIDTH,
+                    self.logo_y,
+                    width=LOGO_WIDTH,
+                    height=LOGO_HEIGHT,
+                    preserveAspectRatio=True,
+                    mask='auto'
+                )
+
+            c.setFont("Helvetica", 10)
+            for y, line in self.lines:
+                c.drawString(self.left, y, line)
+
+            c.endForm()
+
+        c.doForm(self.form_name)
+        return self.y_after
+
+
+def letterhead(briefkopf: dict) -> Letterhead:
+    logo_base64 = briefkopf.get("logo") or ""
+    lines = (
+        briefkopf.get("name", "").split("\n")
+        + briefkopf.get("adresse", "").split("\n")
+    )
+
+    logo_key = hashlib.sha256(logo_base64.encode("utf-8")).hexdigest()
+    key = hashlib.sha256(
+        "\0".join([logo_key] + lines).encode("utf-8")
+    ).hexdigest()
+
+    def build():
+        logo = None
+        if logo_base64:
+            logo = _logo_cache.get(logo_key, lambda: _decode_logo(logo_base64))
+        return Letterhead(key, logo, lines)
+
+    return _letterhead_cache.get(key, build)
+
+
+def render_rechnung(rechnung: dict, briefkopf: dict) -> bytes:
+    """
+    Rendert eine Rechnung und liefert das fertige PDF.
+    Läuft in den Worker-Prozessen des PDF-Pools.
+    """
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+
+    with PDF_SECONDS.time("layout"):
+        draw_rechnung(c, rechnung, briefkopf)
+    with PDF_SECONDS.time("save"):
+        c.save()
+
+    return buffer.getvalue()
+
+
+def stream_rechnung(rechnung: dict, briefkopf: dict, emit):
+    """
+    Wie render_rechnung, gibt aber jede fertige Seite sofort an
+    emit(bytes) weiter (StreamingCanvas) – Speicher bleibt konstant,
+    egal wie viele Positionen die Rechnung hat.
+    """
+    waited = 0.0
+
+    def timed_emit(chunk: bytes):
+        nonlocal waited
+        start = time.perf_counter()
+        try:
+            emit(chunk)
+        finally:
+            waited += time.perf_counter() - start
+
+    c = StreamingCanvas(timed_emit, pagesize=A4)
+
+    start = time.perf_counter()
+    draw_rechnung(c, rechnung, briefkopf)
+    layout_end, layout_waited = time.perf_counter(), waited
+    c.save()
+
+    PDF_SECONDS.observe(layout_end - start - layout_waited, "layout")
+    PDF_SECONDS.observe(time.perf_counter() - layout_end - (waited - layout_waited), "save")
+    PDF_SECONDS.observe(waited, "emit")
+
+
+def draw_rechnung(c, rechnung: dict, briefkopf: dict):
+    """
+    Layout der Rechnung auf c (ReportLab-Canvas oder StreamingCanvas).
+    """
+    width, height = A4
+    left = 25 * mm
+    right = width - 25 * mm
+
+    def check_page_space(y_pos, needed=20):
+        if y_pos < 60:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            return height - 25 * mm
+        return y_pos
+
+    # --------------------------------------------------
+    # BRIEFKOPF (Logo + Absender, als Form-XObject gestempelt)
+    # --------------------------------------------------
+    y = letterhead(briefkopf).stamp(c)
+    c.setFont("Helvetica", 10)
+
+    # --------------------------------------------------
+    # KUNDE
+    # --------------------------------------------------
+    kunde = rechnung.get("kunde", {})
+
+    for line in kunde.get("firma", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+    for line in kunde.get("kontakt", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+    for line in kunde.get("adresse", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+    y -= 20
+
+    # --------------------------------------------------
+    # RECHNUNGSDATEN (rechtsbündig)
+    # --------------------------------------------------
+    c.drawRightString(right, y, f"Rechnungsnummer: {rechnung.get('nummer', '')}")
+    y -= 14
+    c.drawRightString(right, y, f"Rechnungsdatum: {rechnung.get('datum', '')}")
+    y -= 25
+    # --------------------------------------------------
+    # TEXTBEREICH NACH TABELLE
+    # --------------------------------------------------
+    c.setFont("Helvetica", 10)
+    y -= 14
+    y = check_page_space(y)
+
+    c.drawString(left, y, "Sehr geehrte Damen und Herren,")
+    y -= 16
+
+    for line in briefkopf.get("einleitung", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+    y -= 20
+    y = check_page_space(y)
+
+
+    # --------------------------------------------------
+    # TABELLE HEADER
+    # --------------------------------------------------
+    col_datum = left
+    col_text = left + 70
+    col_std = right - 90
+    col_satz = right - 50
+    col_betrag = right
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(col_datum, y, "Datum")
+    c.drawString(col_text, y, "Beschreibung")
+    c.drawRightString(col_std, y, "Std")
+    c.drawRightString(col_satz, y, "Satz")
+    c.drawRightString(col_betrag, y, "Betrag")
+    y -= 12
+
+    c.line(left, y, right, y)
+    y -= 12
+    c.setFont("Helvetica", 10)
+
+    netto = 0.0
+
+    # --------------------------------------------------
+    # POSITIONEN
+    # --------------------------------------------------
+    for p in rechnung.get("positionen", []):
+
+        y = check_page_space(y)
+
+        stunden = float(p.get("stunden", 0))
+        satz = float(p.get("satz", 0))
+        betrag = stunden * satz
+        netto += betrag
+
+        c.drawString(col_datum, y, p.get("datum", ""))
+        c.drawString(col_text, y, p.get("text", ""))
+        c.drawRightString(col_std, y, f"{stunden:.2f}")
+        c.drawRightString(col_satz, y, f"{satz:.2f}")
+        c.drawRightString(col_betrag, y, f"{betrag:.2f}")
+
+        y -= 16
+
+
+
+    # --------------------------------------------------
+    # SUMMEN
+    # --------------------------------------------------
+    steuer = 0.0
+
+    if not briefkopf.get("steuer_befreit", True):
+        steuer = netto * float(briefkopf.get("steuer_prozent", 19)) / 100
+
+    y -= 20
+    y = check_page_space(y)
+
+    c.drawRightString(col_satz, y, "Zwischensumme:")
+    c.drawRightString(col_betrag, y, f"{netto:.2f}")
+    y -= 14
+
+    if not briefkopf.get("steuer_befreit", True):
+        c.drawRightString(col_satz, y, f"MwSt ({briefkopf.get('steuer_prozent', 19)}%):")
+        c.drawRightString(col_betrag, y, f"{steuer:.2f}")
+        y -= 14
+    else:
+        for line in briefkopf.get("steuer_text", "").split("\n"):
+            c.drawString(left, y, line)
+            y -= 14
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawRightString(col_satz, y, "Gesamtbetrag:")
+    c.drawRightString(col_betrag, y, f"{netto + steuer:.2f}")
+
+    c.setFont("Helvetica", 10)
+    y -= 40
+    y = check_page_space(y)
+
+
+    y -= 20
+    y = check_page_space(y)
+
+    for line in briefkopf.get("zahlungs_text", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 30
+
+    for line in briefkopf.get("abschluss_text", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+    y -= 30
+    y = check_page_space(y)
+
+    for line in briefkopf.get("gruss", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+    y -= 20
+    c.drawString(left, y, briefkopf.get("name", ""))
+
+    y -= 20
+
+    for line in briefkopf.get("bank", "").split("\n"):
+        c.drawString(left, y, line)
+        y -= 14
+
+
+# ======================================================
+# ZIP STREAMING (Batch)
+# ======================================================
+
+class _ChunkBuffer(io.RawIOBase):
+    """
+    Nicht-seekbares Schreibziel für ZipFile. Geschriebene Bytes werden
+    gesammelt und mit drain() abgeholt – zipfile schreibt dann
+    Data-Descriptors statt nachträglich zurückzuspringen.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def pdf_filename(rechnung: dict, position: int) -> str:
+    nummer = str(rechnung.get("nummer") or f"Rechnung-{position + 1}")
+    return re.sub(r"[^\w.\- ]", "_", nummer) + ".pdf"
+
+
+async def stream_zip(results):
+    """
+    Schreibt (dateiname, pdf)-Paare, sobald sie eintreffen, in ein ZIP
+    und gibt nach jeder Datei die fertigen Bytes weiter.
+    results ist ein Iterable von Awaitables (z.B. asyncio.as_completed).
+    """
+    buffer = _ChunkBuffer()
+    names = set()
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            name, pdf = await result
+
+            # Doppelte Rechnungsnummern nicht überschreiben
+            base, counter = name, 1
+            while name in names:
+                counter += 1
+                name = f"{base[:-4]}-{counter}.pdf"
+            names.add(name)
+
+            archive.writestr(name, pdf)
+            yield buffer.drain()
+
+    yield buffer.drain()
@@ -0,0 +1,291 @@
+import weakref
+import zlib
+
+from reportlab.lib.boxstuff import aspectRatioFix
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+# ======================================================
+# STREAMING PDF WRITER
+# ======================================================
+#
+# reportlab.pdfgen.canvas.Canvas hält alle Seiten bis save() im Speicher.
+# StreamingCanvas bietet die Teilmenge der Canvas-API, die das
+# Rechnungs-Layout nutzt, schreibt aber jede Seite bei showPage() sofort
+# als fertige PDF-Objekte an sink(bytes).
+#
+# Im Speicher bleiben nur die aktuelle Seite und die Byte-Offsets der
+# Objekte (für die xref-Tabelle). Seitenbaum und Ressourcen stehen am
+# Dateiende, ihre Objektnummern sind von Anfang an reserviert.
+
+CATALOG = 1
+PAGES = 2
+RESOURCES = 3
+
+# Bereits komprimierte Bilddaten pro ImageReader (z.B. gecachte Logos)
+_encoded_images = weakref.WeakKeyDictionary()
+
+# Bytes pro Pixel aus getRGBData() → Farbraum (L, RGB bzw. CMYK)
+COLOR_SPACES = {1: b"/DeviceGray", 3: b"/DeviceRGB", 4: b"/DeviceCMYK"}
+
+
+def _num(value: float) -> bytes:
+    text = ("%.4f" % value).rstrip("0").rstrip(".")
+    return (text if text not in ("", "-0") else "0").encode("ascii")
+
+
+def _text(value: str) -> bytes:
+    raw = value.encode("cp1252", "replace")
+    return (
+        raw.replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+        .replace(b"\r", b"\\r")
+        .replace(b"\n", b"\\n")
+    )
+
+
+def _encode_image(image) -> tuple:
+    """
+    ImageReader → (breite, höhe, Farbraum, Bilddaten, Alpha-Daten oder
+    None), jeweils Flate-komprimiert. getRGBData() liefert je nach Modus
+    1, 3 oder 4 Bytes pro Pixel, daran hängt der Farbraum.
+    """
+    encoded = _encoded_images.get(image)
+
+    if encoded is None:
+        width, height = image.getSize()
+        data = image.getRGBData()
+        color_space = COLOR_SPACES.get(len(data) // max(width * height, 1))
+        if color_space is None:
+            raise ValueError(f"Bildformat nicht unterstützt ({len(data)} Bytes)")
+
+        alpha = image._dataA
+        encoded = (
+            width,
+            height,
+            color_space,
+            zlib.compress(data),
+            zlib.compress(alpha.getRGBData()) if alpha else None,
+        )
+        _encoded_images[image] = encoded
+
+    return encoded
+
+
+class StreamingCanvas:
+
+    def __init__(self, sink, pagesize=A4):
+        self.sink = sink
+        self.width, self.height = pagesize
+
+        self._offsets = {}
+        self._position = 0
+        self._next_id = RESOURCES + 1
+        self._pending = []
+
+        self._pages = []
+        self._page = []
+        self._target = self._page
+
+        self._fonts = {}
+        self._images = {}
+        self._xobjects = {}
+        self._forms = {}
+        self._form = None
+
+        self._font = "Helvetica"
+        self._size = 12
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(CATALOG, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    # --------------------------------------------------
+    # Ausgabe
+    # --------------------------------------------------
+
+    def _write(self, data: bytes):
+        self._pending.append(data)
+        self._position += len(data)
+
+    def _flush(self):
+        if self._pending:
+            self.sink(b"".join(self._pending))
+            self._pending = []
+
+    def _allocate(self) -> int:
+        number = self._next_id
+        self._next_id += 1
+        return number
+
+    def _object(self, number: int, body: bytes):
+        self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def _stream(self, number: int, entries: bytes, data: bytes):
+        self._object(
+            number,
+            b"<< " + entries + b" /Length %d >>\nstream\n" % len(data)
+            + data + b"\nendstream",
+        )
+
+    # --------------------------------------------------
+    # Zeichnen (Canvas-kompatibel)
+    # --------------------------------------------------
+
+    def setFont(self, name: str, size: float):
+        self._font = name
+        self._size = size
+
+    def _font_id(self) -> bytes:
+        if self._font not in self._fonts:
+            font_id = b"F%d" % (len(self._fonts) + 1)
+            number = self._allocate()
+            self._object(
+                number,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /"
+                + self._font.encode("ascii")
+                + b" /Encoding /WinAnsiEncoding >>",
+            )
+            self._fonts[self._font] = (font_id, number)
+
+        return self._fonts[self._font][0]
+
+    def drawString(self, x: float, y: float, text: str):
+        self._target.append(
+            b"BT /" + self._font_id() + b" " + _num(self._size)
+            + b" Tf 1 0 0 1 " + _num(x) + b" " + _num(y)
+            + b" Tm (" + _text(text) + b") Tj ET\n"
+        )
+
+    def drawRightString(self, x: float, y: float, text: str):
+        self.drawString(x - stringWidth(text, self._font, self._size), y, text)
+
+    def line(self, x1: float, y1: float, x2: float, y2: float):
+        self._target.append(
+            _num(x1) + b" " + _num(y1) + b" m " + _num(x2) + b" " + _num(y2) + b" l S\n"
+        )
+
+    def drawImage(self, image, x, y, width=None, height=None,
+                  mask=None, preserveAspectRatio=False, anchor="c"):
+        name = self._images.get(id(image))
+
+        if name is None:
+            img_width, img_height, color_space, data, alpha = _encode_image(image)
+            entries = (
+                b"/Type /XObject /Subtype /Image /Width %d /Height %d"
+                b" /BitsPerComponent 8 /Filter /FlateDecode" % (img_width, img_height)
+            )
+
+            smask = b""
+            if alpha is not None and mask == "auto":
+                number = self._allocate()
+                self._stream(number, entries + b" /ColorSpace /DeviceGray", alpha)
+                smask = b" /SMask %d 0 R" % number
+
+            number = self._allocate()
+            self._stream(number, entries + b" /ColorSpace " + color_space + smask, data)
+
+            name = b"Im%d" % number
+            self._images[id(image)] = name
+            self._xobjects[name] = number
+
+        img_width, img_height = _encode_image(image)[:2]
+        x, y, width, height, scaled = aspectRatioFix(
+            preserveAspectRatio, anchor, x, y,
+            width or img_width, height or img_height, img_width, img_height,
+        )
+
+        self._target.append(
+            b"q " + _num(width) + b" 0 0 " + _num(height) + b" "
+            + _num(x) + b" " + _num(y) + b" cm /" + name + b" Do Q\n"
+        )
+
+    # --------------------------------------------------
+    # Formulare (wiederverwendbare XObjects)
+    # --------------------------------------------------
+
+    def hasForm(self, name: str) -> bool:
+        return name in self._forms
+
+    def beginForm(self, name: str):
+        self._form = name
+        self._target = []
+
+    def endForm(self):
+        number = self._allocate()
+        self._stream(
+            number,
+            b"/Type /XObject /Subtype /Form /BBox [0 0 " + _num(self.width)
+            + b" " + _num(self.height) + b"] /Resources 3 0 R /Filter /FlateDecode",
+            zlib.compress(b"".join(self._target)),
+        )
+
+        form_id = b"Fm%d" % number
+        self._forms[self._form] = form_id
+        self._xobjects[form_id] = number
+
+        self._form = None
+        self._target = self._page
+
+    def doForm(self, name: str):
+        self._target.append(b"/" + self._forms[name] + b" Do\n")
+
+    # --------------------------------------------------
+    # Seiten
+    # --------------------------------------------------
+
+    def showPage(self):
+        content = self._allocate()
+        self._stream(content, b"/Filter /FlateDecode", zlib.compress(b"".join(self._page)))
+
+        page = self._allocate()
+        self._object(
+            page,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 " + _num(self.width)
+            + b" " + _num(self.height) + b"] /Resources 3 0 R /Contents %d 0 R >>" % content,
+        )
+        self._pages.append(page)
+
+        self._page.clear()
+        self._font = "Helvetica"
+        self._size = 12
+
+        # Fertige Seite sofort weitergeben
+        self._flush()
+
+    def save(self):
+        if self._page or not self._pages:
+            self.showPage()
+
+        fonts = b" ".join(
+            b"/" + font_id + b" %d 0 R" % number
+            for font_id, number in self._fonts.values()
+        )
+        xobjects = b" ".join(
+            b"/" + name + b" %d 0 R" % number
+            for name, number in self._xobjects.items()
+        )
+        self._object(
+            RESOURCES,
+            b"<< /ProcSet [/PDF /Text /ImageB /ImageC /ImageI] /Font << " + fonts
+            + b" >> /XObject << " + xobjects + b" >> >>",
+        )
+
+        kids = b" ".join(b"%d 0 R" % number for number in self._pages)
+        self._object(
+            PAGES,
+            b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._pages),
+        )
+
+        xref = self._position
+        count = self._next_id
+        entries = [b"0000000000 65535 f \n"]
+        entries += [b"%010d 00000 n \n" % self._offsets[n] for n in range(1, count)]
+
+        self._write(b"xref\n0 %d\n" % count + b"".join(entries))
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref)
+        )
+        self._flush()
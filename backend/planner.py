@@ -0,0 +1,341 @@
+import heapq
+import time
+from typing import Any
+
+from backend.records import format_number
+from backend.uebersicht import TAGE, empty_cell
+
+
+# ======================================================
+# AUTOMATISCHE SCHICHTPLANUNG
+# ======================================================
+#
+# Besetzt jede Zelle des Boards, in der eine Schicht gewählt ist, mit
+# pro_schicht Mitarbeitern. Bedingungen:
+#
+#   - der Mitarbeiter hat die Schicht in seiner Liste (Spalte Schichten)
+#   - höchstens eine Schicht pro Tag
+#   - Summe der Schichtstunden ≤ Wochenstunden (ohne Angabe wird der
+#     Mitarbeiter nicht automatisch eingeplant)
+#
+# Vorgehen:
+#
+#   1. Greedy pro (Tag, Schicht)-Gruppe, Schichten mit den wenigsten
+#      geeigneten Mitarbeitern zuerst. Innerhalb einer Gruppe bekommt den
+#      Platz, wer die meisten freien Stunden hat (Max-Heap pro Schicht mit
+#      verzögertem Löschen) – das verteilt die Last gleichmäßig.
+#   2. Lokale Suche für offene Plätze: Ein geeigneter Mitarbeiter, der nur
+#      wegen einer anderen Schicht (gleicher Tag oder fehlende Stunden)
+#      nicht passt, übernimmt den Platz, wenn jemand anderes seine andere
+#      Schicht übernehmen kann. Läuft, bis ein Durchlauf über die offenen
+#      Plätze nichts mehr besetzt, höchstens bis zur Zeitvorgabe.
+#
+# Bereits eingetragene Mitarbeiter bleiben (außer mit ueberschreiben)
+# stehen und zählen bei Tagen und Stunden mit – auch die lokale Suche
+# verschiebt sie nicht.
+
+
+def label_name(label: str) -> str:
+    """
+    "Lukas Schneider, 40h/w" → "Lukas Schneider"
+    """
+    return str(label).rsplit(", ", 1)[0].strip()
+
+
+def employee_label(mitarbeiter) -> str:
+    if mitarbeiter.stunden_woche is None:
+        return mitarbeiter.name
+    return f"{mitarbeiter.name}, {format_number(mitarbeiter.stunden_woche)}h/w"
+
+
+def shift_hours(schicht) -> float:
+    if schicht.stunden is not None:
+        return schicht.stunden
+    return sum(end - start for start, end in schicht.blocks()) / 60
+
+
+class _Plan:
+
+    def __init__(self, mitarbeiter, schichten):
+        self.mitarbeiter = mitarbeiter
+        self.hours = {s.name: shift_hours(s) for s in schichten}
+
+        self.remaining = [
+            m.stunden_woche if m.stunden_woche is not None else 0.0
+            for m in mitarbeiter
+        ]
+        self.busy = [0] * len(mitarbeiter)          # Bitmaske der Tage
+        self.assigned = [{} for _ in mitarbeiter]   # tag → zelle
+
+        self.eligible = {}
+        for i, m in enumerate(mitarbeiter):
+            for schicht in set(m.schichten):
+                self.eligible.setdefault(schicht, []).append(i)
+
+        self.by_name = {}
+        for i, m in enumerate(mitarbeiter):
+            self.by_name.setdefault(m.name, i)
+
+        # Zelle: [filiale_pos, tag_pos, schicht, bedarf, [mitarbeiter_pos], [feste labels]]
+        self.cells = []
+        # (mitarbeiter_pos, id(zelle)) der Einträge, die schon auf dem Board standen
+        self.pinned = set()
+        # Zähler für Änderungen – die lokale Suche merkt sich damit, für welche
+        # (Tag, Schicht) seit der letzten Änderung nichts mehr zu holen war
+        self.moves = 0
+
+    # --------------------------------------------------
+    # Zuordnen / Lösen
+    # --------------------------------------------------
+
+    def fits(self, i: int, day: int, hours: float) -> bool:
+        return not self.busy[i] >> day & 1 and self.remaining[i] >= hours
+
+    def assign(self, i: int, cell: list):
+        day, hours = cell[1], self.hours.get(cell[2], 0.0)
+        self.remaining[i] -= hours
+        self.busy[i] |= 1 << day
+        self.assigned[i][day] = cell
+        cell[4].append(i)
+        self.moves += 1
+
+    def release(self, i: int, cell: list):
+        day, hours = cell[1], self.hours.get(cell[2], 0.0)
+        self.remaining[i] += hours
+        self.busy[i] &= ~(1 << day)
+        del self.assigned[i][day]
+        cell[4].remove(i)
+        self.moves += 1
+
+    # --------------------------------------------------
+    # 1. Greedy
+    # --------------------------------------------------
+
+    def greedy(self):
+        groups = {}
+        for cell in self.cells:
+            if cell[3] > len(cell[4]):
+                groups.setdefault((cell[1], cell[2]), []).append(cell)
+
+        stamp = [0] * len(self.mitarbeiter)
+        heaps = {
+            schicht: [(-self.remaining[i], i, 0) for i in members]
+            for schicht, members in self.eligible.items()
+        }
+        for heap in heaps.values():
+            heapq.heapify(heap)
+
+        order = sorted(groups, key=lambda g: (len(self.eligible.get(g[1], ())), g[0], g[1]))
+
+        for day, schicht in order:
+            heap = heaps.get(schicht)
+            if not heap:
+                continue
+
+            hours = self.hours.get(schicht, 0.0)
+            aside = []
+
+            for cell in groups[(day, schicht)]:
+                while len(cell[4]) < cell[3] and heap:
+                    entry = heapq.heappop(heap)
+                    i = entry[1]
+
+                    if entry[2] != stamp[i]:
+                        continue  # veraltet, aktueller Eintrag liegt im Heap
+                    if self.remaining[i] < hours:
+                        continue  # Stunden reichen für diese Schicht nie mehr
+                    if self.busy[i] >> day & 1:
+                        aside.append(entry)
+                        continue
+
+                    self.assign(i, cell)
+                    stamp[i] += 1
+                    for other in set(self.mitarbeiter[i].schichten):
+                        heapq.heappush(heaps[other], (-self.remaining[i], i, stamp[i]))
+
+            for entry in aside:
+                heapq.heappush(heap, entry)
+
+    # --------------------------------------------------
+    # 2. Lokale Suche
+    # --------------------------------------------------
+
+    def _replacement(self, cell: list, exclude: int):
+        """
+        Freier, geeigneter Mitarbeiter für einen Platz in cell.
+        """
+        day, hours = cell[1], self.hours.get(cell[2], 0.0)
+        for j in self.eligible.get(cell[2], ()):
+            if j != exclude and self.fits(j, day, hours):
+                return j
+        return None
+
+    def _fill(self, cell: list, deadline: float) -> bool:
+        day, hours = cell[1], self.hours.get(cell[2], 0.0)
+
+        for i in self.eligible.get(cell[2], ()):
+            if i in cell[4]:
+                continue
+            if time.perf_counter() > deadline:
+                return False
+
+            if self.fits(i, day, hours):
+                self.assign(i, cell)
+                return True
+
+            # Schicht am selben Tag bzw. eine Schicht, die Stunden freigibt
+            if self.busy[i] >> day & 1:
+                blocking = [self.assigned[i].get(day)]
+            else:
+                deficit = hours - self.remaining[i]
+                blocking = [
+                    c for c in self.assigned[i].values()
+                    if self.hours.get(c[2], 0.0) >= deficit
+                ]
+
+            for other in blocking:
+                if other is None or other is cell:
+                    continue
+                if (i, id(other)) in self.pinned:
+                    continue  # von Hand eingetragen, bleibt stehen
+                if self.remaining[i] + self.hours.get(other[2], 0.0) < hours:
+                    continue
+
+                j = self._replacement(other, exclude=i)
+                if j is None:
+                    continue
+
+                self.release(i, other)
+                self.assign(j, other)
+                self.assign(i, cell)
+                return True
+
+        return False
+
+    def improve(self, deadline: float):
+        """
+        Durchläufe über die offenen Zellen, bis einer nichts mehr besetzt
+        oder die Zeitvorgabe erreicht ist. Ist eine (Tag, Schicht)-Gruppe
+        gescheitert, werden ihre übrigen Zellen erst nach der nächsten
+        Änderung wieder versucht.
+        """
+        while True:
+            filled = False
+            failed = {}
+
+            for cell in self.cells:
+                key = (cell[1], cell[2])
+                while len(cell[4]) < cell[3] and failed.get(key) != self.moves:
+                    if not self._fill(cell, deadline):
+                        failed[key] = self.moves
+                        break
+                    filled = True
+                if time.perf_counter() > deadline:
+                    return
+
+            if not filled:
+                return
+
+
+def plan_week(
+    board: Any,
+    mitarbeiter,
+    schichten,
+    pro_schicht: int = 1,
+    ueberschreiben: bool = False,
+    time_limit: float = 0.5,
+) -> tuple:
+    """
+    Liefert (neues Board, Statistik). mitarbeiter/schichten sind Records
+    (backend/records.py). Das übergebene Board bleibt unverändert.
+    """
+    start = time.perf_counter()
+    plan = _Plan(mitarbeiter, schichten)
+
+    if isinstance(board, dict) and isinstance(board.get("data"), list):
+        data = board["data"]
+    else:
+        board, data = {}, []
+
+    # Zellen sammeln, vorhandene Einträge übernehmen
+    for f, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            continue
+        tage = entry.get("tage") or {}
+
+        for day, tag in enumerate(TAGE):
+            cell = tage.get(tag) or {}
+            schicht = str(cell.get("schicht") or "").strip()
+            if not schicht:
+                # Ohne Schicht bleibt die Zelle wie sie ist – der Tag ist belegt
+                for label in cell.get("mitarbeiter") or []:
+                    i = plan.by_name.get(label_name(label))
+                    if i is not None:
+                        plan.busy[i] |= 1 << day
+                continue
+
+            ref = [f, day, schicht, pro_schicht, [], []]
+
+            if not ueberschreiben:
+                for label in cell.get("mitarbeiter") or []:
+                    i = plan.by_name.get(label_name(label))
+                    if i is not None and not plan.busy[i] >> day & 1:
+                        plan.assign(i, ref)
+                    else:
+                        ref[5].append(label)  # unbekannt oder doppelt: nur behalten
+                # Bedarf für die vom Planer verwalteten Plätze
+                ref[3] = max(pro_schicht, len(ref[4]) + len(ref[5])) - len(ref[5])
+
+            plan.cells.append(ref)
+
+    fixed = [list(cell[4]) for cell in plan.cells]
+    plan.pinned = {(i, id(cell)) for cell in plan.cells for i in cell[4]}
+
+    plan.greedy()
+    plan.improve(start + time_limit)
+
+    # Neues Board: nur geänderte Einträge kopieren
+    new_data = list(data)
+    offen = []
+    besetzt = 0
+
+    for cell, before in zip(plan.cells, fixed):
+        f, day, schicht, need, members, kept = cell
+        besetzt += len(members)
+
+        if len(members) < need:
+            offen.append({
+                "filiale": str(data[f].get("filiale", "")),
+                "tag": TAGE[day],
+                "schicht": schicht,
+                "fehlend": need - len(members),
+            })
+
+        if members == before and not ueberschreiben:
+            continue
+
+        entry = new_data[f]
+        if entry is data[f]:
+            entry = new_data[f] = {**entry, "tage": dict(entry.get("tage") or {})}
+
+        tag = TAGE[day]
+        entry["tage"][tag] = {
+            **empty_cell(),
+            **(entry["tage"].get(tag) or {}),
+            "mitarbeiter": kept + [employee_label(mitarbeiter[i]) for i in members],
+        }
+
+    stunden = {}
+    for i, m in enumerate(mitarbeiter):
+        if plan.assigned[i]:
+            stunden[m.name] = sum(plan.hours.get(c[2], 0.0) for c in plan.assigned[i].values())
+
+    statistik = {
+        "plaetze": sum(cell[3] for cell in plan.cells),
+        "besetzt": besetzt,
+        "offen": offen,
+        "stunden": stunden,
+        "dauer_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+    return {**board, "data": new_data}, statistik
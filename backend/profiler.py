@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+# ======================================================
+# PROFILER FÜR LANGSAME ANFRAGEN (OPT-IN)
+# ======================================================
+#
+# Solange mindestens eine Anfrage läuft, nimmt ein Hintergrund-Thread alle
+# GMATRIX_PROFILE_INTERVAL_MS Millisekunden die Stacks aller Threads auf
+# (sys._current_frames). Dauert eine Anfrage länger als
+# GMATRIX_PROFILE_SLOW_MS, werden die Stichproben aus ihrem Zeitraum als
+# "folded stacks" (Format von flamegraph.pl / speedscope) aufbewahrt:
+#
+#   GET /metrics/profile → [{"route", "dauer_ms", "stichproben", "stacks"}, ...]
+#
+# Die Stichproben gehören zum Prozess, nicht zur einzelnen Anfrage – bei
+# parallelen Anfragen erscheinen auch deren Stacks. Wartende Threads
+# (leere Pools, Event-Loop im select) werden übersprungen.
+#
+# Ohne GMATRIX_PROFILE_SLOW_MS ist der Profiler aus.
+
+# Innerster Frame (Datei, Funktion) eines wartenden Threads
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+_IDLE_FUNCTIONS = {("thread.py", "_worker"), ("process.py", "_queue_management_worker")}
+
+
+class SlowRequestProfiler:
+
+    def __init__(self, threshold: float, interval: float = 0.005, keep: int = 20, depth: int = 48):
+        self.threshold = threshold
+        self.interval = interval
+        self.depth = depth
+        self.profiles = deque(maxlen=keep)
+
+        # Etwa eine Minute Stichproben von 8 aktiven Threads
+        self._samples = deque(maxlen=max(1000, int(60 / interval) * 8))
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+
+    # --------------------------------------------------
+    # Anfragen
+    # --------------------------------------------------
+
+    def begin(self) -> float:
+        with self._lock:
+            self._active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="gmatrix-profiler", daemon=True
+                )
+                self._thread.start()
+            self._wake.notify()
+        return time.perf_counter()
+
+    def end(self, start: float, method: str, route: str, duration: float, stream: bool = False):
+        with self._lock:
+            self._active -= 1
+            if stream or duration < self.threshold:
+                return
+            stacks = Counter(stack for at, stack in self._samples if at >= start)
+
+        self.profiles.append({
+            "methode": method,
+            "route": route,
+            "dauer_ms": round(duration * 1000, 1),
+            "zeit": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stichproben": sum(stacks.values()),
+            "stacks": dict(stacks.most_common(50)),
+        })
+
+    # --------------------------------------------------
+    # Stichproben
+    # --------------------------------------------------
+
+    def _stack(self, frame) -> str:
+        code = frame.f_code
+        innermost = (os.path.basename(code.co_filename), code.co_name)
+        if innermost[0] in _IDLE_FILES or innermost in _IDLE_FUNCTIONS:
+            return None
+
+        names = []
+        while frame is not None and len(names) < self.depth:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+
+        # folded: äußerster Frame zuerst
+        return ";".join(reversed(names))
+
+    def _run(self):
+        me = threading.get_ident()
+
+        while True:
+            with self._lock:
+                while not self._active:
+                    self._wake.wait()
+
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            frames.pop(me, None)
+            taken = [(now, stack) for stack in map(self._stack, frames.values()) if stack]
+            # Frames nicht festhalten (hält sonst deren Locals am Leben)
+            del frames
+
+            with self._lock:
+                self._samples.extend(taken)
+
+            time.sleep(self.interval)
+
+
+def profiler_from_env():
+    """
+    SlowRequestProfiler, falls GMATRIX_PROFILE_SLOW_MS gesetzt ist, sonst None.
+    """
+    threshold = os.environ.get("GMATRIX_PROFILE_SLOW_MS")
+    if not threshold:
+        return None
+
+    return SlowRequestProfiler(
+        threshold=float(threshold) / 1000,
+        interval=float(os.environ.get("GMATRIX_PROFILE_INTERVAL_MS", 5)) / 1000,
+        keep=int(os.environ.get("GMATRIX_PROFILE_KEEP", 20)),
+    )
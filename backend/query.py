@@ -0,0 +1,128 @@
+import bisect
+import re
+import threading
+from typing import Any
+
+from backend.storage import load_json
+
+
+# ======================================================
+# LISTEN-ABFRAGEN (FILTER + PAGINIERUNG)
+# ======================================================
+#
+# Filter laufen nicht über die geparste Liste, sondern über einen Index,
+# der pro Listen-Stand einmal aufgebaut wird. Der Dokument-Cache liefert
+# bis zur nächsten Änderung dasselbe Objekt – solange bleibt auch der
+# Index gültig (wie bei WeekIndex und dem ID-Index).
+#
+# Filter-Spezifikation pro Ressource:
+#
+#   {"filiale": ("exact", (0,)), "name": ("text", (0, 1))}
+#
+#   exact → Wert der Spalte muss exakt passen (z.B. Filialnummer)
+#   text  → jedes Suchwort muss Präfix eines Worts der Spalten sein
+
+_WORD = re.compile(r"\w+")
+
+
+def words(value: Any) -> list:
+    return _WORD.findall(str(value).lower())
+
+
+class ListIndex:
+
+    def __init__(self, rows: list, spec: dict):
+        self.size = len(rows)
+        self.exact = {}
+        self.text = {}
+
+        for name, (kind, columns) in spec.items():
+            if kind == "exact":
+                postings = {}
+                for position, row in enumerate(rows):
+                    for column in columns:
+                        key = str(row[column]).strip() if column < len(row) else ""
+                        postings.setdefault(key, []).append(position)
+                self.exact[name] = postings
+            else:
+                # Sortierte (wort, position)-Paare → Präfixsuche per bisect
+                entries = set()
+                for position, row in enumerate(rows):
+                    for column in columns:
+                        if column < len(row):
+                            entries.update((w, position) for w in words(row[column]))
+                self.text[name] = sorted(entries)
+
+    def _text_matches(self, name: str, query: str) -> set:
+        entries = self.text[name]
+        result = None
+
+        for word in words(query):
+            found = set()
+            i = bisect.bisect_left(entries, (word,))
+            while i < len(entries) and entries[i][0].startswith(word):
+                found.add(entries[i][1])
+                i += 1
+            result = found if result is None else result & found
+
+        return result if result is not None else set(range(self.size))
+
+    def select(self, filters: dict) -> list:
+        """
+        Positionen aller Zeilen, die alle Filter erfüllen, aufsteigend.
+        """
+        result = None
+
+        for name, value in filters.items():
+            if name in self.exact:
+                found = set(self.exact[name].get(str(value).strip(), ()))
+            else:
+                found = self._text_matches(name, value)
+            result = found if result is None else result & found
+
+        if result is None:
+            return list(range(self.size))
+
+        return sorted(result)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def list_index(path: str, rows: list, spec: dict) -> ListIndex:
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] is rows:
+            return cached[1]
+
+    index = ListIndex(rows, spec)
+
+    with _indexes_lock:
+        _indexes[path] = (rows, index)
+
+    return index
+
+
+def query_list(
+    path: str, spec: dict, filters: dict, offset: int = 0, limit: int = None, rows: list = None
+):
+    """
+    Liefert (gesamt, seite): Anzahl aller Treffer und die Zeilen
+    offset … offset+limit. Ohne Filter und Seitenangabe unverändert
+    die ganze Liste. rows ist optional die bereits geladene Liste.
+    """
+    if rows is None:
+        rows = load_json(path)
+    filters = {k: v for k, v in filters.items() if v is not None}
+
+    end = None if limit is None else offset + limit
+
+    if not filters:
+        if not offset and limit is None:
+            return len(rows), rows
+        return len(rows), rows[offset:end]
+
+    positions = list_index(path, rows, spec).select(filters)
+
+    return len(positions), [rows[i] for i in positions[offset:end]]
@@ -0,0 +1,232 @@
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from backend.storage import load_json
+
+
+# ======================================================
+# STAMMDATEN ALS TYPISIERTE RECORDS
+# ======================================================
+#
+# Die Stores speichern Stammdaten weiter als positionale Listen (so
+# erwartet sie das Frontend). Für Berechnungen werden sie einmal pro
+# Listen-Stand in kompakte Records (__slots__) übersetzt: Zahlen und
+# Uhrzeiten sind dann schon geparst, statt in jeder Schleife erneut
+# float("40") zu rechnen.
+#
+#   rows = load_json(MITARBEITER_FILE)
+#   for m in load_records(MITARBEITER_FILE, MitarbeiterRecord):
+#       m.stunden_woche            → 40.0 (oder None)
+#
+# from_row liest auch ältere Schreibweisen: "8,5" als Zahl, kommagetrennte
+# Schichten alter Mitarbeiter-Einträge als Liste. Geschrieben wird weiter
+# die Liste aus dem Store; Records sind nur zum Rechnen da.
+
+
+# ------------------------------------------------------
+# Feld-Konvertierung
+# ------------------------------------------------------
+
+def parse_number(value: Any) -> Optional[float]:
+    """
+    "40" / "8,5" / 8 → float, leer oder ungültig → None.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if math.isfinite(value) else None
+
+    text = str(value or "").strip().replace(",", ".")
+    if not text:
+        return None
+
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+
+    return number if math.isfinite(number) else None
+
+
+def format_number(value: Optional[float], point: bool = False) -> str:
+    """
+    Ganze Zahlen ohne Nachkommastellen ("40"), mit point=True immer
+    mit Punkt ("8.0" – Schreibweise der Schichten).
+    """
+    if value is None:
+        return ""
+    if point or value != int(value):
+        return repr(value)
+    return str(int(value))
+
+
+def parse_time(value: Any) -> Optional[int]:
+    """
+    "7:00" / "13:30" → Minuten seit Mitternacht, sonst None.
+    """
+    try:
+        hours, minutes = str(value or "").strip().split(":")
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+
+    if not (0 <= hours <= 24 and 0 <= minutes < 60):
+        return None
+
+    return hours * 60 + minutes
+
+
+def _text(row: list, column: int) -> str:
+    if column >= len(row) or row[column] is None:
+        return ""
+    return str(row[column])
+
+
+def _column(row: list, column: int) -> Any:
+    return row[column] if column < len(row) else None
+
+
+def _names(value: Any) -> tuple:
+    """
+    Liste von Namen; ältere Einträge speichern sie kommagetrennt.
+    """
+    if isinstance(value, list):
+        return tuple(str(v) for v in value)
+    if isinstance(value, str):
+        return tuple(v.strip() for v in value.split(",") if v.strip())
+    return ()
+
+
+# ------------------------------------------------------
+# Mitarbeiter
+# ------------------------------------------------------
+#
+# [vorname, nachname, geburtstag, anschrift, anstellung, vertrag_an,
+#  vertrag_unterzeichnet, stunden_woche, stunden_monat, sub_unternehmen,
+#  [schichten], stundensatz]
+
+@dataclass(slots=True)
+class MitarbeiterRecord:
+    vorname: str
+    nachname: str
+    geburtstag: str
+    anschrift: str
+    anstellung: str
+    vertrag_an: str
+    vertrag_unterzeichnet: str
+    stunden_woche: Optional[float]
+    stunden_monat: Optional[float]
+    sub_unternehmen: str
+    schichten: tuple
+    stundensatz: Optional[float]
+
+    @property
+    def name(self) -> str:
+        return f"{self.vorname} {self.nachname}".strip()
+
+    @classmethod
+    def from_row(cls, row: list) -> "MitarbeiterRecord":
+        return cls(
+            _text(row, 0),
+            _text(row, 1),
+            _text(row, 2),
+            _text(row, 3),
+            _text(row, 4),
+            _text(row, 5),
+            _text(row, 6),
+            parse_number(_column(row, 7)),
+            parse_number(_column(row, 8)),
+            _text(row, 9),
+            _names(_column(row, 10)),
+            parse_number(_column(row, 11)),
+        )
+
+
+# ------------------------------------------------------
+# Schichten
+# ------------------------------------------------------
+#
+# [name, start_a, ende_b, start_c, ende_d, stunden] – zwei Blöcke
+# A–B und C–D (Pause dazwischen), Zeiten als Minuten seit Mitternacht
+
+@dataclass(slots=True)
+class SchichtRecord:
+    name: str
+    start_a: Optional[int]
+    ende_b: Optional[int]
+    start_c: Optional[int]
+    ende_d: Optional[int]
+    stunden: Optional[float]
+
+    def blocks(self) -> list:
+        """
+        Arbeitsblöcke als [(von, bis)] in Minuten, über Mitternacht
+        hinaus bis > 1440.
+        """
+        result = []
+        offset = 0
+        for start, end in ((self.start_a, self.ende_b), (self.start_c, self.ende_d)):
+            if start is None or end is None:
+                continue
+            # Zweiter Block nach Mitternacht (z.B. 22:00–2:00, 2:30–6:00)
+            if result and start + offset < result[-1][1]:
+                offset += 24 * 60
+            start += offset
+            end += offset
+            if end <= start:
+                end += 24 * 60
+            result.append((start, end))
+        return result
+
+    @classmethod
+    def from_row(cls, row: list) -> "SchichtRecord":
+        return cls(
+            _text(row, 0),
+            parse_time(_column(row, 1)),
+            parse_time(_column(row, 2)),
+            parse_time(_column(row, 3)),
+            parse_time(_column(row, 4)),
+            parse_number(_column(row, 5)),
+        )
+
+
+# ======================================================
+# TABELLEN (EINMAL PRO LISTEN-STAND)
+# ======================================================
+#
+# Wie beim Listen-Index: Der Dokument-Cache liefert bis zur nächsten
+# Änderung dasselbe Listen-Objekt, solange gelten auch die Records.
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def records_from_rows(rows: list, record_type) -> tuple:
+    return tuple(
+        record_type.from_row(row if isinstance(row, list) else []) for row in rows
+    )
+
+
+def load_records(path: str, record_type, rows: list = None) -> tuple:
+    """
+    Records aller Zeilen eines Listen-Stores, positionsgleich mit
+    load_json(path). rows ist optional die bereits geladene Liste.
+    """
+    if rows is None:
+        rows = load_json(path)
+    if not isinstance(rows, list):
+        return ()
+
+    key = (path, record_type)
+
+    with _tables_lock:
+        cached = _tables.get(key)
+        if cached is not None and cached[0] is rows:
+            return cached[1]
+
+    records = records_from_rows(rows, record_type)
+
+    with _tables_lock:
+        _tables[key] = (rows, records)
+
+    return records
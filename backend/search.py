@@ -0,0 +1,365 @@
+import heapq
+import operator
+import re
+import threading
+import unicodedata
+from itertools import compress, count, islice
+from typing import Any
+
+from backend.storage import load_ids, load_json, store_lock
+
+
+# ======================================================
+# VOLLTEXTSUCHE ÜBER STAMMDATEN (GET /search)
+# ======================================================
+#
+# Pro Store ein invertierter Index im Speicher, zweistufig:
+#
+#   Trigramm → Wörter    ("  m", " mu", "mul", … – nur vorne aufgefüllt,
+#                         damit ein angefangenes Wort alle Trigramme teilt)
+#   Wort     → Zeilen
+#
+# Ein Suchwort findet so Wörter mit gleichem Präfix ("sch" → "schneider")
+# und Wörter mit Tippfehlern (mindestens MIN_SIMILARITY der Trigramme
+# gemeinsam, ab FUZZY_MIN_LENGTH Zeichen). Mehrere Suchwörter müssen alle
+# passen; die Punkte einer Zeile sind die Summe ihrer besten Wörter.
+#
+# Text wird vorher gefaltet (wie Lucenes German Normalization): klein,
+# ß → ss, Akzente weg, ae/oe/ue → a/o/u. "Müller", "Mueller" und "Muller"
+# sind damit dasselbe Wort.
+#
+# Aktualisiert wird inkrementell: Schreibvorgänge auf beobachtete Stores
+# rufen on_change (storage.add_change_listener) noch unter der Sperre auf,
+# der Index gleicht dann die neue Liste mit seinem Stand ab. Gleiche
+# Zeilen am Anfang und Ende werden in C verglichen (bei copy-on-write
+# meist dasselbe Objekt), neu zerlegt wird nur der geänderte Bereich.
+# Schreibt ein anderer gunicorn-Worker, liefert der Cache eine neu
+# geparste Liste – auch dann ändert die nächste Suche nur, was sich
+# unterscheidet.
+
+MIN_SIMILARITY = 0.5
+FUZZY_MIN_LENGTH = 5
+
+# Punkte pro Suchwort: exakt > Präfix > ähnlich (× Anteil gemeinsamer Trigramme)
+SCORE_EXACT = 1.0
+SCORE_PREFIX = 0.9
+SCORE_FUZZY = 0.8
+
+_WORD = re.compile(r"\w+")
+_DIGRAPH = re.compile(r"ae|oe|(?<!q)ue")
+
+
+def fold(text: Any) -> str:
+    """
+    "Müller-Lüdenscheidt" → "muller-ludenscheidt", "Straße" → "strasse".
+    """
+    text = str(text).casefold().replace("ß", "ss")
+    if not text.isascii():
+        text = "".join(
+            c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
+        )
+    return _DIGRAPH.sub(lambda m: m.group()[0], text)
+
+
+def terms(text: Any) -> list:
+    return _WORD.findall(fold(text))
+
+
+def trigrams(term: str) -> set:
+    padded = "  " + term
+    return {padded[i:i + 3] for i in range(len(term))}
+
+
+def _same_prefix(old: list, new: list, limit: int, order=iter) -> int:
+    """
+    Anzahl gleicher Zeilen am Anfang (order=reversed: am Ende), höchstens limit.
+    """
+    # Erst auf Identität (copy-on-write, billig), ab der ersten Abweichung
+    # auf Gleichheit (neu geparste Liste eines anderen Workers)
+    differs = map(operator.is_not, islice(order(old), limit), order(new))
+    same = next(compress(count(), differs), limit)
+
+    differs = map(operator.ne, islice(order(old), same, limit), islice(order(new), same, limit))
+    return same + next(compress(count(), differs), limit - same)
+
+
+def changed_range(old: list, new: list) -> tuple:
+    """
+    (start, ende_alt, ende_neu): old[start:ende_alt] wurde durch
+    new[start:ende_neu] ersetzt, davor und dahinter ist alles gleich.
+    """
+    shorter = min(len(old), len(new))
+    start = _same_prefix(old, new, shorter)
+    back = _same_prefix(old, new, shorter - start, reversed)
+
+    return start, len(old) - back, len(new) - back
+
+
+class SearchIndex:
+    """
+    Index über die Spalten columns eines Listen-Stores. sync(rows, ids)
+    bringt ihn auf den Stand von rows (ids parallel dazu), search(wörter,
+    limit) liefert die besten Zeilen.
+    """
+
+    def __init__(self, path: str, columns: tuple):
+        self.path = path
+        self.columns = columns
+        self.rows = None
+        self.ids = []
+
+        # Jede Zeile bekommt beim Zerlegen eine laufende Nummer (Schlüssel)
+        self._keys = []          # Schlüssel parallel zu rows
+        self._positions = None   # Schlüssel → Position, bei Bedarf aus _keys
+        self._terms = {}         # Schlüssel → Wörter der Zeile
+        self._postings = {}      # wort → {schlüssel}
+        self._grams = {}         # trigramm → {wort}
+        self._next_key = 0
+        self._lock = threading.Lock()        # Suchen ↔ Ändern
+        self._sync_lock = threading.Lock()   # ein sync gleichzeitig
+
+    # --------------------------------------------------
+    # Aktualisieren
+    # --------------------------------------------------
+
+    def _row_terms(self, row: Any) -> frozenset:
+        if not isinstance(row, list):
+            return frozenset()
+
+        found = set()
+        for column in self.columns:
+            if column < len(row):
+                found.update(terms(row[column]))
+        return frozenset(found)
+
+    def sync(self, rows: list, ids: list):
+        """
+        Gleicht den Index mit rows ab. Nur Zeilen, die sich vom bisherigen
+        Stand unterscheiden, werden neu zerlegt. ids wird zusammen mit rows
+        übernommen, Suchen sehen immer ein passendes Paar.
+        """
+        with self._sync_lock:
+            old = self.rows if self.rows is not None else []
+            if rows is old:
+                if ids is not self.ids:
+                    with self._lock:
+                        self.ids = ids
+                return
+
+            start, end_old, end_new = changed_range(old, rows)
+            keys = self._keys[start:end_old]
+            replaced = rows[start:end_new]
+
+            if len(keys) == len(replaced):
+                # Gleich lang (z.B. Batch mit Updates): nur geänderte Zeilen
+                changes = [
+                    (i, [keys[i]], [row])
+                    for i, (before, row) in enumerate(zip(old[start:end_old], replaced))
+                    if before != row
+                ]
+            else:
+                changes = [(0, keys, replaced)]
+
+            # Zerlegen ohne Such-Sperre – Suchen laufen solange auf dem alten Stand
+            parsed = [
+                (offset, removed, [self._row_terms(row) for row in added])
+                for offset, removed, added in changes
+            ]
+
+            with self._lock:
+                for offset, removed, added in parsed:
+                    for key in removed:
+                        self._remove(key)
+                    keys[offset:offset + len(removed)] = [self._add(t) for t in added]
+
+                self._keys[start:end_old] = keys
+                self._positions = None
+                self.rows = rows
+                self.ids = ids
+
+    def _add(self, row_terms: frozenset) -> int:
+        key = self._next_key
+        self._next_key += 1
+
+        self._terms[key] = row_terms
+        for term in row_terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = set()
+                for gram in trigrams(term):
+                    self._grams.setdefault(gram, set()).add(term)
+            posting.add(key)
+
+        return key
+
+    def _remove(self, key: int):
+        for term in self._terms.pop(key):
+            posting = self._postings[term]
+            posting.discard(key)
+            if not posting:
+                del self._postings[term]
+                for gram in trigrams(term):
+                    words = self._grams[gram]
+                    words.discard(term)
+                    if not words:
+                        del self._grams[gram]
+
+    # --------------------------------------------------
+    # Suchen
+    # --------------------------------------------------
+
+    def _prefix_score(self, word: str, term: str) -> float:
+        if term == word:
+            return SCORE_EXACT
+        # Kürzere Ergänzung zuerst: "max" vor "maximilian"
+        return SCORE_PREFIX - 0.1 * (1 - len(word) / len(term))
+
+    def _matching_terms(self, word: str) -> dict:
+        """
+        Wörter des Index, die zu word passen → Punkte.
+        """
+        grams = trigrams(word)
+
+        if len(word) < FUZZY_MIN_LENGTH:
+            # Kurze Wörter nur als Präfix: alle Trigramme gemeinsam
+            found = set.intersection(*(self._grams.get(g, set()) for g in grams))
+            return {t: self._prefix_score(word, t) for t in found if t.startswith(word)}
+
+        counts = {}
+        for gram in grams:
+            for term in self._grams.get(gram, ()):
+                counts[term] = counts.get(term, 0) + 1
+
+        needed = len(grams) * MIN_SIMILARITY
+        found = {}
+
+        for term, shared in counts.items():
+            if shared < needed:
+                continue
+            if term.startswith(word):
+                found[term] = self._prefix_score(word, term)
+            else:
+                found[term] = SCORE_FUZZY * shared / len(grams)
+
+        return found
+
+    def _scores(self, matching: dict, enough: int = None, within: set = None) -> dict:
+        """
+        {schlüssel: punkte} über die Postings der passenden Wörter; jede
+        Zeile zählt mit ihrem besten Wort. Mit enough wird abgebrochen,
+        sobald so viele Zeilen bessere Punkte haben als alle übrigen;
+        within beschränkt auf diese Zeilen.
+        """
+        # Gleiche Punkte → ein Aufruf für die Vereinigung aller Postings
+        tiers = {}
+        for term, score in matching.items():
+            tiers.setdefault(score, []).append(self._postings[term])
+
+        best = {}
+        for score in sorted(tiers, reverse=True):
+            if enough is not None and len(best) >= enough:
+                break
+            found = set().union(*tiers[score])
+            if within is not None:
+                found &= within
+            found.difference_update(best)
+            best.update(dict.fromkeys(found, score))
+
+        return best
+
+    def search(self, words: list, limit: int) -> list:
+        """
+        Die limit besten Zeilen, in denen jedes Wort passt:
+        [(punkte, position, id, zeile), ...]. Gleiche Punkte stehen nach
+        Position; gibt es mehr als limit davon, ist die Auswahl beliebig.
+        """
+        with self._lock:
+            matches = [self._matching_terms(word) for word in words]
+            if not all(matches):
+                return []
+
+            # Seltenstes Suchwort zuerst, die übrigen schränken nur noch ein
+            matches.sort(key=lambda m: sum(map(len, map(self._postings.__getitem__, m))))
+
+            result = self._scores(matches[0], limit if len(matches) == 1 else None)
+
+            for matching in matches[1:]:
+                best = self._scores(matching, within=set(result))
+                result = {key: result[key] + score for key, score in best.items()}
+                if not result:
+                    return []
+
+            if self._positions is None:
+                self._positions = dict(zip(self._keys, range(len(self._keys))))
+
+            top = heapq.nlargest(limit, result.items(), key=operator.itemgetter(1))
+            ranked = sorted((-score, self._positions[key]) for key, score in top)
+            return [
+                (
+                    -score,
+                    position,
+                    self.ids[position] if position < len(self.ids) else None,
+                    self.rows[position],
+                )
+                for score, position in ranked
+            ]
+
+
+class MasterDataSearch:
+    """
+    Suchindizes aller Stammdaten-Stores, nach Ressourcenname.
+    """
+
+    def __init__(self):
+        self.indexes = {}
+
+    def add(self, resource: str, path: str, columns: tuple):
+        self.indexes[resource] = SearchIndex(path, columns)
+
+    @staticmethod
+    def _sync(index: SearchIndex):
+        # Zeilen und IDs unter der Sperre des Stores lesen, damit sie
+        # zusammenpassen; zerlegt wird danach ohne Sperre
+        with store_lock(index.path):
+            rows, ids = load_json(index.path), load_ids(index.path)
+        index.sync(rows, ids)
+
+    def on_change(self, resource: str, event: dict):
+        """
+        Listener für storage.add_change_listener. Läuft noch unter der
+        Sperre des Stores; load_json trifft den gerade geschriebenen Stand
+        im Cache.
+        """
+        index = self.indexes.get(resource)
+        if index is not None:
+            self._sync(index)
+
+    def sync_all(self):
+        for index in self.indexes.values():
+            self._sync(index)
+
+    def search(self, query: str, resources: list, limit: int) -> list:
+        """
+        Die limit besten Treffer über alle resources, absteigend nach
+        Punkten (bei Gleichstand in der Reihenfolge von resources).
+        """
+        words = terms(query)
+        if not words:
+            return []
+
+        found = []
+        for order, resource in enumerate(resources):
+            index = self.indexes[resource]
+            # Nur nötig, wenn ein anderer Prozess geschrieben hat
+            self._sync(index)
+
+            for score, position, row_id, row in index.search(words, limit):
+                found.append((-score, order, position, {
+                    "typ": resource,
+                    "index": position,
+                    "id": row_id,
+                    "punkte": round(score, 3),
+                    "eintrag": row,
+                }))
+
+        return [hit for *_, hit in heapq.nsmallest(limit, found, key=lambda f: f[:3])]
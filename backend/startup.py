@@ -0,0 +1,65 @@
+import gc
+import glob
+import importlib
+import os
+import time
+
+from backend.storage import encoded_json, etag_json, load_json, watched_paths
+
+
+# ======================================================
+# PRELOAD IM GUNICORN-MASTER (VOR DEM FORK)
+# ======================================================
+#
+# gunicorn.conf.py ruft preload(main) im Master auf, nachdem die App
+# geladen ist und bevor die Worker geforkt werden:
+#
+#   1. die sonst erst beim ersten Gebrauch geladenen Module (ReportLab,
+#      numpy – main.LAZY_MODULES) importieren
+#   2. alle Stores und data/*.json parsen, ETag und kodierte GET-Antwort
+#      berechnen (Dokument-Cache, siehe storage.py)
+#   3. den Index der Kalenderwochen und den Suchindex (main.suche) laden
+#   4. gc.freeze(): alles bisher Erzeugte aus der Garbage Collection
+#      nehmen, damit deren Läufe in den Workern die geteilten Seiten
+#      nicht anfassen (copy-on-write bliebe sonst nicht lange geteilt)
+#
+# Die Worker starten damit ohne Import- und Parse-Arbeit und teilen die
+# Seiten des Masters, solange sie die Daten nicht ändern. Der Cache
+# prüft weiterhin Inode/mtime/Größe: was sich nach dem Fork ändert, lädt
+# jeder Worker selbst neu.
+#
+# Pools, SQLite-Verbindungen und Sperren sind fork-fest (executors.py,
+# storage_sqlite.py, StoreLock hält keine Datei über den Aufruf hinaus).
+
+
+def preload(main) -> dict:
+    """
+    Wärmt Module und Caches im aktuellen Prozess. main ist backend.main.
+    Liefert eine kurze Statistik fürs Log.
+    """
+    start = time.perf_counter()
+
+    for name in main.LAZY_MODULES:
+        importlib.import_module(name)
+
+    paths = set(watched_paths())
+    paths.update(os.path.abspath(p) for p in glob.glob(os.path.join(main.DATA_DIR, "*.json")))
+
+    loaded = 0
+    for path in sorted(paths):
+        data = load_json(path)
+        etag_json(path, data)
+        encoded_json(path, data)
+        loaded += 1
+
+    weeks = len(main.kalenderwochen.index().sorted_keys)
+    main.suche.sync_all()
+
+    gc.collect()
+    gc.freeze()
+
+    return {
+        "dateien": loaded,
+        "kalenderwochen": weeks,
+        "dauer_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
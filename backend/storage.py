@@ -1,8 +1,28 @@
+import functools
+import hashlib
 import json
+import operator
 import os
 import shutil
+import tempfile
+import threading
+import time
+from itertools import compress, count, islice
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:  # Windows: nur Sperren innerhalb des Prozesses
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional, schneller als json
+    orjson = None
+
+from backend.executors import run_io
+from backend.metrics import BYTE_BUCKETS, add_collector, histogram, store_label
+
 
 # ======================================================
 # BASIS FUNKTIONEN
@@ -17,10 +37,1043 @@ def ensure_directory(path: str):
         os.makedirs(directory, exist_ok=True)
 
 
+# ======================================================
+# SERIALISIERUNG
+# ======================================================
+#
+# Alle Stores und die API-Antworten kodieren JSON über einen
+# austauschbaren Serializer:
+#
+#   GMATRIX_JSON=auto    → orjson, falls installiert, sonst json (Standard)
+#   GMATRIX_JSON=json    → immer die Standardbibliothek
+#   GMATRIX_JSON_COMPACT=1 → Dateien ohne Einrückung (etwa halbe Größe)
+#
+# Ausgabe ist immer UTF-8 (wie ensure_ascii=False).
+
+class StdlibSerializer:
+    name = "json"
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+
+class OrjsonSerializer(StdlibSerializer):
+    name = "orjson"
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            # z.B. Ganzzahlen > 64 Bit – kann nur json
+            return super().dumps(data, pretty)
+
+    def loads(self, raw):
+        # orjson.JSONDecodeError ist ein json.JSONDecodeError
+        return orjson.loads(raw)
+
+
+def create_serializer(name: str):
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+
+    if name == "json":
+        return StdlibSerializer()
+
+    if name == "orjson":
+        if orjson is None:
+            raise ValueError("orjson ist nicht installiert.")
+        return OrjsonSerializer()
+
+    raise ValueError(f"Unbekannter JSON-Serializer: {name}")
+
+
+serializer = create_serializer(os.environ.get("GMATRIX_JSON", "auto"))
+COMPACT = os.environ.get("GMATRIX_JSON_COMPACT", "") not in ("", "0")
+
+
+def encode_json(data: Any, pretty: bool = False) -> bytes:
+    return serializer.dumps(data, pretty)
+
+
+def decode_json(raw) -> Any:
+    return serializer.loads(raw)
+
+
+# ======================================================
+# DOKUMENT-CACHE
+# ======================================================
+#
+# Prozesslokaler Cache der geparsten Dokumente, Schlüssel ist der
+# absolute Pfad. Ein Eintrag gilt, solange Inode, mtime und Größe der
+# Datei unverändert sind – Änderungen anderer Prozesse (z.B. weiterer
+# gunicorn-Worker) werden so beim nächsten Lesen erkannt. Eigene
+# Schreibvorgänge über save_json aktualisieren den Cache direkt
+# (write-through).
+#
+# Die zurückgegebenen Objekte werden geteilt: Wer sie verändert, muss sie
+# anschließend mit save_json zurückschreiben.
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def _signature(stat: os.stat_result) -> tuple:
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _cache_put(path: str, signature: tuple, data: Any):
+    with _cache_lock:
+        _cache[_cache_key(path)] = (signature, data)
+
+
+def invalidate_cache(path: str = None):
+    """
+    Entfernt einen Pfad (oder ohne Argument alle Pfade) aus dem Cache.
+    """
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(_cache_key(path), None)
+
+
+def cache_stats() -> dict:
+    """
+    Liefert die Trefferzähler des Dokument-Caches.
+    """
+    with _cache_lock:
+        return {
+            "hits": _cache_stats["hits"],
+            "misses": _cache_stats["misses"],
+            "entries": len(_cache),
+        }
+
+
+def _cache_lookup(path: str, signature: tuple):
+    """
+    Liefert (True, daten) bei gültigem Cache-Eintrag, sonst (False, None).
+    Zählt Treffer und Fehlgriffe.
+    """
+    with _cache_lock:
+        entry = _cache.get(_cache_key(path))
+        if entry is not None and entry[0] == signature:
+            _cache_stats["hits"] += 1
+            return True, entry[1]
+        _cache_stats["misses"] += 1
+        return False, None
+
+
+# ======================================================
+# METRIKEN
+# ======================================================
+#
+# Jeder öffentliche Aufruf (load_json, save_json, …) wird pro Store
+# gemessen, die Datei-Engines messen zusätzlich ihre Phasen:
+#
+#   read    Datei lesen (Bytes in gmatrix_storage_bytes)
+#   decode  JSON parsen
+#   encode  JSON serialisieren
+#   write   Temp-Datei schreiben + os.replace (bzw. Log-Zeile anhängen)
+#
+# Bei SQLite umfasst read Abfrage und Parsen, write die ganze
+# Schreibtransaktion (ohne Warten auf die Sperre).
+#
+# Siehe backend/metrics.py und GET /metrics.
+
+STORAGE_SECONDS = histogram(
+    "gmatrix_storage_seconds",
+    "Dauer eines storage-Aufrufs (inkl. Sperre und Cache)",
+    ("call", "store"),
+)
+STORAGE_PHASE_SECONDS = histogram(
+    "gmatrix_storage_phase_seconds",
+    "Dauer einer Phase beim Lesen/Schreiben einer Datei",
+    ("phase", "store"),
+)
+STORAGE_BYTES = histogram(
+    "gmatrix_storage_bytes",
+    "Gelesene bzw. geschriebene Bytes pro Dateizugriff",
+    ("phase", "store"),
+    BYTE_BUCKETS,
+)
+
+
+def _timed(fn):
+    """
+    Misst einen öffentlichen Aufruf fn(path, ...) unter seinem Namen.
+    """
+    call = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(path, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(path, *args, **kwargs)
+        finally:
+            STORAGE_SECONDS.observe(time.perf_counter() - start, call, store_label(path))
+
+    return wrapper
+
+
+def observe_phase(phase: str, path: str, start: float, size: int = None):
+    """
+    Trägt die Dauer seit start (perf_counter) und optional die Bytes
+    einer Datei-Phase ein.
+    """
+    label = store_label(path)
+    STORAGE_PHASE_SECONDS.observe(time.perf_counter() - start, phase, label)
+    if size is not None:
+        STORAGE_BYTES.observe(size, phase, label)
+
+
+def _cache_metrics():
+    stats = cache_stats()
+    return [
+        ("gmatrix_storage_cache_hits_total", "counter", "Treffer im Dokument-Cache",
+         [({}, stats["hits"])]),
+        ("gmatrix_storage_cache_misses_total", "counter", "Fehlgriffe im Dokument-Cache",
+         [({}, stats["misses"])]),
+        ("gmatrix_storage_cache_entries", "gauge", "Dokumente im Cache",
+         [({}, stats["entries"])]),
+    ]
+
+
+add_collector(_cache_metrics)
+
+
+# ======================================================
+# VERSIONEN (ETAGS)
+# ======================================================
+#
+# Die ETag eines Dokuments ist der SHA-256 seines kanonischen JSON –
+# stark, engine-unabhängig und in allen Workern gleich. Berechnet wird
+# sie einmal pro geladenem Objekt (der Cache liefert bis zur nächsten
+# Änderung dasselbe).
+
+_etags: dict = {}
+
+
+class VersionConflict(Exception):
+    """Das Dokument hat nicht mehr die erwartete Version (If-Match)."""
+
+
+def document_etag(data: Any) -> str:
+    canonical = json.dumps(
+        data, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return '"' + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_json(path: str, data: Any = None) -> str:
+    """
+    ETag des aktuellen Stands. data ist optional das bereits geladene
+    Objekt, damit ETag und ausgelieferter Inhalt zusammenpassen.
+    """
+    if data is None:
+        data = load_json(path)
+
+    key = _cache_key(path)
+    cached = _etags.get(key)
+
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    etag = document_etag(data)
+    _etags[key] = (data, etag)
+    return etag
+
+
+# ------------------------------------------------------
+# Fertig kodierte Antworten
+# ------------------------------------------------------
+#
+# Unveränderte Dokumente werden nur einmal für die Auslieferung kodiert;
+# GET-Handler schicken danach dieselben Bytes, ohne die Daten erneut
+# durch den JSON-Encoder von FastAPI zu schicken.
+
+_bodies: dict = {}
+
+
+def encoded_json(path: str, data: Any = None) -> bytes:
+    """
+    Kompaktes JSON des aktuellen Stands (gemerkt pro geladenem Objekt).
+    """
+    if data is None:
+        data = load_json(path)
+
+    key = _cache_key(path)
+    cached = _bodies.get(key)
+
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    body = encode_json(data)
+    _bodies[key] = (data, body)
+    return body
+
+
+# ======================================================
+# ÄNDERUNGS-EVENTS
+# ======================================================
+#
+# Schreibzugriffe auf beobachtete Stores (watch_resource) melden den
+# Unterschied zum alten Stand an alle Listener (z.B. backend/events.py):
+#
+#   {"op": "insert", "id": 7, "item": [...]}
+#   {"op": "update", "index": 3, "id": 4, "item": [...]}
+#   {"op": "delete", "index": 3, "id": 4}
+#   {"op": "batch", "operations": [...], "ids": [...]}
+#   {"op": "replace", "etag": "..."}      → Client lädt neu
+#
+# Gemeldet wird noch unter der Store-Sperre, damit die Reihenfolge der
+# Events der Reihenfolge der Schreibvorgänge entspricht.
+
+_watched: dict = {}
+_listeners: list = []
+
+
+def watch_resource(path: str, resource: str):
+    """
+    Meldet Änderungen an path künftig als Events der Ressource resource.
+    """
+    _watched[_cache_key(path)] = resource
+
+
+def watched_paths() -> list:
+    """
+    Pfade aller mit watch_resource angemeldeten Stores.
+    """
+    return list(_watched)
+
+
+def add_change_listener(listener):
+    """
+    listener(resource, event) wird nach jeder gemeldeten Änderung aufgerufen.
+    """
+    _listeners.append(listener)
+
+
+def publish_change(resource: str, event: dict):
+    for listener in _listeners:
+        try:
+            listener(resource, event)
+        except Exception as e:
+            print("Event Fehler:", e)
+
+
+def _watched_resource(path: str):
+    return _watched.get(_cache_key(path)) if _listeners else None
+
+
+def _changing(path: str, apply, describe):
+    """
+    Führt apply(engine) aus und meldet describe(ergebnis) als Event,
+    falls path beobachtet wird.
+    """
+    engine = get_engine()
+    resource = _watched_resource(path)
+
+    if resource is None:
+        return apply(engine)
+
+    with engine._lock(path):
+        result = apply(engine)
+        publish_change(resource, describe(result))
+
+    return result
+
+
+def _diff_event(path: str, old: Any, new: Any) -> dict:
+    """
+    Gleich lange Listen → nur die geänderten Zeilen, sonst "replace".
+    """
+    etag = etag_json(path, new)
+
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        operations = [
+            {"op": "update", "index": index, "item": item}
+            for index, (before, item) in enumerate(zip(old, new))
+            if before != item
+        ]
+        return {"op": "batch", "operations": operations, "ids": [], "etag": etag}
+
+    return {"op": "replace", "etag": etag}
+
+
+# ======================================================
+# BATCH OPERATIONEN
+# ======================================================
+#
+# Ein Batch ist eine Liste von Operationen:
+#   {"op": "insert", "item": [...]}
+#   {"op": "update", "index": 3, "item": [...]}
+#   {"op": "delete", "index": 7}
+#
+# Alle Indizes beziehen sich auf den Stand VOR dem Batch – der Client
+# muss beim Löschen mehrerer Zeilen nichts verschieben. Neue Einträge
+# werden am Ende angehängt.
+
+def resolve_batch(length: int, operations: list):
+    """
+    Prüft einen Batch gegen eine Liste der Länge length.
+    Liefert (updates {index: item}, deletes {index}, inserts [item]).
+    """
+    updates = {}
+    deletes = set()
+    inserts = []
+
+    for operation in operations:
+        op = operation.get("op")
+
+        if op == "insert":
+            if "item" not in operation:
+                raise ValueError("insert ohne item.")
+            inserts.append(operation["item"])
+            continue
+
+        if op not in ("update", "delete"):
+            raise ValueError(f"Unbekannte Operation: {op}")
+
+        index = operation.get("index")
+        if not isinstance(index, int) or isinstance(index, bool):
+            raise ValueError(f"{op} ohne gültigen index.")
+
+        if not (0 <= index < length):
+            raise IndexError("Index außerhalb des Bereichs.")
+
+        if op == "update":
+            if "item" not in operation:
+                raise ValueError("update ohne item.")
+            updates[index] = operation["item"]
+        else:
+            deletes.add(index)
+
+    conflicts = deletes.intersection(updates)
+    if conflicts:
+        raise ValueError(f"Index {min(conflicts)} wird geändert und gelöscht.")
+
+    return updates, deletes, inserts
+
+
+def apply_resolved_batch(data: list, updates: dict, deletes: set, inserts: list) -> list:
+    """
+    Baut die neue Liste aus einem aufgelösten Batch (data bleibt unverändert).
+    """
+    result = [
+        updates.get(i, item)
+        for i, item in enumerate(data)
+        if i not in deletes
+    ]
+    result.extend(inserts)
+    return result
+
+
+def apply_batch(data: list, operations: list) -> list:
+    """
+    Wendet einen Batch auf eine Kopie von data an.
+    """
+    return apply_resolved_batch(data, *resolve_batch(len(data), operations))
+
+
+# ======================================================
+# SPERREN (THREADS + PROZESSE)
+# ======================================================
+#
+# Schreibvorgänge eines Stores laufen unter einer StoreLock: eine
+# RLock für die Threads des Prozesses plus fcntl.flock auf .<store>.lock
+# für die anderen gunicorn-Worker. Lesende nehmen keine Sperre – Dateien
+# werden nur atomar ersetzt (bzw. zeilenweise angehängt), ein Leser sieht
+# immer einen vollständigen Stand.
+
+class StoreLock:
+    """
+    Wiedereintrittsfähige Sperre pro Store. Die Datei-Sperre wird nur beim
+    äußersten acquire genommen und beim letzten release freigegeben.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def _lock_file(self) -> int:
+        ensure_directory(self.lock_path)
+
+        while True:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+                # Datei wurde evtl. von remove() gelöscht, während wir warteten
+                if os.fstat(fd).st_ino == os.stat(self.lock_path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            except BaseException:
+                os.close(fd)
+                raise
+
+            os.close(fd)
+
+    def acquire(self):
+        self._thread_lock.acquire()
+
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._fd = self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+
+        if self._depth == 0 and self._fd is not None:
+            fd, self._fd = self._fd, None
+            os.close(fd)  # gibt auch die flock frei
+
+        self._thread_lock.release()
+
+    def unlink(self):
+        """
+        Entfernt die Sperrdatei (nur im gesperrten Zustand aufrufen).
+        """
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# ======================================================
+# STORAGE ENGINES
+# ======================================================
+#
+# Alle Lese-/Schreibzugriffe laufen über eine austauschbare Engine.
+# Die JSON-Engine implementiert append/update/delete als
+# Lesen → Ändern → Speichern; Engines mit feingranularem Zugriff
+# (z.B. SQLite) schreiben nur die betroffenen Zeilen.
+#
+# Jede Zeile eines Listen-Stores hat zusätzlich eine stabile ID, die sich
+# beim Löschen anderer Zeilen nicht verschiebt. ids(path) liefert die IDs
+# parallel zu load(path); get/update/delete_by_id lösen sie über einen
+# Hash-Index in O(1) auf.
+#
+# Auswahl über die Umgebungsvariable GMATRIX_STORAGE:
+#   json   → eine JSON-Datei pro Store (Standard)
+#   sqlite → eingebettete SQLite-Datenbank (backend/storage_sqlite.py)
+#   log    → JSON-Snapshot plus Operations-Log (backend/storage_log.py)
+
+class StorageEngine:
+    name = "base"
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._id_index = {}
+
+    def _lock(self, path: str) -> StoreLock:
+        """
+        Sperre pro Store für Lesen → Ändern → Schreiben, über Threads und
+        Prozesse hinweg.
+        """
+        key = _cache_key(path)
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                directory, name = os.path.split(key)
+                lock = self._locks[key] = StoreLock(os.path.join(directory, "." + name + ".lock"))
+            return lock
+
+    def load(self, path: str, default: Any):
+        raise NotImplementedError
+
+    def save(self, path: str, data: Any):
+        raise NotImplementedError
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def remove(self, path: str) -> bool:
+        with self._lock(path) as lock:
+            try:
+                os.remove(path)
+                return True
+            except FileNotFoundError:
+                return False
+            finally:
+                invalidate_cache(path)
+                lock.unlink()
+
+    def append(self, path: str, item: Any) -> int:
+        raise NotImplementedError
+
+    def update(self, path: str, index: int, item: Any):
+        raise NotImplementedError
+
+    def delete(self, path: str, index: int):
+        raise NotImplementedError
+
+    def batch(self, path: str, operations: list) -> list:
+        raise NotImplementedError
+
+    # --------------------------------------------------
+    # Stabile IDs
+    # --------------------------------------------------
+
+    def ids(self, path: str) -> list:
+        raise NotImplementedError
+
+    def position(self, path: str, item_id: int) -> int:
+        """
+        Aktuelle Listenposition einer ID über einen Hash-Index, der nur
+        neu gebaut wird, wenn sich die ID-Liste geändert hat.
+        """
+        ids = self.ids(path)
+        key = _cache_key(path)
+
+        cached = self._id_index.get(key)
+        if cached is None or cached[0] is not ids:
+            cached = (ids, {value: pos for pos, value in enumerate(ids)})
+            self._id_index[key] = cached
+
+        try:
+            return cached[1][item_id]
+        except KeyError:
+            raise KeyError("ID nicht gefunden.")
+
+    def get_by_id(self, path: str, item_id: int) -> Any:
+        with self._lock(path):
+            return self.load(path, [])[self.position(path, item_id)]
+
+    def update_by_id(self, path: str, item_id: int, item: Any):
+        with self._lock(path):
+            self.update(path, self.position(path, item_id), item)
+
+    def delete_by_id(self, path: str, item_id: int):
+        with self._lock(path):
+            self.delete(path, self.position(path, item_id))
+
+    # --------------------------------------------------
+    # Lesen → Ändern → Schreiben
+    # --------------------------------------------------
+
+    def modify(self, path: str, default: Any, change, if_match=None) -> Any:
+        """
+        Wendet change(alt) → neu unter der Store-Sperre an. change darf
+        das übergebene (gecachte) Objekt nicht verändern. if_match ist
+        eine Menge erlaubter ETags des alten Stands.
+        """
+        with self._lock(path):
+            data = self.load(path, default)
+
+            if if_match is not None and etag_json(path, data) not in if_match:
+                raise VersionConflict()
+
+            data = change(data)
+            self.save(path, data)
+            return data
+
+
+def _fresh_ids(next_id: int, count: int):
+    return list(range(next_id, next_id + count)), next_id + count
+
+
+def _equal_ends(old: list, new: list) -> tuple:
+    """
+    (vorne, hinten): Anzahl gleicher Zeilen am Anfang und am Ende.
+    """
+    shorter = min(len(old), len(new))
+    front = next(compress(count(), map(operator.ne, old, new)), shorter)
+    back = next(
+        compress(count(), map(operator.ne, islice(reversed(old), shorter - front), reversed(new))),
+        shorter - front,
+    )
+    return front, back
+
+
+def kept_ids(old_keys: list, old_ids: list, new_keys: list, ascending: bool = False) -> list:
+    """
+    IDs der Zeilen nach einem vollständigen Speichern (None = neue ID).
+    Gleiche Zeilen behalten ihre ID, auch an anderer Position (sortiert);
+    übrige Zeilen bekommen die ID der Zeile, die vorher an derselben
+    Position stand und nicht woanders wieder auftaucht (dort bearbeitet).
+    Mit ascending (Reihenfolge = ID, SQLite) nur, solange die IDs
+    aufsteigen – danach bekommen alle Zeilen neue IDs.
+    """
+    # Erste Position je Inhalt, weitere gleiche Zeilen als Kette
+    first = {}
+    following = [None] * len(old_keys)
+    for position in range(len(old_keys) - 1, -1, -1):
+        key = old_keys[position]
+        following[position] = first.get(key)
+        first[key] = position
+
+    taken = []
+    for key in new_keys:
+        position = first.get(key)
+        if position is not None:
+            first[key] = following[position]
+        taken.append(position)
+
+    used = set(taken)
+    ids = []
+    for position, old in enumerate(taken):
+        if old is None and position < len(old_ids) and position not in used:
+            old = position
+        ids.append(None if old is None else old_ids[old])
+
+    if ascending:
+        last = None
+        for position, row_id in enumerate(ids):
+            if row_id is None or (last is not None and row_id <= last):
+                ids[position:] = [None] * (len(ids) - position)
+                break
+            last = row_id
+
+    return ids
+
+
+def reuse_ids(old: list, old_ids: list, new: list, next_id: int):
+    """
+    (ids, next_id) für new nach einem vollständigen Speichern, siehe kept_ids.
+    Gleicher Anfang und gleiches Ende werden ohne Kodieren übernommen.
+    """
+    front, back = _equal_ends(old, new)
+    old_end, new_end = len(old) - back, len(new) - back
+
+    middle = kept_ids(
+        [encode_json(row) for row in old[front:old_end]],
+        old_ids[front:old_end],
+        [encode_json(row) for row in new[front:new_end]],
+    )
+
+    for position, row_id in enumerate(middle):
+        if row_id is None:
+            middle[position] = next_id
+            next_id += 1
+
+    return old_ids[:front] + middle + old_ids[old_end:], next_id
+
+
+class JsonFileEngine(StorageEngine):
+    """
+    Eine JSON-Datei pro Store, atomisch ersetzt bei jedem Speichern.
+
+    Die IDs eines Listen-Stores liegen in <store>.json.ids zusammen mit der
+    Signatur der Datei, zu der sie gehören. Passt die Signatur nicht (z.B.
+    Datei von Hand geändert), werden neue IDs vergeben.
+    """
+
+    name = "json"
+
+    def load(self, path: str, default: Any):
+        if not os.path.exists(path):
+            return default
+
+        try:
+            with open(path, "rb") as f:
+                signature = _signature(os.fstat(f.fileno()))
+
+                hit, data = _cache_lookup(path, signature)
+                if hit:
+                    return data
+
+                start = time.perf_counter()
+                content = f.read()
+                observe_phase("read", path, start, len(content))
+
+                if not content.strip():
+                    return default
+
+                start = time.perf_counter()
+                data = decode_json(content)
+                observe_phase("decode", path, start)
+
+            _cache_put(path, signature, data)
+            return data
+
+        except json.JSONDecodeError:
+            # Datei ist beschädigt → Backup erstellen
+            backup_path = path + ".corrupt_backup"
+            shutil.copy(path, backup_path)
+            return default
+
+        except Exception:
+            return default
+
+    def encode(self, data: Any) -> bytes:
+        return encode_json(data, pretty=not COMPACT)
+
+    def write_atomic(self, path: str, raw: bytes) -> os.stat_result:
+        """
+        Schreibt raw über eine Temp-Datei und ersetzt das Ziel atomar.
+        """
+        ensure_directory(path)
+
+        # Eindeutiger Name – parallele Schreiber teilen sich keine Temp-Datei
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".",
+            prefix=os.path.basename(path) + ".",
+            suffix=".tmp",
+        )
+
+        start = time.perf_counter()
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            os.chmod(temp_path, 0o644)
+
+            # Atomarer Replace
+            os.replace(temp_path, path)
+            observe_phase("write", path, start, len(raw))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        return os.stat(path)
+
+    def save_document(self, path: str, data: Any) -> os.stat_result:
+        """
+        Schreibt ein Dokument ohne ID-Verwaltung.
+        """
+        try:
+            start = time.perf_counter()
+            raw = self.encode(data)
+            observe_phase("encode", path, start)
+
+            stat = self.write_atomic(path, raw)
+        except Exception:
+            # Aufrufer hat das gecachte Objekt evtl. schon verändert
+            invalidate_cache(path)
+            raise
+
+        # Write-through: neuer Stand direkt in den Cache
+        _cache_put(path, _signature(stat), data)
+        return stat
+
+    # --------------------------------------------------
+    # IDs (Sidecar-Datei)
+    # --------------------------------------------------
+
+    def _ids_path(self, path: str) -> str:
+        return path + ".ids"
+
+    def _id_state(self, path: str, data: list):
+        """
+        Liefert (ids, next_id, gültig) passend zu data.
+        """
+        meta = self.load(self._ids_path(path), {})
+
+        try:
+            signature = list(_signature(os.stat(path)))
+        except FileNotFoundError:
+            signature = None
+
+        ids = meta.get("ids") if isinstance(meta, dict) else None
+        next_id = meta.get("next", 1) if isinstance(meta, dict) else 1
+
+        base = meta.get("base") if isinstance(meta, dict) else None
+
+        if base == signature and isinstance(ids, list) and len(ids) == len(data):
+            return ids, next_id, True
+
+        ids, next_id = _fresh_ids(next_id, len(data))
+        return ids, next_id, False
+
+    def _commit(self, path: str, data: list, ids: list, next_id: int):
+        stat = self.save_document(path, data)
+        self.save_document(
+            self._ids_path(path),
+            {"base": list(_signature(stat)), "next": next_id, "ids": ids},
+        )
+
+    def _load_list(self, path: str) -> list:
+        data = self.load(path, [])
+
+        if not isinstance(data, list):
+            raise ValueError("JSON ist keine Liste.")
+
+        return data
+
+    def ids(self, path: str) -> list:
+        with self._lock(path):
+            data = self.load(path, [])
+            if not isinstance(data, list):
+                return []
+
+            ids, next_id, valid = self._id_state(path, data)
+            if not valid and os.path.exists(path):
+                # Erstmals vergeben → festschreiben, damit sie stabil bleiben
+                self.save_document(
+                    self._ids_path(path),
+                    {"base": list(_signature(os.stat(path))), "next": next_id, "ids": ids},
+                )
+                ids = self.load(self._ids_path(path), {}).get("ids", ids)
+
+            return ids
+
+    # --------------------------------------------------
+    # Schreiben
+    # --------------------------------------------------
+
+    def save(self, path: str, data: Any):
+        with self._lock(path):
+            # IDs nur pflegen, wenn sie schon einmal vergeben wurden
+            if not isinstance(data, list) or not os.path.exists(self._ids_path(path)):
+                self.save_document(path, data)
+                return
+
+            old = self.load(path, [])
+            old = old if isinstance(old, list) else []
+            ids, next_id, _ = self._id_state(path, old)
+
+            ids, next_id = reuse_ids(old, ids, data, next_id)
+            self._commit(path, data, ids, next_id)
+
+    def append(self, path: str, item: Any) -> int:
+        with self._lock(path):
+            data = self.load(path, [])
+            if not isinstance(data, list):
+                data = []
+
+            ids, next_id, _ = self._id_state(path, data)
+            self._commit(path, data + [item], ids + [next_id], next_id + 1)
+            return next_id
+
+    def update(self, path: str, index: int, item: Any):
+        with self._lock(path):
+            data = self._load_list(path)
+
+            if not (0 <= index < len(data)):
+                raise IndexError("Index außerhalb des Bereichs.")
+
+            ids, next_id, _ = self._id_state(path, data)
+
+            data = list(data)
+            data[index] = item
+            self._commit(path, data, ids, next_id)
+
+    def delete(self, path: str, index: int):
+        with self._lock(path):
+            data = self._load_list(path)
+
+            if not (0 <= index < len(data)):
+                raise IndexError("Index außerhalb des Bereichs.")
+
+            ids, next_id, _ = self._id_state(path, data)
+
+            self._commit(
+                path,
+                data[:index] + data[index + 1:],
+                ids[:index] + ids[index + 1:],
+                next_id,
+            )
+
+    def batch(self, path: str, operations: list) -> list:
+        with self._lock(path):
+            data = self._load_list(path)
+            updates, deletes, inserts = resolve_batch(len(data), operations)
+
+            ids, next_id, _ = self._id_state(path, data)
+            new_ids, next_id = _fresh_ids(next_id, len(inserts))
+
+            self._commit(
+                path,
+                apply_resolved_batch(data, updates, deletes, inserts),
+                apply_resolved_batch(ids, {}, deletes, new_ids),
+                next_id,
+            )
+            return new_ids
+
+    def remove(self, path: str) -> bool:
+        with self._lock(path):
+            try:
+                os.remove(self._ids_path(path))
+            except FileNotFoundError:
+                pass
+            invalidate_cache(self._ids_path(path))
+            return super().remove(path)
+
+
+_engine: StorageEngine = None
+_engine_lock = threading.Lock()
+
+
+def create_engine(name: str) -> StorageEngine:
+    """
+    Erzeugt eine Engine anhand ihres Namens.
+    """
+    if name == "json":
+        return JsonFileEngine()
+
+    if name == "sqlite":
+        from backend.storage_sqlite import SQLiteEngine
+        return SQLiteEngine()
+
+    if name == "log":
+        from backend.storage_log import LogEngine
+        return LogEngine()
+
+    raise ValueError(f"Unbekannte Storage Engine: {name}")
+
+
+def get_engine() -> StorageEngine:
+    """
+    Liefert die aktive Engine (beim ersten Aufruf aus GMATRIX_STORAGE).
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(os.environ.get("GMATRIX_STORAGE", "json"))
+
+    return _engine
+
+
+def set_engine(engine: StorageEngine):
+    """
+    Setzt die aktive Engine (z.B. für Importe oder Tests).
+    """
+    global _engine
+
+    with _engine_lock:
+        _engine = engine
+    invalidate_cache()
+
+
 # ======================================================
 # JSON LADEN
 # ======================================================
 
+@_timed
 def load_json(path: str, default: Any = None):
     """
     Lädt eine JSON-Datei sicher.
@@ -28,104 +1081,176 @@ def load_json(path: str, default: Any = None):
     - Wenn Datei nicht existiert → default oder []
     - Wenn Datei leer ist → default oder []
     - Wenn Datei korrupt ist → Backup wird erstellt
+    - Unveränderte Dateien kommen aus dem Dokument-Cache
     """
 
     if default is None:
         default = []
 
-    if not os.path.exists(path):
-        return default
-
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            if not content:
-                return default
-            return json.loads(content)
-
-    except json.JSONDecodeError:
-        # Datei ist beschädigt → Backup erstellen
-        backup_path = path + ".corrupt_backup"
-        shutil.copy(path, backup_path)
-        return default
-
-    except Exception:
-        return default
+    return get_engine().load(path, default)
 
 
 # ======================================================
 # JSON SPEICHERN (ATOMISCH)
 # ======================================================
 
+@_timed
 def save_json(path: str, data: Any):
     """
     Speichert JSON atomisch (keine kaputten Dateien bei Absturz).
     """
+    old = None
 
-    ensure_directory(path)
-
-    temp_path = path + ".tmp"
+    def apply(engine):
+        nonlocal old
+        old = engine.load(path, None)
+        engine.save(path, data)
 
-    with open(temp_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    if _watched_resource(path) is None:
+        get_engine().save(path, data)
+        return
 
-    # Atomarer Replace
-    os.replace(temp_path, path)
+    _changing(path, apply, lambda _: _diff_event(path, old, data))
 
 
 # ======================================================
 # APPEND
 # ======================================================
 
-def append_json(path: str, item: Any):
+@_timed
+def append_json(path: str, item: Any) -> int:
     """
     Fügt einen Eintrag zu einer JSON-Liste hinzu.
+    Liefert die stabile ID des neuen Eintrags.
     """
-    data = load_json(path, default=[])
-    if not isinstance(data, list):
-        data = []
-    data.append(item)
-    save_json(path, data)
+    return _changing(
+        path,
+        lambda engine: engine.append(path, item),
+        lambda new_id: {"op": "insert", "id": new_id, "item": item},
+    )
 
 
 # ======================================================
 # UPDATE BY INDEX
 # ======================================================
 
+@_timed
 def update_json_index(path: str, index: int, item: Any):
     """
     Aktualisiert einen Eintrag in einer JSON-Liste anhand des Index.
     """
-    data = load_json(path, default=[])
-
-    if not isinstance(data, list):
-        raise ValueError("JSON ist keine Liste.")
-
-    if not (0 <= index < len(data)):
-        raise IndexError("Index außerhalb des Bereichs.")
-
-    data[index] = item
-    save_json(path, data)
+    _changing(
+        path,
+        lambda engine: engine.update(path, index, item),
+        lambda _: {"op": "update", "index": index, "item": item},
+    )
 
 
 # ======================================================
 # DELETE BY INDEX
 # ======================================================
 
+@_timed
 def delete_json_index(path: str, index: int):
     """
     Löscht einen Eintrag anhand des Index.
     """
-    data = load_json(path, default=[])
+    _changing(
+        path,
+        lambda engine: engine.delete(path, index),
+        lambda _: {"op": "delete", "index": index},
+    )
+
+
+# ======================================================
+# ZUGRIFF ÜBER STABILE ID
+# ======================================================
+
+@_timed
+def load_ids(path: str) -> list:
+    """
+    IDs der Einträge einer JSON-Liste, parallel zu load_json(path).
+    """
+    return get_engine().ids(path)
+
+
+@_timed
+def get_json_id(path: str, item_id: int) -> Any:
+    """
+    Liefert einen Eintrag anhand seiner ID (KeyError, wenn unbekannt).
+    """
+    return get_engine().get_by_id(path, item_id)
+
+
+@_timed
+def update_json_id(path: str, item_id: int, item: Any):
+    """
+    Aktualisiert einen Eintrag anhand seiner ID.
+    """
+    def apply(engine):
+        index = engine.position(path, item_id)
+        engine.update_by_id(path, item_id, item)
+        return index
+
+    _changing(
+        path,
+        apply,
+        lambda index: {"op": "update", "index": index, "id": item_id, "item": item},
+    )
+
+
+@_timed
+def delete_json_id(path: str, item_id: int):
+    """
+    Löscht einen Eintrag anhand seiner ID.
+    """
+    def apply(engine):
+        index = engine.position(path, item_id)
+        engine.delete_by_id(path, item_id)
+        return index
+
+    _changing(
+        path,
+        apply,
+        lambda index: {"op": "delete", "index": index, "id": item_id},
+    )
+
 
-    if not isinstance(data, list):
-        raise ValueError("JSON ist keine Liste.")
+# ======================================================
+# BATCH
+# ======================================================
+
+@_timed
+def batch_json(path: str, operations: list) -> dict:
+    """
+    Wendet mehrere insert/update/delete-Operationen atomar an
+    (ein Lesen, ein Schreiben). Liefert die Anzahl tatsächlich
+    geänderter Zeilen je Operation und die IDs der neuen Einträge.
+    """
+    # Erst hier statt in resolve_batch prüfen – ältere Logs mit
+    # null-Einträgen müssen sich weiter abspielen lassen
+    for operation in operations:
+        if operation.get("op") in ("insert", "update") and operation.get("item") is None:
+            raise ValueError(f"{operation['op']} ohne item.")
+
+    new_ids = _changing(
+        path,
+        lambda engine: engine.batch(path, operations),
+        lambda ids: {"op": "batch", "operations": operations, "ids": ids},
+    )
 
-    if not (0 <= index < len(data)):
-        raise IndexError("Index außerhalb des Bereichs.")
+    # Mehrfache update/delete auf denselben Index wirken nur einmal
+    touched = {"update": set(), "delete": set()}
+    for operation in operations:
+        if operation["op"] in touched:
+            touched[operation["op"]].add(operation["index"])
 
-    data.pop(index)
-    save_json(path, data)
+    return {
+        "inserted": len(new_ids),
+        "updated": len(touched["update"]),
+        "deleted": len(touched["delete"]),
+        "ids": new_ids,
+    }
 
 
 # ======================================================
@@ -144,7 +1269,31 @@ def clear_json(path: str):
 # ======================================================
 
 def file_exists(path: str) -> bool:
-    return os.path.exists(path)
+    return get_engine().exists(path)
+
+
+def store_lock(path: str) -> StoreLock:
+    """
+    Sperre eines Stores für eigene Lesen → Ändern → Schreiben-Abläufe
+    über mehrere Dateien (z.B. Kalenderwochen).
+    """
+    return get_engine()._lock(path)
+
+
+# ======================================================
+# REMOVE
+# ======================================================
+
+@_timed
+def remove_json(path: str) -> bool:
+    """
+    Entfernt einen Store vollständig. Liefert False, wenn er nicht existierte.
+    """
+    return _changing(
+        path,
+        lambda engine: engine.remove(path),
+        lambda _: {"op": "replace", "etag": None},
+    )
 
 
 # ======================================================
@@ -155,10 +1304,110 @@ def merge_json_dict(path: str, new_data: dict):
     """
     Merged ein Dictionary in bestehende JSON-Datei.
     """
-    data = load_json(path, default={})
+    def change(data):
+        return {**(data if isinstance(data, dict) else {}), **new_data}
+
+    modify_json(path, change, default={})
+
+
+# ======================================================
+# LESEN → ÄNDERN → SCHREIBEN
+# ======================================================
+
+@_timed
+def modify_json(
+    path: str, change, default: Any = None, if_match=None, event: dict = None
+) -> Any:
+    """
+    Atomares Lesen → change(daten) → Schreiben. change liefert das neue
+    Dokument und darf das alte nicht verändern. Mit if_match (Menge von
+    ETags) wird VersionConflict geworfen, wenn sich das Dokument
+    inzwischen geändert hat. Liefert das neue Dokument.
+
+    event beschreibt die Änderung für Listener (sonst wird der
+    Unterschied zum alten Stand gemeldet).
+    """
+    if default is None:
+        default = []
+
+    if _watched_resource(path) is None:
+        return get_engine().modify(path, default, change, if_match)
+
+    old = None
+
+    def remember(data):
+        nonlocal old
+        old = data
+        return change(data)
+
+    def describe(new):
+        if event is None:
+            return _diff_event(path, old, new)
+        return {**event, "etag": etag_json(path, new)}
+
+    return _changing(
+        path,
+        lambda engine: engine.modify(path, default, remember, if_match),
+        describe,
+    )
+
+
+# ======================================================
+# ASYNC API
+# ======================================================
+#
+# Für async-Handler: dieselben Operationen, ausgeführt im begrenzten
+# IO-Pool (backend/executors.py) statt im Event-Loop.
+
+async def aload_json(path: str, default: Any = None):
+    return await run_io(load_json, path, default)
+
+
+async def asave_json(path: str, data: Any):
+    await run_io(save_json, path, data)
+
+
+async def aappend_json(path: str, item: Any) -> int:
+    return await run_io(append_json, path, item)
+
+
+async def aupdate_json_index(path: str, index: int, item: Any):
+    await run_io(update_json_index, path, index, item)
+
+
+async def adelete_json_index(path: str, index: int):
+    await run_io(delete_json_index, path, index)
+
+
+async def abatch_json(path: str, operations: list) -> dict:
+    return await run_io(batch_json, path, operations)
+
+
+async def aload_ids(path: str) -> list:
+    return await run_io(load_ids, path)
+
+
+async def aget_json_id(path: str, item_id: int) -> Any:
+    return await run_io(get_json_id, path, item_id)
+
+
+async def aupdate_json_id(path: str, item_id: int, item: Any):
+    await run_io(update_json_id, path, item_id, item)
+
+
+async def adelete_json_id(path: str, item_id: int):
+    await run_io(delete_json_id, path, item_id)
+
+
+async def amodify_json(
+    path: str, change, default: Any = None, if_match=None, event: dict = None
+) -> Any:
+    return await run_io(modify_json, path, change, default, if_match, event)
+
+
+async def aetag_json(path: str, data: Any = None) -> str:
+    return await run_io(etag_json, path, data)
 
-    if not isinstance(data, dict):
-        data = {}
 
-    data.update(new_data)
-    save_json(path, data)
+async def aencoded_json(path: str, data: Any = None) -> bytes:
+    return await run_io(encoded_json, path, data)
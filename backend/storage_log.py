@@ -0,0 +1,510 @@
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from typing import Any
+
+from backend.storage import (
+    JsonFileEngine,
+    _cache_lookup,
+    _cache_put,
+    _cache_key,
+    _fresh_ids,
+    _signature,
+    apply_resolved_batch,
+    decode_json,
+    encode_json,
+    invalidate_cache,
+    observe_phase,
+    resolve_batch,
+    reuse_ids,
+)
+
+
+# ======================================================
+# LOG-STRUKTURIERTE ENGINE
+# ======================================================
+#
+# Der Store besteht aus dem bisherigen JSON-Snapshot (z.B.
+# data/mitarbeiter.json, unverändertes Format) und einem Operations-Log
+# daneben (data/mitarbeiter.json.log, eine JSON-Zeile pro Operation):
+#
+#   {"base": 123456789}                      ← Kopfzeile: CRC32 des Snapshots
+#   {"op": "append", "item": [...], "id": 42}
+#   {"op": "update", "index": 3, "item": [...]}
+#   {"op": "delete", "index": 7}
+#   {"op": "batch", "operations": [...], "ids": [43, 44]}
+#
+# Die stabilen IDs des Snapshots liegen in <store>.json.ids (ebenfalls
+# mit der CRC des Snapshots); neue IDs stehen direkt im Log-Eintrag.
+#
+# append/update/delete/batch hängen nur eine Zeile an. Laden = Snapshot plus
+# Replay des Logs; bereits bekannte Stände werden nur um das neue Log-Ende
+# ergänzt. Überschreitet das Log GMATRIX_LOG_COMPACT_BYTES, faltet ein
+# Hintergrund-Thread es in einen neuen Snapshot und entfernt es.
+#
+# Die Kopfzeile bindet das Log an genau einen Snapshot: Stürzt die
+# Kompaktierung zwischen Snapshot-Replace und Log-Löschen ab, passt die
+# CRC nicht mehr und das alte Log wird ignoriert statt doppelt angewendet.
+
+COMPACT_BYTES = int(os.environ.get("GMATRIX_LOG_COMPACT_BYTES", 256 * 1024))
+
+
+class _LogState:
+    """
+    Bekannter Stand eines Stores: Snapshot-Signatur, dessen CRC und IDs,
+    das gültige Log (Inode + gelesener Offset, None ohne gültiges Log),
+    die zuletzt gesehene Log-Datei und die daraus gebauten Daten samt IDs.
+    """
+
+    __slots__ = (
+        "snapshot", "crc", "base_ids", "log_ino", "offset", "seen",
+        "data", "ids", "next_id",
+    )
+
+    def __init__(self, snapshot, crc, base_ids, log_ino, offset, rows, seen=None):
+        self.snapshot = snapshot
+        self.crc = crc
+        self.base_ids = base_ids
+        self.log_ino = log_ino
+        self.offset = offset
+        self.data, self.ids, self.next_id = rows
+
+        if seen is None and log_ino is not None:
+            seen = (log_ino, offset)
+        self.seen = seen
+
+    def cache_signature(self) -> tuple:
+        return ("log", self.snapshot, self.seen)
+
+
+def _apply(rows: tuple, record: dict) -> tuple:
+    """
+    Wendet einen Log-Eintrag auf (daten, ids, next_id) an.
+    """
+    data, ids, next_id = rows
+    op = record.get("op")
+
+    if op == "append":
+        new_id = record.get("id", next_id)
+        data.append(record["item"])
+        ids.append(new_id)
+        next_id = max(next_id, new_id + 1)
+
+    elif op == "update":
+        data[record["index"]] = record["item"]
+
+    elif op == "delete":
+        data.pop(record["index"])
+        ids.pop(record["index"])
+
+    elif op == "batch":
+        updates, deletes, inserts = resolve_batch(len(data), record["operations"])
+        new_ids = record.get("ids") or _fresh_ids(next_id, len(inserts))[0]
+        data = apply_resolved_batch(data, updates, deletes, inserts)
+        ids = apply_resolved_batch(ids, {}, deletes, new_ids)
+        next_id = max([next_id] + [i + 1 for i in new_ids])
+
+    return data, ids, next_id
+
+
+def _copy_rows(state, index: int = None) -> tuple:
+    """
+    Kopie von (daten, ids, next_id) für eine Schreiboperation; prüft
+    optional den Index.
+    """
+    current = state.data if state.data is not None else []
+
+    if index is not None:
+        if not isinstance(current, list):
+            raise ValueError("JSON ist keine Liste.")
+
+        if not (0 <= index < len(current)):
+            raise IndexError("Index außerhalb des Bereichs.")
+
+    if not isinstance(current, list):
+        # Wie bei JSON: kein Listen-Store → neu als Liste beginnen
+        return [], [], state.next_id
+
+    return list(current), list(state.ids), state.next_id
+
+
+class LogEngine(JsonFileEngine):
+    """
+    JSON-Snapshot plus angehängtes Operations-Log pro Listen-Store.
+    """
+
+    name = "log"
+
+    def __init__(self, compact_bytes: int = COMPACT_BYTES):
+        super().__init__()
+        self.compact_bytes = compact_bytes
+        self._states = {}
+        self._compacting = set()
+
+    # --------------------------------------------------
+    # Lesen
+    # --------------------------------------------------
+
+    def _read_log(self, log_path: str, offset: int, base_crc, rows: tuple):
+        """
+        Liest das Log ab offset und wendet alle vollständigen Zeilen auf
+        rows (daten, ids, next_id) an. Liefert (inode, neuer_offset, rows)
+        oder None, wenn das Log nicht zum Snapshot passt.
+        """
+        try:
+            f = open(log_path, "rb")
+        except FileNotFoundError:
+            return None
+
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            start = time.perf_counter()
+            chunk = f.read()
+            observe_phase("read", log_path, start, len(chunk))
+
+        # Nur abgeschlossene Zeilen – eine halbe Zeile schreibt evtl. gerade
+        # ein anderer Prozess
+        end = chunk.rfind(b"\n") + 1
+        lines = chunk[:end].split(b"\n")[:-1]
+
+        consumed = 0
+
+        if offset == 0:
+            if not lines:
+                return None
+            try:
+                header = decode_json(lines[0])
+            except ValueError:
+                return None
+            if header.get("base") != base_crc:
+                return None
+            consumed = len(lines[0]) + 1
+            lines = lines[1:]
+
+        for line in lines:
+            try:
+                record = decode_json(line)
+                rows = _apply(rows, record)
+            except (ValueError, KeyError, IndexError):
+                # Defekter Rest (z.B. nach Absturz) → hier aufhören
+                break
+            consumed += len(line) + 1
+
+        return ino, offset + consumed, rows
+
+    def _snapshot_ids(self, path: str, crc, data) -> tuple:
+        """
+        IDs des Snapshots aus der Sidecar-Datei: (ids, next_id, gespeichert).
+        Fehlt sie oder passt die CRC nicht, werden sie neu vergeben.
+        """
+        meta = JsonFileEngine.load(self, self._ids_path(path), {})
+        length = len(data) if isinstance(data, list) else 0
+
+        if not isinstance(meta, dict):
+            meta = {}
+
+        ids = meta.get("ids")
+        if meta.get("base") == crc and isinstance(ids, list) and len(ids) == length:
+            return ids, meta.get("next", 1), True
+
+        ids, next_id = _fresh_ids(meta.get("next", 1), length)
+        return ids, next_id, False
+
+    def _read_snapshot(self, path: str):
+        """
+        Liefert (signatur, crc, daten) des Snapshots; daten ist None bei
+        fehlender, leerer oder korrupter Datei.
+        """
+        try:
+            with open(path, "rb") as f:
+                signature = _signature(os.fstat(f.fileno()))
+                start = time.perf_counter()
+                raw = f.read()
+                observe_phase("read", path, start, len(raw))
+        except FileNotFoundError:
+            return None, None, None
+
+        crc = zlib.crc32(raw)
+
+        if not raw.strip():
+            return signature, crc, None
+
+        try:
+            start = time.perf_counter()
+            data = decode_json(raw)
+            observe_phase("decode", path, start)
+            return signature, crc, data
+        except json.JSONDecodeError:
+            # Datei ist beschädigt → Backup erstellen
+            shutil.copy(path, path + ".corrupt_backup")
+            return signature, crc, None
+
+    def _state(self, path: str) -> _LogState:
+        key = _cache_key(path)
+        log_path = path + ".log"
+
+        try:
+            snapshot = _signature(os.stat(path))
+        except FileNotFoundError:
+            snapshot = None
+
+        try:
+            log_stat = os.stat(log_path)
+        except FileNotFoundError:
+            log_stat = None
+
+        seen = (log_stat.st_ino, log_stat.st_size) if log_stat else None
+        state = self._states.get(key)
+
+        hit, _ = _cache_lookup(path, ("log", snapshot, seen))
+        if hit and state is not None and state.cache_signature() == ("log", snapshot, seen):
+            return state
+
+        if (
+            state is not None
+            and state.snapshot == snapshot
+            and log_stat is not None
+            and log_stat.st_ino == state.log_ino
+            and log_stat.st_size > state.offset
+        ):
+            # Nur das neue Log-Ende nachspielen
+            result = self._read_log(
+                log_path, state.offset, state.crc,
+                (list(state.data), list(state.ids), state.next_id),
+            )
+            if result is not None:
+                ino, offset, rows = result
+                return self._remember(
+                    path, _LogState(snapshot, state.crc, state.base_ids, ino, offset, rows)
+                )
+
+        # Vollständig neu laden: Snapshot + komplettes Log
+        snapshot, crc, data = self._read_snapshot(path)
+        base_ids = self._snapshot_ids(path, crc, data)
+        base = data if isinstance(data, list) else []
+
+        result = self._read_log(
+            log_path, 0, crc, (list(base), list(base_ids[0]), base_ids[1])
+        )
+
+        if result is None:
+            # Kein oder veraltetes Log – trotzdem merken, was gesehen wurde
+            rows = (data, base_ids[0], base_ids[1])
+            state = _LogState(snapshot, crc, base_ids, None, 0, rows, seen)
+        else:
+            ino, offset, rows = result
+            state = _LogState(snapshot, crc, base_ids, ino, offset, rows)
+
+        return self._remember(path, state)
+
+    def _remember(self, path: str, state: _LogState) -> _LogState:
+        self._states[_cache_key(path)] = state
+        _cache_put(path, state.cache_signature(), state.data)
+        return state
+
+    def load(self, path: str, default: Any):
+        try:
+            data = self._state(path).data
+        except Exception:
+            return default
+
+        return default if data is None else data
+
+    def ids(self, path: str) -> list:
+        with self._lock(path):
+            state = self._state(path)
+
+            if not isinstance(state.data, list):
+                return []
+
+            ids, next_id, stored = state.base_ids
+            if not stored and state.log_ino is None and state.crc is not None:
+                # Erstmals vergeben → festschreiben, damit sie stabil bleiben
+                self.save_document(
+                    self._ids_path(path),
+                    {"base": state.crc, "next": next_id, "ids": ids},
+                )
+                state.base_ids = (ids, next_id, True)
+
+            return state.ids
+
+    # --------------------------------------------------
+    # Schreiben
+    # --------------------------------------------------
+
+    def _log(self, path: str, build):
+        """
+        Hängt die von build(state) gelieferte Operation ans Log an.
+        build liefert (record, (daten, ids, next_id)) und prüft den Index.
+        """
+        log_path = path + ".log"
+
+        with self._lock(path):
+            state = self._state(path)
+            record, rows = build(state)
+            line = encode_json(record) + b"\n"
+            start = time.perf_counter()
+
+            if state.log_ino is None:
+                # Neues (oder veraltetes) Log ersetzen, Kopfzeile zuerst
+                header = encode_json({"base": state.crc}) + b"\n"
+                with open(log_path, "wb") as f:
+                    f.write(header + line)
+                    expected = len(header) + len(line)
+                    ino = os.fstat(f.fileno()).st_ino
+            else:
+                with open(log_path, "ab") as f:
+                    f.write(line)
+                    expected = state.offset + len(line)
+                    ino = os.fstat(f.fileno()).st_ino
+
+            observe_phase("write", log_path, start, len(line))
+
+            size = os.stat(log_path).st_size
+
+            if size == expected and state.log_ino in (None, ino):
+                self._remember(
+                    path,
+                    _LogState(state.snapshot, state.crc, state.base_ids, ino, size, rows),
+                )
+            else:
+                # Ein anderer Prozess hat parallel geschrieben → neu lesen
+                self._states.pop(_cache_key(path), None)
+                invalidate_cache(path)
+
+        if size > self.compact_bytes:
+            self._schedule_compaction(path)
+
+        return record
+
+    def append(self, path: str, item: Any) -> int:
+        def build(state):
+            rows = _copy_rows(state)
+            record = {"op": "append", "item": item, "id": rows[2]}
+            return record, _apply(rows, record)
+
+        return self._log(path, build)["id"]
+
+    def update(self, path: str, index: int, item: Any):
+        def build(state):
+            record = {"op": "update", "index": index, "item": item}
+            return record, _apply(_copy_rows(state, index), record)
+
+        self._log(path, build)
+
+    def delete(self, path: str, index: int):
+        def build(state):
+            record = {"op": "delete", "index": index}
+            return record, _apply(_copy_rows(state, index), record)
+
+        self._log(path, build)
+
+    def batch(self, path: str, operations: list) -> list:
+        def build(state):
+            if state.data is not None and not isinstance(state.data, list):
+                raise ValueError("JSON ist keine Liste.")
+
+            rows = _copy_rows(state)
+            inserts = sum(1 for op in operations if op.get("op") == "insert")
+            record = {
+                "op": "batch",
+                "operations": operations,
+                "ids": _fresh_ids(rows[2], inserts)[0],
+            }
+            return record, _apply(rows, record)
+
+        return self._log(path, build)["ids"]
+
+    def save(self, path: str, data: Any):
+        """
+        Vollständiges Speichern schreibt einen neuen Snapshot und verwirft
+        das Log.
+        """
+        with self._lock(path):
+            state = self._state(path)
+            start = time.perf_counter()
+            raw = self.encode(data)
+            observe_phase("encode", path, start)
+            crc = zlib.crc32(raw)
+
+            old = state.data if isinstance(state.data, list) else []
+            ids, next_id = reuse_ids(
+                old, state.ids if old else [], data if isinstance(data, list) else [],
+                state.next_id,
+            )
+
+            track_ids = isinstance(data, list) and (
+                state.log_ino is not None or os.path.exists(self._ids_path(path))
+            )
+
+            try:
+                stat = self.write_atomic(path, raw)
+            except Exception:
+                self._states.pop(_cache_key(path), None)
+                invalidate_cache(path)
+                raise
+
+            if track_ids:
+                self.save_document(
+                    self._ids_path(path), {"base": crc, "next": next_id, "ids": ids}
+                )
+
+            try:
+                os.remove(path + ".log")
+            except FileNotFoundError:
+                pass
+
+            self._remember(
+                path,
+                _LogState(
+                    _signature(stat), crc, (ids, next_id, track_ids), None, 0,
+                    (data, ids, next_id),
+                ),
+            )
+
+    def remove(self, path: str) -> bool:
+        with self._lock(path):
+            self._states.pop(_cache_key(path), None)
+
+            try:
+                os.remove(path + ".log")
+            except FileNotFoundError:
+                pass
+
+            return super().remove(path)
+
+    # --------------------------------------------------
+    # Kompaktierung
+    # --------------------------------------------------
+
+    def compact(self, path: str):
+        """
+        Faltet das Log in einen neuen Snapshot.
+        """
+        with self._lock(path):
+            state = self._state(path)
+            if state.log_ino is not None:
+                self.save(path, state.data)
+
+    def _schedule_compaction(self, path: str):
+        key = _cache_key(path)
+
+        with self._locks_guard:
+            if key in self._compacting:
+                return
+            self._compacting.add(key)
+
+        def run():
+            try:
+                self.compact(path)
+            except Exception as e:
+                print("Kompaktierung fehlgeschlagen:", path, e)
+            finally:
+                with self._locks_guard:
+                    self._compacting.discard(key)
+
+        threading.Thread(target=run, name="gmatrix-compact", daemon=True).start()
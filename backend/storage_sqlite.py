@@ -0,0 +1,595 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any
+
+from backend.storage import (
+    JsonFileEngine,
+    StorageEngine,
+    VersionConflict,
+    _cache_lookup,
+    _cache_put,
+    apply_resolved_batch,
+    decode_json,
+    document_etag,
+    encode_json,
+    ensure_directory,
+    invalidate_cache,
+    kept_ids,
+    observe_phase,
+    resolve_batch,
+)
+
+
+# ======================================================
+# SQLITE ENGINE
+# ======================================================
+#
+# Jeder JSON-Store (z.B. data/mitarbeiter.json) wird zu einem Eintrag in
+# der Tabelle "stores". Listen-Stores legen ihre Zeilen einzeln in "rows"
+# ab, die Reihenfolge ergibt sich aus der aufsteigenden Zeilen-ID. Dadurch
+# schreibt append/update/delete genau eine Zeile statt der ganzen Datei.
+#
+# Die stabile ID einer Zeile ist ihre Zeilen-ID (AUTOINCREMENT, wird nie
+# wiederverwendet); Zugriffe über die ID brauchen keinen Positions-Scan.
+#
+# Jeder Schreibvorgang setzt "version" des Stores auf den nächsten Wert
+# eines datenbankweiten Zählers; der Dokument-Cache aus storage.py prüft
+# nur diese Zahl statt alle Zeilen neu zu lesen. Der Zähler läuft nie
+# zurück – auch ein gelöschter und neu angelegter Store bekommt keine
+# Version, die ein anderer Worker noch im Cache haben könnte.
+#
+# Schreibtransaktionen laufen mit BEGIN IMMEDIATE, damit parallele
+# gunicorn-Worker sich serialisieren statt Updates zu verlieren.
+#
+# Die Datenbank liegt als gmatrix.sqlite3 im Datenverzeichnis
+# (GMATRIX_DATA_DIR), GMATRIX_SQLITE_PATH überschreibt den Pfad.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+DB_FILENAME = "gmatrix.sqlite3"
+
+
+def data_dir() -> str:
+    """
+    Datenverzeichnis wie in main.py (GMATRIX_DATA_DIR). Die Datenbank
+    liegt standardmäßig darin, Store-Namen sind relativ dazu.
+    """
+    return os.path.abspath(os.environ.get("GMATRIX_DATA_DIR", DEFAULT_DATA_DIR))
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stores (
+    name    TEXT PRIMARY KEY,
+    kind    TEXT NOT NULL,
+    body    TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS rows (
+    id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    body  TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS rows_store_id ON rows (store, id);
+
+CREATE TABLE IF NOT EXISTS counter (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO counter (id, version)
+    SELECT 1, COALESCE(MAX(version), 0) FROM stores;
+"""
+
+
+def _dumps(data: Any) -> str:
+    return encode_json(data).decode("utf-8")
+
+
+class SQLiteEngine(StorageEngine):
+    """
+    Speichert alle Stores in einer SQLite-Datenbank im WAL-Modus.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = None, directory: str = None):
+        super().__init__()
+        self.directory = os.path.abspath(directory or data_dir())
+        self.db_path = os.path.abspath(
+            db_path
+            or os.environ.get("GMATRIX_SQLITE_PATH")
+            or os.path.join(self.directory, DB_FILENAME)
+        )
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+        # Verbindungen nie über fork hinweg benutzen (gunicorn preload_app):
+        # im Kind neu öffnen. Die geerbten bleiben referenziert, damit sie
+        # nicht im Kind geschlossen werden.
+        self._inherited = []
+        os.register_at_fork(after_in_child=self._forget_connections)
+
+    # --------------------------------------------------
+    # Verbindung (eine pro Thread)
+    # --------------------------------------------------
+
+    def _forget_connections(self):
+        self._inherited.append(self._local)
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        ensure_directory(self.db_path)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+
+        self._local.conn = conn
+        return conn
+
+    def store_name(self, path: str) -> str:
+        """
+        Store-Name relativ zum Datenverzeichnis, ohne .json-Endung. Pfade
+        außerhalb behalten ihren absoluten Pfad – zwei Verzeichnisse mit
+        gleichen Dateinamen teilen sich so keine Zeilen.
+        """
+        path = os.path.abspath(path)
+        name = os.path.relpath(path, self.directory)
+
+        if name == ".." or name.startswith(".." + os.sep):
+            name = path
+
+        if name.endswith(".json"):
+            name = name[:-5]
+
+        return name.replace(os.sep, "/")
+
+    def _signature(self, version: int) -> tuple:
+        return ("sqlite", self.db_path, version)
+
+    # --------------------------------------------------
+    # Lesen
+    # --------------------------------------------------
+
+    def load(self, path: str, default: Any):
+        conn = self._connect()
+        name = self.store_name(path)
+
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT kind, body, version FROM stores WHERE name = ?", (name,)
+            ).fetchone()
+
+            if row is None:
+                return default
+
+            kind, body, version = row
+            signature = self._signature(version)
+
+            hit, data = _cache_lookup(path, signature)
+            if hit:
+                return data
+
+            start = time.perf_counter()
+            if kind == "list":
+                data = [
+                    decode_json(r[0])
+                    for r in conn.execute(
+                        "SELECT body FROM rows WHERE store = ? ORDER BY id", (name,)
+                    )
+                ]
+            else:
+                data = decode_json(body) if body else default
+            observe_phase("read", path, start)
+        finally:
+            conn.execute("COMMIT")
+
+        _cache_put(path, signature, data)
+        return data
+
+    def ids(self, path: str) -> list:
+        conn = self._connect()
+        name = self.store_name(path)
+        ids_path = path + "#ids"
+
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT kind, version FROM stores WHERE name = ?", (name,)
+            ).fetchone()
+
+            if row is None or row[0] != "list":
+                return []
+
+            signature = self._signature(row[1])
+            hit, ids = _cache_lookup(ids_path, signature)
+            if hit:
+                return ids
+
+            ids = [
+                r[0]
+                for r in conn.execute(
+                    "SELECT id FROM rows WHERE store = ? ORDER BY id", (name,)
+                )
+            ]
+        finally:
+            conn.execute("COMMIT")
+
+        _cache_put(ids_path, signature, ids)
+        return ids
+
+    def get_by_id(self, path: str, item_id: int) -> Any:
+        row = self._connect().execute(
+            "SELECT body FROM rows WHERE store = ? AND id = ?",
+            (self.store_name(path), item_id),
+        ).fetchone()
+
+        if row is None:
+            raise KeyError("ID nicht gefunden.")
+
+        return decode_json(row[0])
+
+    def exists(self, path: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM stores WHERE name = ?", (self.store_name(path),)
+        ).fetchone()
+        return row is not None
+
+    def remove(self, path: str) -> bool:
+        conn = self._connect()
+        name = self.store_name(path)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM rows WHERE store = ?", (name,))
+            removed = conn.execute(
+                "DELETE FROM stores WHERE name = ?", (name,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            invalidate_cache(path)
+
+        return removed > 0
+
+    # --------------------------------------------------
+    # Schreiben
+    # --------------------------------------------------
+
+    def _write(self, path: str, operation) -> int:
+        """
+        Führt operation(conn, name, kind) in einer Schreibtransaktion aus
+        (kind ist None, wenn der Store noch nicht existiert). operation
+        liefert eine Funktion, die den alten gecachten Stand in den neuen
+        überführt, oder None. Rückgabe ist die neue Version.
+        """
+        conn = self._connect()
+        name = self.store_name(path)
+
+        conn.execute("BEGIN IMMEDIATE")
+        start = time.perf_counter()
+        try:
+            row = conn.execute(
+                "SELECT kind, version FROM stores WHERE name = ?", (name,)
+            ).fetchone()
+            kind, version = row if row else (None, None)
+
+            transform = operation(conn, name, kind)
+
+            new_version = conn.execute(
+                "UPDATE counter SET version = version + 1 WHERE id = 1 RETURNING version"
+            ).fetchone()[0]
+            conn.execute(
+                "UPDATE stores SET version = ? WHERE name = ?", (new_version, name)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        observe_phase("write", path, start)
+        self._advance_cache(path, version, new_version, transform)
+        return new_version
+
+    def _advance_cache(self, path, old_version, new_version, transform):
+        """
+        Überführt einen aktuellen Cache-Eintrag ohne Neuladen in den neuen
+        Stand. Die Liste wird kopiert, damit Leser des alten Objekts nichts
+        von der Änderung sehen.
+        """
+        if transform is None or old_version is None:
+            invalidate_cache(path)
+            return
+
+        hit, data = _cache_lookup(path, self._signature(old_version))
+        if not hit:
+            invalidate_cache(path)
+            return
+
+        _cache_put(path, self._signature(new_version), transform(data))
+
+    def _set_kind(self, conn, name: str, kind: str, body: str = None):
+        conn.execute(
+            "INSERT INTO stores (name, kind, body, version) VALUES (?, ?, ?, 0) "
+            "ON CONFLICT (name) DO UPDATE SET kind = excluded.kind, body = excluded.body",
+            (name, kind, body),
+        )
+
+    def _position(self, conn, name: str, row_id: int) -> int:
+        exists = conn.execute(
+            "SELECT 1 FROM rows WHERE store = ? AND id = ?", (name, row_id)
+        ).fetchone()
+
+        if exists is None:
+            raise KeyError("ID nicht gefunden.")
+
+        # Zählt über den Index (store, id) – ohne Zeileninhalte zu lesen
+        return conn.execute(
+            "SELECT COUNT(*) FROM rows WHERE store = ? AND id < ?", (name, row_id)
+        ).fetchone()[0]
+
+    def _row_id(self, conn, name: str, kind: str, index: int) -> int:
+        if kind == "doc":
+            raise ValueError("JSON ist keine Liste.")
+
+        row = None
+        if kind == "list" and index >= 0:
+            row = conn.execute(
+                "SELECT id FROM rows WHERE store = ? ORDER BY id LIMIT 1 OFFSET ?",
+                (name, index),
+            ).fetchone()
+
+        if row is None:
+            raise IndexError("Index außerhalb des Bereichs.")
+
+        return row[0]
+
+    def _ids(self, conn, name: str) -> list:
+        return [
+            r[0]
+            for r in conn.execute(
+                "SELECT id FROM rows WHERE store = ? ORDER BY id", (name,)
+            )
+        ]
+
+    def _insert(self, conn, name: str, item: Any) -> int:
+        return conn.execute(
+            "INSERT INTO rows (store, body) VALUES (?, ?)", (name, _dumps(item))
+        ).lastrowid
+
+    def _store(self, conn, name: str, kind: str, data: Any):
+        if isinstance(data, list):
+            old = {}
+            if kind == "list":
+                old = dict(conn.execute(
+                    "SELECT id, body FROM rows WHERE store = ? ORDER BY id", (name,)
+                ))
+
+            # Unveränderte bzw. an ihrer Stelle bearbeitete Zeilen behalten
+            # ihre ID; neue Zeilen nur am Ende, die Reihenfolge ist die ID
+            bodies = [_dumps(item) for item in data]
+            ids = kept_ids(list(old.values()), list(old), bodies, ascending=True)
+            kept = set(ids)
+
+            conn.executemany(
+                "DELETE FROM rows WHERE id = ?",
+                ((row_id,) for row_id in old if row_id not in kept),
+            )
+            conn.executemany(
+                "UPDATE rows SET body = ? WHERE id = ?",
+                (
+                    (body, row_id)
+                    for body, row_id in zip(bodies, ids)
+                    if row_id is not None and old[row_id] != body
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO rows (store, body) VALUES (?, ?)",
+                ((name, body) for body, row_id in zip(bodies, ids) if row_id is None),
+            )
+
+            self._set_kind(conn, name, "list")
+        else:
+            conn.execute("DELETE FROM rows WHERE store = ?", (name,))
+            self._set_kind(conn, name, "doc", _dumps(data))
+
+    def save(self, path: str, data: Any):
+        def operation(conn, name, kind):
+            self._store(conn, name, kind, data)
+            return None
+
+        version = self._write(path, operation)
+        _cache_put(path, self._signature(version), data)
+
+    def modify(self, path: str, default: Any, change, if_match=None) -> Any:
+        # Lesen, Prüfen und Schreiben in einer Transaktion – auch
+        # gegenüber anderen Prozessen atomar
+        data = None
+
+        def operation(conn, name, kind):
+            nonlocal data
+
+            if kind == "list":
+                data = [
+                    decode_json(r[0])
+                    for r in conn.execute(
+                        "SELECT body FROM rows WHERE store = ? ORDER BY id", (name,)
+                    )
+                ]
+            elif kind == "doc":
+                body = conn.execute(
+                    "SELECT body FROM stores WHERE name = ?", (name,)
+                ).fetchone()[0]
+                data = decode_json(body) if body else default
+            else:
+                data = default
+
+            if if_match is not None and document_etag(data) not in if_match:
+                raise VersionConflict()
+
+            data = change(data)
+            self._store(conn, name, kind, data)
+            return None
+
+        version = self._write(path, operation)
+        _cache_put(path, self._signature(version), data)
+        return data
+
+    def append(self, path: str, item: Any) -> int:
+        new_id = None
+
+        def operation(conn, name, kind):
+            nonlocal new_id
+
+            if kind != "list":
+                # Wie bei JSON: kein Listen-Store → neu als Liste beginnen
+                self._set_kind(conn, name, "list")
+
+            new_id = self._insert(conn, name, item)
+
+            if kind != "list":
+                return lambda old: [item]
+            return lambda old: old + [item]
+
+        self._write(path, operation)
+        return new_id
+
+    def _replace(self, index: int, item: Any):
+        def transform(old):
+            new = list(old)
+            new[index] = item
+            return new
+
+        return transform
+
+    def _drop(self, index: int):
+        return lambda old: old[:index] + old[index + 1:]
+
+    def update(self, path: str, index: int, item: Any):
+        def operation(conn, name, kind):
+            row_id = self._row_id(conn, name, kind, index)
+            conn.execute(
+                "UPDATE rows SET body = ? WHERE id = ?", (_dumps(item), row_id)
+            )
+            return self._replace(index, item)
+
+        self._write(path, operation)
+
+    def delete(self, path: str, index: int):
+        def operation(conn, name, kind):
+            row_id = self._row_id(conn, name, kind, index)
+            conn.execute("DELETE FROM rows WHERE id = ?", (row_id,))
+            return self._drop(index)
+
+        self._write(path, operation)
+
+    def update_by_id(self, path: str, item_id: int, item: Any):
+        def operation(conn, name, kind):
+            index = self._position(conn, name, item_id)
+            conn.execute(
+                "UPDATE rows SET body = ? WHERE id = ?", (_dumps(item), item_id)
+            )
+            return self._replace(index, item)
+
+        self._write(path, operation)
+
+    def delete_by_id(self, path: str, item_id: int):
+        def operation(conn, name, kind):
+            index = self._position(conn, name, item_id)
+            conn.execute("DELETE FROM rows WHERE id = ?", (item_id,))
+            return self._drop(index)
+
+        self._write(path, operation)
+
+    def batch(self, path: str, operations: list) -> list:
+        new_ids = []
+
+        def operation(conn, name, kind):
+            if kind == "doc":
+                raise ValueError("JSON ist keine Liste.")
+
+            ids = []
+            if kind == "list":
+                ids = self._ids(conn, name)
+            else:
+                self._set_kind(conn, name, "list")
+
+            updates, deletes, inserts = resolve_batch(len(ids), operations)
+
+            conn.executemany(
+                "UPDATE rows SET body = ? WHERE id = ?",
+                ((_dumps(item), ids[i]) for i, item in updates.items()),
+            )
+            conn.executemany(
+                "DELETE FROM rows WHERE id = ?", ((ids[i],) for i in deletes)
+            )
+            new_ids.extend(self._insert(conn, name, item) for item in inserts)
+
+            return lambda old: apply_resolved_batch(old, updates, deletes, inserts)
+
+        self._write(path, operation)
+        return new_ids
+
+
+# ======================================================
+# IMPORT DER BESTEHENDEN JSON-DATEIEN
+# ======================================================
+
+def import_json_files(directory: str, db_path: str = None) -> dict:
+    """
+    Übernimmt alle *.json-Dateien aus directory und seinen Unterordnern
+    (z.B. kalenderwochen/weeks/…) einmalig in die Datenbank; Store-Namen
+    bleiben relativ zu directory. Leere Dateien werden übersprungen.
+    Liefert {store: anzahl}.
+    """
+    source = JsonFileEngine()
+    target = SQLiteEngine(db_path, directory)
+    imported = {}
+
+    file_paths = [
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(directory)
+        for filename in filenames
+        if filename.endswith(".json") and not filename.startswith(".")
+    ]
+
+    for file_path in sorted(file_paths):
+        data = source.load(file_path, None)
+
+        if data is None:
+            continue
+
+        target.save(file_path, data)
+        imported[target.store_name(file_path)] = (
+            len(data) if isinstance(data, (list, dict)) else 1
+        )
+
+    invalidate_cache()
+    return imported
+
+
+if __name__ == "__main__":
+    # python -m backend.storage_sqlite [data_dir] [db_path]
+    directory = sys.argv[1] if len(sys.argv) > 1 else data_dir()
+    db_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    for store, count in import_json_files(directory, db_path).items():
+        print(f"{store}: {count}")
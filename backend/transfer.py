@@ -0,0 +1,452 @@
+import csv
+import io
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Iterator
+
+from backend.records import SchichtRecord, format_number, parse_number, parse_time
+from backend.storage import batch_json, decode_json, encode_json, load_json, save_json
+from backend.uebersicht import TAGE
+
+
+# ======================================================
+# IMPORT / EXPORT (CSV UND NDJSON)
+# ======================================================
+#
+# Import: Die hochgeladene Datei wird zeilenweise gelesen und geprüft,
+# erst wenn alle Zeilen gültig sind, gehen sie mit EINEM Schreibvorgang in
+# den Store (batch_json bzw. save_json) – statt einem POST pro Zeile, der
+# jedes Mal die ganze Datei neu schreibt. Fehlerhafte Zeilen werden mit
+# Zeilennummer gesammelt (höchstens MAX_FEHLER), geschrieben wird dann
+# nichts.
+#
+#   CSV     erste Zeile Überschriften (wie die Tabellen im Frontend),
+#           Trennzeichen ; , oder Tab wird an der Überschrift erkannt
+#   NDJSON  eine Zeile pro Eintrag: Liste wie im Store oder Objekt mit
+#           den Überschriften als Schlüssel
+#
+# Export: Zeilen werden blockweise (BLOCK_ROWS) kodiert und sofort
+# gesendet (executors.stream_from_thread), die Antwort liegt nie ganz im
+# Speicher. CSV mit BOM, damit Excel Umlaute erkennt.
+#
+# Texte, die mit = + - @ (oder Tab/Zeilenumbruch) beginnen, würde Excel
+# als Formel ausführen – im CSV-Export bekommen sie ein ' vorangestellt,
+# der CSV-Import entfernt es wieder.
+
+MAX_FEHLER = 50
+BLOCK_ROWS = 500
+
+FORMATE = ("csv", "ndjson")
+
+# Spalten je Ressource in Store-Reihenfolge: (Überschrift, Art)
+#   text   beliebiger Text
+#   zahl   leer oder Zahl ("40", "8,5")
+#   zeit   leer oder Uhrzeit ("7:00")
+#   liste  Liste von Texten, in CSV kommagetrennt
+SPALTEN = {
+    "mitarbeiter": [
+        ("Vorname", "text"), ("Nachname", "text"), ("Geburtstag", "text"),
+        ("Anschrift", "text"), ("Anstellungsverhältnis", "text"), ("Vertrag an", "text"),
+        ("Vertrag unterzeichnet", "text"), ("Woche (h)", "zahl"), ("Monat (h)", "zahl"),
+        ("Sub-Unternehmen", "text"), ("Schichten", "liste"), ("Stundensatz", "zahl"),
+    ],
+    "filialen": [
+        ("Nr", "text"), ("Bezeichnung", "text"), ("PLZ", "text"), ("Ort", "text"),
+        ("Straße", "text"), ("Kontakt", "text"), ("Wochentage", "text"),
+        ("Firmenzeiten", "text"),
+    ],
+    "schichten": [
+        ("Teamname", "text"), ("Start A", "zeit"), ("Ende B", "zeit"),
+        ("Start C", "zeit"), ("Ende D", "zeit"), ("Stunden (h)", "zahl"),
+    ],
+    "arbeitstaetigkeiten": [
+        ("Branche", "text"), ("Kategorie", "text"), ("Berufsname", "text"),
+        ("Tätigkeit", "text"), ("Dauer (in h)", "zahl"),
+    ],
+}
+
+# Spalten, die nicht leer sein dürfen bzw. im Store eindeutig sein müssen
+PFLICHT = {"mitarbeiter": (0, 1), "filialen": (0,), "schichten": (0,), "arbeitstaetigkeiten": (3,)}
+EINDEUTIG = {"filialen": 0, "schichten": 0}
+
+KALENDERWOCHEN_SPALTEN = [
+    "Jahr", "KW", "Datum", "Tag", "Filiale", "Schicht", "Notiz", "Mitarbeiter",
+]
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+FORMEL_ZEICHEN = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ImportRejected(ValueError):
+    """
+    Import mit ungültigen Zeilen; fehler = [{"zeile": n, "fehler": "..."}].
+    """
+
+    def __init__(self, fehler: list):
+        super().__init__(fehler[0]["fehler"] if fehler else "Import abgelehnt")
+        self.fehler = fehler
+
+
+def detect_format(requested: str = None, filename: str = None, content_type: str = None) -> str:
+    """
+    Format aus ?format=, sonst aus Dateiendung bzw. Content-Type der Datei.
+    """
+    if requested:
+        if requested not in FORMATE:
+            raise ValueError(f"Unbekanntes Format: {requested} (csv oder ndjson)")
+        return requested
+
+    name = (filename or "").lower()
+    kind = (content_type or "").lower()
+
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in kind or "jsonl" in kind:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in kind:
+        return "csv"
+
+    raise ValueError("Format nicht erkennbar – ?format=csv oder ?format=ndjson angeben")
+
+
+# ------------------------------------------------------
+# Import: Zeilen lesen
+# ------------------------------------------------------
+
+def _header_positions(resource: str, header: list) -> list:
+    """
+    Spalte im Store je Spalte der Datei (None = leere Überschrift, ignoriert).
+    """
+    known = {name.casefold(): i for i, (name, _) in enumerate(SPALTEN[resource])}
+    positions = []
+    unknown = []
+
+    for name in header:
+        name = name.strip()
+        if not name:
+            positions.append(None)
+        elif name.casefold() in known:
+            positions.append(known[name.casefold()])
+        else:
+            unknown.append(name)
+
+    if unknown:
+        expected = "; ".join(name for name, _ in SPALTEN[resource])
+        raise ImportRejected([{
+            "zeile": 1,
+            "fehler": f"Unbekannte Spalte(n): {', '.join(unknown)} – erwartet: {expected}",
+        }])
+
+    return positions
+
+
+def _csv_value(value: str) -> str:
+    """
+    Gegenstück zu _csv_cell: "'=A1" → "=A1".
+    """
+    if value.startswith("'") and value[1:].startswith(FORMEL_ZEICHEN):
+        return value[1:]
+    return value
+
+
+def _csv_records(resource: str, text: io.TextIOBase) -> Iterator[tuple]:
+    header_line = text.readline()
+    if not header_line.strip():
+        return
+
+    delimiter = max(";,\t", key=header_line.count)
+    reader = csv.reader(chain([header_line], text), delimiter=delimiter)
+    positions = _header_positions(resource, next(reader))
+
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        if len(values) > len(positions):
+            yield reader.line_num, ValueError(
+                f"{len(values)} Werte, aber nur {len(positions)} Spalten in der Überschrift"
+            )
+            continue
+        yield reader.line_num, {
+            p: _csv_value(v) for p, v in zip(positions, values) if p is not None
+        }
+
+
+def _ndjson_records(resource: str, text: io.TextIOBase) -> Iterator[tuple]:
+    known = {name.casefold(): i for i, (name, _) in enumerate(SPALTEN[resource])}
+    width = len(SPALTEN[resource])
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            value = decode_json(line)
+        except ValueError:
+            yield number, ValueError("kein gültiges JSON")
+            continue
+
+        if isinstance(value, list):
+            if len(value) > width:
+                yield number, ValueError(f"{len(value)} Werte, erwartet höchstens {width}")
+                continue
+            yield number, dict(enumerate(value))
+        elif isinstance(value, dict):
+            unknown = [k for k in value if str(k).casefold() not in known]
+            if unknown:
+                yield number, ValueError(f"Unbekannte Spalte(n): {', '.join(map(str, unknown))}")
+                continue
+            yield number, {known[str(k).casefold()]: v for k, v in value.items()}
+        else:
+            yield number, ValueError("Zeile ist weder Liste noch Objekt")
+
+
+# ------------------------------------------------------
+# Import: Zeilen prüfen
+# ------------------------------------------------------
+
+def _text(value: Any, name: str) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool) or isinstance(value, (list, dict)):
+        raise ValueError(f"Spalte '{name}': Text erwartet")
+    if isinstance(value, float):
+        return format_number(value)
+    return str(value).strip()
+
+
+def _cell(value: Any, name: str, kind: str) -> Any:
+    if kind == "liste":
+        if isinstance(value, list):
+            return [_text(v, name) for v in value if _text(v, name)]
+        return [part.strip() for part in _text(value, name).split(",") if part.strip()]
+
+    text = _text(value, name)
+
+    if text and kind == "zahl" and parse_number(text) is None:
+        raise ValueError(f"Spalte '{name}': keine Zahl ({text})")
+    if text and kind == "zeit" and parse_time(text) is None:
+        raise ValueError(f"Spalte '{name}': keine Uhrzeit ({text})")
+
+    return text
+
+
+def build_row(resource: str, values: dict) -> list:
+    """
+    Zeile im Store-Format aus {spalte: wert}; ValueError bei ungültigen Werten.
+    """
+    columns = SPALTEN[resource]
+    row = [
+        _cell(values.get(i), name, kind)
+        for i, (name, kind) in enumerate(columns)
+    ]
+
+    missing = [columns[i][0] for i in PFLICHT.get(resource, ()) if not row[i]]
+    if missing:
+        raise ValueError(f"Pflichtfeld(er) leer: {', '.join(missing)}")
+
+    if resource == "schichten" and not row[5]:
+        # Stunden wie im Frontend aus den Blöcken berechnen
+        minutes = sum(end - start for start, end in SchichtRecord.from_row(row).blocks())
+        row[5] = format_number(minutes / 60, point=True)
+
+    return row
+
+
+def parse_upload(resource: str, file, fmt: str, encoding: str = "utf-8", existing: list = None) -> list:
+    """
+    Liest und prüft alle Zeilen aus file (Binärdatei). Liefert die Zeilen
+    im Store-Format oder wirft ImportRejected mit allen Fehlern.
+    existing: vorhandene Zeilen für die Prüfung eindeutiger Spalten.
+    """
+    # utf-8-sig: BOM von Excel überspringen
+    codec = "utf-8-sig" if encoding.lower().replace("_", "-") in ("utf-8", "utf8") else encoding
+    text = io.TextIOWrapper(file, encoding=codec, newline="")
+    records = _csv_records(resource, text) if fmt == "csv" else _ndjson_records(resource, text)
+
+    unique = EINDEUTIG.get(resource)
+    seen = {}
+    if unique is not None:
+        seen = {str(r[unique]).strip(): 0 for r in existing or () if len(r) > unique}
+
+    rows = []
+    fehler = []
+
+    try:
+        for number, values in records:
+            try:
+                if isinstance(values, Exception):
+                    raise values
+                row = build_row(resource, values)
+                if unique is not None:
+                    key = row[unique]
+                    if key in seen:
+                        where = f"Zeile {seen[key]}" if seen[key] else "bereits vorhanden"
+                        raise ValueError(f"'{key}' doppelt ({where})")
+                    seen[key] = number
+            except ValueError as e:
+                fehler.append({"zeile": number, "fehler": str(e)})
+                if len(fehler) >= MAX_FEHLER:
+                    break
+                continue
+            rows.append(row)
+    except UnicodeDecodeError:
+        fehler.append({
+            "zeile": None,
+            "fehler": f"Datei ist nicht {encoding} kodiert (?zeichensatz=cp1252 für Excel)",
+        })
+    except csv.Error as e:
+        fehler.append({"zeile": None, "fehler": f"CSV fehlerhaft: {e}"})
+    finally:
+        text.detach()
+
+    if fehler:
+        raise ImportRejected(fehler)
+    if not rows:
+        raise ImportRejected([{"zeile": None, "fehler": "Datei enthält keine Zeilen"}])
+
+    return rows
+
+
+def import_file(path: str, resource: str, file, fmt: str, encoding: str = "utf-8", replace: bool = False) -> dict:
+    """
+    Prüft die Datei vollständig und schreibt sie dann mit einem
+    Schreibvorgang: angehängt (ein Batch) oder mit replace als neue Liste.
+    """
+    existing = None if replace else load_json(path, default=[])
+    rows = parse_upload(resource, file, fmt, encoding, existing)
+
+    if replace:
+        save_json(path, rows)
+        return {"importiert": len(rows), "ersetzt": True}
+
+    result = batch_json(path, [{"op": "insert", "item": row} for row in rows])
+    return {"importiert": len(rows), "ersetzt": False, "ids": result["ids"]}
+
+
+# ------------------------------------------------------
+# Export
+# ------------------------------------------------------
+
+def _csv_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)  # auch negative Zahlen sind keine Formel
+    text = ", ".join(map(str, value)) if isinstance(value, list) else str(value)
+    if text.startswith(FORMEL_ZEICHEN):
+        return "'" + text
+    return text
+
+
+def write_csv(header: list, rows: Iterator[list], emit):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";", lineterminator="\r\n")
+
+    buffer.write("﻿")
+    writer.writerow(header)
+
+    while True:
+        block = list(islice(rows, BLOCK_ROWS))
+        if not block:
+            break
+        writer.writerows([_csv_cell(v) for v in row] for row in block)
+        emit(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        emit(buffer.getvalue().encode("utf-8"))
+
+
+def write_ndjson(items: Iterator[Any], emit):
+    while True:
+        block = list(islice(items, BLOCK_ROWS))
+        if not block:
+            break
+        emit(b"".join(encode_json(item) + b"\n" for item in block))
+
+
+def export_list(resource: str, path: str, fmt: str, emit):
+    """
+    Erzeuger für stream_from_thread: alle Zeilen eines Listen-Stores.
+    NDJSON unverändert im Store-Format, CSV mit Spalten laut SPALTEN.
+    """
+    rows = load_json(path, default=[])
+
+    if fmt == "ndjson":
+        write_ndjson(iter(rows), emit)
+        return
+
+    width = len(SPALTEN[resource])
+    cells = (
+        (list(row[:width]) + [""] * (width - len(row))) if isinstance(row, list) else [row]
+        for row in rows
+    )
+    write_csv([name for name, _ in SPALTEN[resource]], cells, emit)
+
+
+def week_cells(store, keys: list, filiale: str = None) -> Iterator[dict]:
+    """
+    Alle belegten Zellen (Schicht, Notiz oder Mitarbeiter) der Wochen keys,
+    eine Woche nach der anderen – gelesen werden nur deren Chunks.
+    """
+    for jahr, kw in keys:
+        snapshot = store.snapshot(kw, jahr)
+        if snapshot is None:
+            continue
+
+        packed = snapshot[1]
+        digests = packed.get("chunks", [])
+        if filiale is not None and packed.get("filialen") is not None:
+            digests = [d for d, f in zip(digests, packed["filialen"]) if f == filiale]
+
+        try:
+            montag = datetime.fromisocalendar(jahr, kw, 1)
+        except ValueError:
+            montag = None
+
+        for digest in digests:
+            entry = store.chunk(digest)
+            if not isinstance(entry, dict):
+                continue
+            nummer = str(entry.get("filiale", "")).strip()
+            if filiale is not None and nummer != filiale:
+                continue
+
+            tage = entry.get("tage") or {}
+            for day, tag in enumerate(TAGE):
+                cell = tage.get(tag)
+                if not isinstance(cell, dict):
+                    continue
+
+                schicht = str(cell.get("schicht") or "").strip()
+                notiz = str(cell.get("notiz") or "").strip()
+                mitarbeiter = list(cell.get("mitarbeiter") or [])
+                if not (schicht or notiz or mitarbeiter):
+                    continue
+
+                yield {
+                    "jahr": jahr,
+                    "kalenderwoche": kw,
+                    "datum": "" if montag is None else (
+                        datetime.fromordinal(montag.toordinal() + day).strftime("%d.%m.%Y")
+                    ),
+                    "tag": tag,
+                    "filiale": nummer,
+                    "schicht": schicht,
+                    "notiz": notiz,
+                    "mitarbeiter": mitarbeiter,
+                }
+
+
+def export_weeks(store, keys: list, filiale: str, fmt: str, emit):
+    """
+    Erzeuger für stream_from_thread: Verlauf der Kalenderwochen als eine
+    Zeile pro belegter Zelle (Woche × Filiale × Tag).
+    """
+    cells = week_cells(store, keys, filiale)
+
+    if fmt == "ndjson":
+        write_ndjson(cells, emit)
+        return
+
+    write_csv(KALENDERWOCHEN_SPALTEN, (list(c.values()) for c in cells), emit)
@@ -0,0 +1,67 @@
+from typing import Any
+
+
+# ======================================================
+# ÜBERSICHT (PLANUNGSBOARD)
+# ======================================================
+#
+# uebersicht.json:
+#
+#   {"mode": "...", "data": [
+#       {"filiale": "101", "tage": {"Montag": {"schicht": "", "notiz": "",
+#                                              "mitarbeiter": [...]}, ...}},
+#       ...
+#   ]}
+
+TAGE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+
+ZELLEN_FELDER = ("schicht", "notiz", "mitarbeiter")
+
+
+def empty_cell() -> dict:
+    return {"schicht": "", "notiz": "", "mitarbeiter": []}
+
+
+def patch_board(board: Any, aenderungen: list) -> dict:
+    """
+    Wendet Zellen-Änderungen {"filiale", "tag", [schicht], [notiz],
+    [mitarbeiter]} an und liefert ein neues Board. Nur die betroffenen
+    Einträge werden kopiert, das übergebene (gecachte) Board bleibt
+    unverändert. Unbekannte Filialen werden am Ende angelegt.
+    """
+    if isinstance(board, dict) and isinstance(board.get("data"), list):
+        board = dict(board)
+        data = list(board["data"])
+    else:
+        board = {}
+        data = []
+
+    positions = {
+        str(entry.get("filiale")): i
+        for i, entry in enumerate(data)
+        if isinstance(entry, dict)
+    }
+    copied = set()
+
+    for aenderung in aenderungen:
+        filiale = str(aenderung["filiale"])
+        position = positions.get(filiale)
+
+        if position is None:
+            position = positions[filiale] = len(data)
+            data.append({"filiale": filiale, "tage": {}})
+        elif position not in copied:
+            entry = data[position]
+            data[position] = {**entry, "tage": dict(entry.get("tage") or {})}
+
+        copied.add(position)
+
+        tage = data[position]["tage"]
+        cell = {**empty_cell(), **(tage.get(aenderung["tag"]) or {})}
+        for feld in ZELLEN_FELDER:
+            if feld in aenderung:
+                cell[feld] = aenderung[feld]
+        tage[aenderung["tag"]] = cell
+
+    board["data"] = data
+    return board
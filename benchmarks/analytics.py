@@ -0,0 +1,148 @@
+"""
+Benchmark: Auswertung über ein Jahr Kalenderwochen (backend/analytics.py).
+
+Legt in einem temporären Verzeichnis --wochen Kalenderwochen mit je
+--filialen Filialen an (pro Woche ändert sich ein Teil der Filialen) und
+misst die Auswertung:
+
+    kalt        Chunks lesen und in Spalten übersetzen
+    spalten     Spalten gecacht, nur die Aggregation (np.bincount)
+    ergebnis    Ergebnis-Cache
+    python      dieselben Summen als einfache Python-Schleife (Vergleich)
+
+    python benchmarks/analytics.py [--wochen 52] [--filialen 300]
+                                   [--mitarbeiter 600] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend import analytics  # noqa: E402
+from backend.kalenderwochen import KalenderwochenStore  # noqa: E402
+from backend.planner import label_name, shift_hours  # noqa: E402
+from backend.records import MitarbeiterRecord, SchichtRecord, records_from_rows  # noqa: E402
+from backend.uebersicht import TAGE  # noqa: E402
+
+SCHICHTEN = [
+    ["Frühschicht A", "7:00", "12:00", "13:00", "16:00", "8.0"],
+    ["Frühschicht B", "6:30", "11:30", "12:00", "15:30", "8.5"],
+    ["Vormittagsschicht", "8:00", "13:00", "", "", "5.0"],
+    ["Spätschicht A", "14:00", "18:00", "18:30", "22:00", "7.5"],
+    ["Nachtschicht", "22:00", "2:00", "2:30", "6:00", "7.5"],
+]
+
+
+def generate_entry(filiale: int, names: list, rng: random.Random) -> dict:
+    return {
+        "filiale": str(1000 + filiale),
+        "tage": {
+            tag: {
+                "schicht": rng.choice(SCHICHTEN)[0],
+                "notiz": "",
+                "mitarbeiter": [f"{n}, 40h/w" for n in rng.sample(names, rng.randint(1, 2))],
+            }
+            for tag in TAGE[:6]
+        },
+    }
+
+
+def python_totals(store: KalenderwochenStore, keys: list, mitarbeiter, schichten) -> dict:
+    hours = {s.name: shift_hours(s) for s in schichten}
+    rates = {m.name: m.stundensatz or 0.0 for m in mitarbeiter}
+    per_employee, per_filiale, cost = {}, {}, 0.0
+
+    for jahr, kw in keys:
+        for entry in store.get_uebersicht(kw, jahr)["data"]:
+            for cell in entry["tage"].values():
+                h = hours.get(cell["schicht"], 0.0)
+                for label in cell["mitarbeiter"]:
+                    name = label_name(label)
+                    per_employee[name] = per_employee.get(name, 0.0) + h
+                    per_filiale[entry["filiale"]] = per_filiale.get(entry["filiale"], 0.0) + h
+                    cost += h * rates.get(name, 0.0)
+
+    return {"stunden": sum(per_filiale.values()), "kosten": cost}
+
+
+def timed(label: str, fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"{label:<10} {ms:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wochen", type=int, default=52)
+    parser.add_argument("--filialen", type=int, default=300)
+    parser.add_argument("--mitarbeiter", type=int, default=600)
+    parser.add_argument("--aenderung", type=float, default=0.2,
+                        help="Anteil der Filialen, die sich pro Woche ändern")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    mitarbeiter_rows = [
+        [f"Vorname{i}", f"Nachname{i}", "", "", "", "", "", "40", "", "",
+         [], str(rng.choice([14, 15.5, 17]))]
+        for i in range(args.mitarbeiter)
+    ]
+    mitarbeiter = records_from_rows(mitarbeiter_rows, MitarbeiterRecord)
+    schichten = records_from_rows(SCHICHTEN, SchichtRecord)
+    names = [m.name for m in mitarbeiter]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = KalenderwochenStore(directory)
+
+        entries = [generate_entry(f, names, rng) for f in range(args.filialen)]
+        for kw in range(1, args.wochen + 1):
+            for f in rng.sample(range(args.filialen), int(args.filialen * args.aenderung)):
+                entries[f] = generate_entry(f, names, rng)
+            store.put({
+                "kalenderwoche": kw, "jahr": 2026, "tage": {},
+                "uebersicht": {"mode": "schicht", "data": list(entries)},
+            })
+
+        keys = store.index().range((2026, 1), (2026, 53))
+
+        def weeks():
+            result = []
+            for jahr, kw in keys:
+                version, packed = store.snapshot(kw, jahr)
+                result.append((
+                    {"jahr": jahr, "kalenderwoche": kw},
+                    version,
+                    lambda v=version, p=packed: analytics.snapshot_columns(v, p, store.chunk),
+                ))
+            return result
+
+        def uncached():
+            analytics._results.items.clear()
+            return analytics.analyze(weeks(), mitarbeiter, schichten)
+
+        print(f"{len(keys)} Wochen × {args.filialen} Filialen, {args.mitarbeiter} Mitarbeiter")
+
+        result = timed("kalt", uncached)
+        timed("spalten", uncached, repeat=10)
+        timed("ergebnis", lambda: analytics.analyze(weeks(), mitarbeiter, schichten), repeat=10)
+        reference = timed("python", lambda: python_totals(store, keys, mitarbeiter, schichten))
+
+        print(f"\n{result['gesamt']['einsaetze']} Einsätze, "
+              f"{result['gesamt']['stunden']:.1f} h, {result['gesamt']['kosten']:.2f} €")
+
+        assert abs(result["gesamt"]["stunden"] - reference["stunden"]) < 0.01
+        assert abs(result["gesamt"]["kosten"] - reference["kosten"]) < 0.01
+
+
+if __name__ == "__main__":
+    main()
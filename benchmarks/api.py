@@ -0,0 +1,434 @@
+"""
+Lasttest aller Routen von backend/main.py im Prozess (ASGI-Testclient).
+
+Erzeugt einen Datensatz (benchmarks/dataset.py) oder kopiert --daten in
+ein temporäres Verzeichnis, ruft jede Route wiederholt auf und meldet
+p50/p99-Latenz, Durchsatz (Anfragen/s, nacheinander) und den Spitzen-
+Speicher (Python-Allokationen) einer Anfrage. Schreibende Routen stellen
+ihre Stores nach der Messung wieder her. Routen ohne Messung werden
+mit Grund aufgeführt.
+
+Mit --parallel N läuft zusätzlich ein gemischter Lese-Lasttest mit N
+gleichzeitigen Clients (httpx.AsyncClient über ASGITransport).
+
+    python benchmarks/api.py [--engine json|sqlite|log]
+                             [--mitarbeiter 3000] [--filialen 400] [--jahre 2]
+                             [--daten VERZEICHNIS] [--dauer 1.0]
+                             [--nur mitarbeiter,uebersicht] [--parallel 8]
+                             [--json bericht.json]
+                             [--vergleich alt.json] [--schwelle 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset import add_dataset_arguments, dataset_meta, prepared  # noqa: E402
+from harness import (  # noqa: E402
+    add_report_arguments, environment, measure, peak_memory, report, summarize,
+)
+
+LISTEN = ["mitarbeiter", "filialen", "schichten", "arbeitstaetigkeiten"]
+
+FILTER = {
+    "mitarbeiter": "name=müller",
+    "filialen": "name=dachau",
+    "schichten": "name=früh",
+    "arbeitstaetigkeiten": "name=reinigen",
+}
+
+# Routen, die nur für die alte Listen-Form der Übersicht gelten – das
+# Board ist ein Objekt {"mode", "data"}
+UEBERSICHT_LISTE = "nur für die Übersicht im alten Listenformat"
+
+NICHT_GEMESSEN = {
+    ("GET", "/uebersicht/ids"): UEBERSICHT_LISTE,
+    ("GET", "/uebersicht/id/{item_id}"): UEBERSICHT_LISTE,
+    ("PUT", "/uebersicht/id/{item_id}"): UEBERSICHT_LISTE,
+    ("DELETE", "/uebersicht/id/{item_id}"): UEBERSICHT_LISTE,
+    ("PUT", "/uebersicht/{index}"): UEBERSICHT_LISTE,
+    ("DELETE", "/uebersicht/{index}"): UEBERSICHT_LISTE,
+}
+
+
+def rechnung(nummer: int, positionen: int) -> dict:
+    return {
+        "nummer": f"BENCH-{nummer}",
+        "datum": "01.01.2026",
+        "kunde": {"firma": "Kunde GmbH", "adresse": "Hauptstraße 1\n12345 Stadt"},
+        "positionen": [
+            {"datum": "01.01.2026", "text": f"Position {i}", "stunden": 1.5, "satz": 42}
+            for i in range(positionen)
+        ],
+    }
+
+
+BRIEFKOPF = {"name": "GMatrix Service", "adresse": "Musterweg 5\n54321 Musterstadt"}
+
+
+# ======================================================
+# SZENARIEN
+# ======================================================
+#
+# Ein Szenario: Name, Route (Methode, Pfad-Vorlage wie in main.py),
+# call() → Response, optional setup() vor jedem Aufruf (nicht gemessen)
+# und restore() nach der Messung.
+
+def scenario(name: str, route: tuple, call, setup=None, restore=None, status=(200,)) -> dict:
+    return {
+        "name": name, "route": route, "call": call,
+        "setup": setup, "restore": restore, "status": status,
+    }
+
+
+def build_scenarios(client, main, rng: random.Random) -> list:
+    from backend.storage import append_json, encode_json, load_json, load_ids, save_json
+
+    result = []
+
+    def snapshot(path: str):
+        data = load_json(path)
+        return lambda: save_json(path, data)
+
+    def add(*args, **kwargs):
+        result.append(scenario(*args, **kwargs))
+
+    add("GET /", ("GET", "/"), lambda: client.get("/"))
+    add("GET /storage/cache", ("GET", "/storage/cache"), lambda: client.get("/storage/cache"))
+    add("GET /events (erstes Byte)", ("GET", "/events"), None)  # eigener ASGI-Aufruf
+
+    # --------------------------------------------------
+    # Listen-Stores
+    # --------------------------------------------------
+
+    for name in LISTEN:
+        path = getattr(main, {"arbeitstaetigkeiten": "ARBEIT_FILE"}.get(name, f"{name.upper()}_FILE"))
+        rows = load_json(path)
+        row = list(rows[0])
+        ids = load_ids(path)
+        first = {}
+        etag = client.get(f"/{name}").headers["etag"]
+        base = f"/{name}"
+
+        add(f"GET {base}", ("GET", base), lambda b=base: client.get(b))
+        add(f"GET {base}?limit=50", ("GET", base),
+            lambda b=base: client.get(f"{b}?offset=100&limit=50"))
+        add(f"GET {base}?{FILTER[name]}", ("GET", base),
+            lambda b=base, q=FILTER[name]: client.get(f"{b}?{q}"))
+        add(f"GET {base} (304)", ("GET", base),
+            lambda b=base, e=etag: client.get(b, headers={"If-None-Match": e}), status=(304,))
+        add(f"GET {base}/ids", ("GET", f"{base}/ids"), lambda b=base: client.get(f"{b}/ids"))
+        add(f"GET {base}/id", ("GET", f"{base}/id/{{item_id}}"),
+            lambda b=base, f=first: client.get(f"{b}/id/{f['id']}"),
+            setup=lambda p=path, f=first, n=len(ids) // 2: f.update(id=load_ids(p)[n]))
+
+        add(f"POST {base}", ("POST", base),
+            lambda b=base, r=row: client.post(b, json=r), restore=snapshot(path))
+        add(f"PUT {base}/index", ("PUT", f"{base}/{{index}}"),
+            lambda b=base, r=row: client.put(f"{b}/0", json=r), restore=snapshot(path))
+        # save_json (restore) vergibt neue IDs – die ID daher erst im setup
+        add(f"PUT {base}/id", ("PUT", f"{base}/id/{{item_id}}"),
+            lambda b=base, r=row, f=first: client.put(f"{b}/id/{f['id']}", json=r),
+            setup=lambda p=path, f=first: f.update(id=load_ids(p)[0]),
+            restore=snapshot(path))
+
+        # Löschen: vor jedem Aufruf einen Eintrag anhängen
+        target = {}
+
+        def append_row(p=path, r=row, t=target):
+            t["id"] = append_json(p, r)
+            t["index"] = len(load_json(p)) - 1
+
+        add(f"DELETE {base}/index", ("DELETE", f"{base}/{{index}}"),
+            lambda b=base, t=target: client.delete(f"{b}/{t['index']}"),
+            setup=append_row, restore=snapshot(path))
+        add(f"DELETE {base}/id", ("DELETE", f"{base}/id/{{item_id}}"),
+            lambda b=base, t=target: client.delete(f"{b}/id/{t['id']}"),
+            setup=append_row, restore=snapshot(path))
+
+        operations = [
+            {"op": "update", "index": i, "item": rows[i]} for i in range(min(10, len(rows)))
+        ]
+        add(f"POST {base}/batch (10)", ("POST", f"{base}/batch"),
+            lambda b=base, o=operations: client.post(f"{b}/batch", json={"operations": o}),
+            restore=snapshot(path))
+
+        # Import: 100 neue Zeilen in einem Schreibvorgang; vor jedem Aufruf
+        # Ausgangsstand, sonst wären die Filial-Nummern ab dem zweiten doppelt
+        original = snapshot(path)
+        upload = b"".join(
+            encode_json([f"Import {i}"] + list(rows[i % len(rows)][1:])) + b"\n"
+            for i in range(100)
+        )
+        add(f"POST {base}/import (100)", ("POST", f"{base}/import"),
+            lambda b=base, u=upload: client.post(
+                f"{b}/import", files={"datei": ("import.ndjson", u, "application/x-ndjson")}
+            ),
+            setup=original, restore=original)
+        add(f"GET {base}/export (csv)", ("GET", f"{base}/export"),
+            lambda b=base: client.get(f"{b}/export"))
+        add(f"GET {base}/export (ndjson)", ("GET", f"{base}/export"),
+            lambda b=base: client.get(f"{b}/export?format=ndjson"))
+
+    # --------------------------------------------------
+    # Suche
+    # --------------------------------------------------
+
+    add("GET /search?q=schneider", ("GET", "/search"),
+        lambda: client.get("/search?q=schneider"))
+    add("GET /search?q=schnieder (Tippfehler)", ("GET", "/search"),
+        lambda: client.get("/search?q=schnieder&typ=mitarbeiter"))
+
+    # --------------------------------------------------
+    # Übersicht
+    # --------------------------------------------------
+
+    board = load_json(main.UEBERSICHT_FILE)
+    etag = client.get("/uebersicht").headers["etag"]
+    filialen = [e["filiale"] for e in board["data"]]
+    labels = [label for e in board["data"] for c in e["tage"].values() for label in c["mitarbeiter"]]
+    restore_board = snapshot(main.UEBERSICHT_FILE)
+
+    def cell_change() -> dict:
+        return {"aenderungen": [{
+            "filiale": rng.choice(filialen),
+            "tag": rng.choice(["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag"]),
+            "mitarbeiter": [rng.choice(labels)] if labels else [],
+        }]}
+
+    add("GET /uebersicht", ("GET", "/uebersicht"), lambda: client.get("/uebersicht"))
+    add("GET /uebersicht (304)", ("GET", "/uebersicht"),
+        lambda: client.get("/uebersicht", headers={"If-None-Match": etag}), status=(304,))
+    add("GET /uebersicht/konflikte", ("GET", "/uebersicht/konflikte"),
+        lambda: client.get("/uebersicht/konflikte"))
+    add("POST /uebersicht", ("POST", "/uebersicht"),
+        lambda: client.post("/uebersicht", json=board), restore=restore_board)
+    add("POST /uebersicht?pruefen", ("POST", "/uebersicht"),
+        lambda: client.post("/uebersicht?pruefen=true", json=board), restore=restore_board)
+    add("PATCH /uebersicht", ("PATCH", "/uebersicht"),
+        lambda: client.patch("/uebersicht", json=cell_change()), restore=restore_board)
+    add("PATCH /uebersicht?pruefen", ("PATCH", "/uebersicht"),
+        lambda: client.patch("/uebersicht?pruefen=true", json=cell_change()),
+        restore=restore_board, status=(200, 409))
+    add("POST /uebersicht/auto-plan", ("POST", "/uebersicht/auto-plan"),
+        lambda: client.post("/uebersicht/auto-plan", json={"ueberschreiben": True}))
+    add("DELETE /uebersicht", ("DELETE", "/uebersicht"),
+        lambda: client.delete("/uebersicht"), setup=restore_board, restore=restore_board)
+
+    # --------------------------------------------------
+    # Kalenderwochen und Auswertung
+    # --------------------------------------------------
+
+    keys = main.kalenderwochen.index().sorted_keys
+    jahr, kw = keys[-1] if keys else (2025, 1)
+
+    def drop_bench_week():
+        main.kalenderwochen.delete(1, 2099)
+
+    add("GET /kalenderwochen?limit=10", ("GET", "/kalenderwochen"),
+        lambda: client.get("/kalenderwochen?limit=10"))
+    add("GET /kalenderwochen?felder", ("GET", "/kalenderwochen"),
+        lambda: client.get(f"/kalenderwochen?jahr={jahr}&felder=kalenderwoche,jahr"))
+    add("GET /kalenderwochen?von&bis", ("GET", "/kalenderwochen"),
+        lambda: client.get(f"/kalenderwochen?jahr={jahr}&von=1&bis=4"))
+    add("GET /kalenderwochen/export", ("GET", "/kalenderwochen/export"),
+        lambda: client.get(f"/kalenderwochen/export?jahr={jahr}&von=1&bis=4"))
+    add("GET /kalenderwochen/kw/jahr", ("GET", "/kalenderwochen/{kw}/{jahr}"),
+        lambda: client.get(f"/kalenderwochen/{kw}/{jahr}"), status=(200, 404))
+    add("POST /kalenderwochen/kw/jahr", ("POST", "/kalenderwochen/{kw}/{jahr}"),
+        lambda: client.post("/kalenderwochen/1/2099"), restore=drop_bench_week)
+    add("DELETE /kalenderwochen/kw/jahr", ("DELETE", "/kalenderwochen/{kw}/{jahr}"),
+        lambda: client.delete("/kalenderwochen/1/2099"),
+        setup=lambda: client.post("/kalenderwochen/1/2099"))
+    add("POST /kalenderwochen/restore", ("POST", "/kalenderwochen/{kw}/{jahr}/restore"),
+        lambda: client.post(f"/kalenderwochen/{kw}/{jahr}/restore"),
+        restore=restore_board, status=(200, 404))
+    add("GET /auswertung", ("GET", "/auswertung"), lambda: client.get("/auswertung"))
+    add("GET /auswertung?jahr", ("GET", "/auswertung"),
+        lambda: client.get(f"/auswertung?jahr={jahr}"))
+
+    # --------------------------------------------------
+    # Teams und Rechnungen
+    # --------------------------------------------------
+
+    teams = load_json(main.TEAMS_FILE)
+    add("GET /teams", ("GET", "/teams"), lambda: client.get("/teams"))
+    add("POST /teams", ("POST", "/teams"), lambda: client.post("/teams", json=teams),
+        restore=snapshot(main.TEAMS_FILE))
+
+    single = {"rechnung": rechnung(1, 100), "briefkopf": BRIEFKOPF}
+    batch = {"briefkopf": BRIEFKOPF, "rechnungen": [rechnung(i, 20) for i in range(10)]}
+    add("POST /rechnung/pdf (100 Pos.)", ("POST", "/rechnung/pdf"),
+        lambda: client.post("/rechnung/pdf", json=single))
+    add("POST /rechnung/pdf/batch (10)", ("POST", "/rechnung/pdf/batch"),
+        lambda: client.post("/rechnung/pdf/batch", json=batch))
+
+    return result
+
+
+# ======================================================
+# SSE: Zeit bis zum ersten Byte
+# ======================================================
+#
+# Der Testclient kann einen endlosen Stream nicht abbrechen. Deshalb
+# direkt über ASGI: nach dem ersten Body-Chunk meldet receive() den
+# Verbindungsabbruch.
+
+def events_call(app):
+    loop = asyncio.new_event_loop()
+
+    async def first_chunk():
+        received = asyncio.Event()
+
+        async def receive():
+            await received.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                received.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/events", "raw_path": b"/events",
+            "root_path": "", "query_string": b"", "headers": [],
+            "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+
+    return lambda: loop.run_until_complete(first_chunk())
+
+
+# ======================================================
+# PARALLELE LAST (GEMISCHT, NUR LESEN)
+# ======================================================
+
+async def parallel_load(app, paths: list, clients: int, dauer: float) -> dict:
+    import httpx
+
+    samples = []
+    errors = 0
+    deadline = time.perf_counter() + dauer
+
+    async def worker(client, rng):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            response = await client.get(rng.choice(paths))
+            samples.append(time.perf_counter() - t0)
+            if response.status_code >= 400:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, random.Random(i)) for i in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    stats = summarize(samples, elapsed)
+    stats["fehler"] = errors
+    return stats
+
+
+# ======================================================
+# ABLAUF
+# ======================================================
+
+def run(args) -> dict:
+    # Erst nach prepared() importieren – main liest GMATRIX_DATA_DIR
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    client = TestClient(main.app)
+    scenarios = build_scenarios(client, main, random.Random(args.seed))
+    only = {s.strip() for s in args.nur.split(",")} if args.nur else None
+
+    results = {}
+    failed = {}
+
+    for item in scenarios:
+        if only and not any(f"/{o}" in item["route"][1] for o in only):
+            continue
+
+        call = item["call"] or events_call(main.app)
+
+        def checked(call=call, item=item):
+            response = call()
+            if response is not None and response.status_code not in item["status"]:
+                raise RuntimeError(f"Status {response.status_code}: {response.text[:200]}")
+
+        try:
+            stats = measure(checked, args.dauer, setup=item["setup"])
+            stats["peak_kib"] = peak_memory(checked, setup=item["setup"])
+        except RuntimeError as error:
+            failed[item["name"]] = str(error)
+            print(f"  {item['name']}: FEHLER {error}", flush=True)
+            continue
+        finally:
+            if item["restore"]:
+                item["restore"]()
+
+        results[item["name"]] = stats
+        print(f"  {item['name']}: p50 {stats['p50_ms']} ms", flush=True)
+
+    if args.parallel:
+        paths = ["/mitarbeiter?limit=50", "/filialen", "/schichten", "/uebersicht",
+                 "/uebersicht/konflikte", "/auswertung", "/kalenderwochen?felder=kalenderwoche,jahr"]
+        stats = asyncio.run(parallel_load(main.app, paths, args.parallel, args.dauer * 5))
+        results[f"parallel x{args.parallel} (Lesen gemischt)"] = stats
+        print(f"  parallel: {stats['ops_s']} Anfragen/s", flush=True)
+
+    # Abdeckung: jede Route aus main.py gemessen oder begründet
+    measured = {item["route"] for item in scenarios}
+    missing = []
+    for route in main.app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in sorted(route.methods):
+            key = (method, route.path)
+            if key in NICHT_GEMESSEN:
+                print(f"  nicht gemessen: {method} {route.path} – {NICHT_GEMESSEN[key]}")
+            elif key not in measured:
+                missing.append(f"{method} {route.path}")
+
+    if missing:
+        print(f"\nOhne Szenario: {', '.join(missing)}")
+    for name, error in failed.items():
+        print(f"Fehlgeschlagen: {name}: {error}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--daten", help="vorhandenes Datenverzeichnis (wird kopiert)")
+    parser.add_argument("--dauer", type=float, default=1.0, help="Sekunden pro Route")
+    parser.add_argument("--nur", help="nur Routen dieser Ressourcen, z.B. mitarbeiter,uebersicht")
+    parser.add_argument("--parallel", type=int, default=0, metavar="N",
+                        help="zusätzlich gemischte Leselast mit N Clients")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+    with prepared(args) as directory:
+        print(f"Messe ({args.engine}, {directory}) …")
+        results = run(args)
+
+    print()
+    meta = environment(datensatz=dataset_meta(args), daten=args.daten, parallel=args.parallel)
+    sys.exit(report(results, meta, args.json, args.vergleich, args.schwelle))
+
+
+if __name__ == "__main__":
+    main()
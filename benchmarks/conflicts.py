@@ -0,0 +1,81 @@
+"""
+Benchmark: Konfliktprüfung des Boards (backend/conflicts.py).
+
+Plant ein großes Board mit dem automatischen Planer (siehe
+benchmarks/planner.py), verteilt zusätzlich zufällige Doppelbelegungen
+und misst:
+
+    voll          kompletter Index aus dem Board
+    diff          abgeleitet von einem Board mit --aenderungen anderen
+                  Zellen (Vergleich aller Zellen, wie beim POST)
+    patch         dieselben Änderungen mit bekannten Zellen (PATCH)
+
+    python benchmarks/conflicts.py [--filialen 500] [--mitarbeiter 800]
+                                   [--aenderungen 10] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.conflicts import ConflictIndex  # noqa: E402
+from backend.planner import employee_label, plan_week  # noqa: E402
+from backend.uebersicht import TAGE, patch_board  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from planner import generate  # noqa: E402
+
+
+def timed(label: str, fn, repeat: int = 20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"{label:<8} {ms:8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filialen", type=int, default=500)
+    parser.add_argument("--mitarbeiter", type=int, default=800)
+    parser.add_argument("--aenderungen", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    board, mitarbeiter, schichten = generate(args.filialen, args.mitarbeiter, rng)
+    board, _ = plan_week(board, mitarbeiter, schichten, time_limit=0)
+
+    def random_change():
+        return {
+            "filiale": str(1000 + rng.randrange(args.filialen)),
+            "tag": rng.choice(TAGE[:6]),
+            "mitarbeiter": [employee_label(rng.choice(mitarbeiter))],
+        }
+
+    board = patch_board(board, [random_change() for _ in range(args.filialen // 10)])
+    aenderungen = [random_change() for _ in range(args.aenderungen)]
+    changed = [(a["filiale"], TAGE.index(a["tag"])) for a in aenderungen]
+    patched = patch_board(board, aenderungen)
+
+    index = timed("voll", lambda: ConflictIndex.build(board, mitarbeiter, schichten))
+    derived = timed("diff", lambda: index.derive(patched))
+    timed("patch", lambda: index.derive(patched, changed), repeat=200)
+
+    full = ConflictIndex.build(patched, mitarbeiter, schichten)
+    assert derived.all() == full.all()
+    assert index.derive(patched, changed).all() == full.all()
+
+    cells = sum(len(e["tage"]) for e in board["data"])
+    print(f"\n{cells} Zellen, {len(full.einsaetze)} eingeplante Mitarbeiter, "
+          f"{len(full.all())} Konflikte")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Synthetischer Datensatz für Benchmarks.
+
+Schreibt Mitarbeiter, Filialen, Schichten, Arbeitstätigkeiten, eine
+geplante Übersicht und --jahre Jahre Kalenderwochen in ein
+Datenverzeichnis – über backend.storage, also für jede Storage-Engine
+(GMATRIX_STORAGE). Gleicher Seed → gleiche Daten.
+
+    python benchmarks/dataset.py ZIEL [--mitarbeiter 3000] [--filialen 400]
+                                      [--jahre 2] [--seed 1]
+                                      [--engine json|sqlite|log]
+
+Danach z.B.:
+
+    GMATRIX_DATA_DIR=ZIEL uvicorn backend.main:app
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+VORNAMEN = [
+    "Lukas", "Jonas", "Leon", "Finn", "Paul", "Elias", "Felix", "Noah", "Maximilian",
+    "Ben", "Emil", "Anton", "Moritz", "Jakob", "Tim", "Martin", "Michael", "Stefan",
+    "Anna", "Emma", "Mia", "Lena", "Hannah", "Sophie", "Marie", "Laura", "Lea",
+    "Julia", "Sarah", "Katharina", "Lisa", "Sandra", "Nicole", "Petra", "Ayşe", "Zoé",
+]
+
+NACHNAMEN = [
+    "Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker",
+    "Schulz", "Hoffmann", "Schäfer", "Koch", "Bauer", "Richter", "Klein", "Wolf",
+    "Schröder", "Neumann", "Schwarz", "Zimmermann", "Braun", "Krüger", "Hofmann",
+    "Hartmann", "Lange", "Schmitt", "Werner", "Krause", "Meier", "Lehmann", "Huber",
+    "Kaya", "Yılmaz", "Nowak", "Kowalski", "Rossi",
+]
+
+ORTE = [
+    ("85221", "Dachau"), ("85241", "Ampermoching"), ("85290", "Geisenfeld"),
+    ("85049", "Ingolstadt"), ("85354", "Freising"), ("85276", "Pfaffenhofen"),
+    ("80331", "München"), ("86150", "Augsburg"), ("84028", "Landshut"),
+    ("85570", "Markt Schwaben"), ("82256", "Fürstenfeldbruck"), ("85435", "Erding"),
+]
+
+STRASSEN = [
+    "Hauptstraße", "Bahnhofstraße", "Dachauer Str.", "Maximilianstr.", "Gartenweg",
+    "Am Berg", "Schulstraße", "Lindenallee", "Kirchplatz", "Münchner Str.",
+]
+
+KETTEN = ["EDEKA", "REWE", "Netto", "Penny", "Kaufland", "tegut"]
+
+# Zwei Blöcke A–B, C–D wie in schichten.json
+SCHICHT_VORLAGEN = [
+    ("Frühschicht", [("5:00", "9:00", "9:30", "13:30"), ("6:00", "10:00", "10:30", "14:30"),
+                     ("6:30", "11:30", "12:00", "15:30"), ("7:00", "12:00", "13:00", "16:00")]),
+    ("Spätschicht", [("13:00", "17:00", "17:30", "21:30"), ("14:00", "18:00", "18:30", "22:00"),
+                     ("15:00", "19:00", "19:30", "23:00")]),
+    ("Nachtschicht", [("22:00", "2:00", "2:30", "6:00")]),
+    ("Vormittagsschicht", [("8:00", "13:00", "", "")]),
+    ("Tagestart", [("5:00", "9:00", "", "")]),
+]
+
+ARBEIT = [
+    ("Handel", "Warenverräumung", "Verkäufer", "Regale auffüllen"),
+    ("Handel", "Kasse", "Kassierer", "Kassendienst"),
+    ("Handel", "Frische", "Fachverkäufer", "Theke bedienen"),
+    ("Service", "Reinigung", "Reinigungskraft", "Büro reinigen"),
+    ("Service", "Reinigung", "Reinigungskraft", "Verkaufsfläche reinigen"),
+    ("Logistik", "Wareneingang", "Lagerist", "Lieferung annehmen"),
+    ("Logistik", "Inventur", "Lagerist", "Bestand zählen"),
+    ("Chemie", "Wartung", "Techniker", "Anlage warten"),
+]
+
+TAGE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _hours(a: str, b: str, c: str, d: str) -> float:
+    total = 0
+    for start, end in ((a, b), (c, d)):
+        if start and end:
+            total += (_minutes(end) - _minutes(start)) % (24 * 60)
+    return total / 60
+
+
+# ======================================================
+# STAMMDATEN
+# ======================================================
+
+def schichten_rows(anzahl: int, rng: random.Random) -> list:
+    # "Frühschicht A", "Frühschicht B", …, ab der zweiten Runde "Frühschicht A2"
+    varianten = [
+        (f"{name} {chr(ord('A') + i)}", zeiten)
+        for name, alle in SCHICHT_VORLAGEN
+        for i, zeiten in enumerate(alle)
+    ]
+
+    rows = []
+    for i in range(anzahl):
+        name, (a, b, c, d) = varianten[i % len(varianten)]
+        runde = i // len(varianten)
+        if runde:
+            name += str(runde + 1)
+        rows.append([name, a, b, c, d, repr(_hours(a, b, c, d))])
+
+    rng.shuffle(rows)
+    return rows
+
+
+def mitarbeiter_rows(anzahl: int, schichten: list, rng: random.Random) -> list:
+    names = [s[0] for s in schichten]
+    rows = []
+
+    for i in range(anzahl):
+        woche = rng.choice([10, 15, 20, 20, 30, 38.5, 40, 40, 40])
+        jahr = rng.randint(1960, 2005)
+        start = rng.randint(2010, 2025)
+        rows.append([
+            rng.choice(VORNAMEN),
+            f"{rng.choice(NACHNAMEN)}-{i}" if i >= len(VORNAMEN) * len(NACHNAMEN) // 2
+            else rng.choice(NACHNAMEN),
+            f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{jahr}",
+            f"{rng.choice(STRASSEN)} {rng.randint(1, 120)}",
+            rng.choice(["Vollzeit", "Teilzeit", "Minijob", ""]),
+            f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{start}",
+            f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{start}",
+            str(woche) if woche != int(woche) else str(int(woche)),
+            str(int(woche * 4)),
+            rng.choice(["", "", "", "Clean GmbH", "Service Partner KG"]),
+            rng.sample(names, min(len(names), rng.randint(1, 4))),
+            rng.choice(["", "14.5", "15", "17.25", "21"]),
+        ])
+
+    # Eindeutige Namen (der Planer ordnet über "Vorname Nachname" zu)
+    seen = set()
+    for i, row in enumerate(rows):
+        while f"{row[0]} {row[1]}" in seen:
+            row[1] = f"{row[1]}-{i}"
+        seen.add(f"{row[0]} {row[1]}")
+
+    return rows
+
+
+def filialen_rows(anzahl: int, rng: random.Random) -> list:
+    rows = []
+    for i in range(anzahl):
+        plz, ort = rng.choice(ORTE)
+        rows.append([
+            str(101 + i),
+            f"{rng.choice(KETTEN)} {ort}",
+            plz,
+            ort,
+            f"{rng.choice(STRASSEN)} {rng.randint(1, 80)}",
+            f"{rng.choice(VORNAMEN)} {rng.choice(NACHNAMEN)}",
+        ])
+    return rows
+
+
+def arbeit_rows(anzahl: int, rng: random.Random) -> list:
+    return [
+        list(rng.choice(ARBEIT)[:3]) + [f"{rng.choice(ARBEIT)[3]} {i}", str(rng.choice([2, 4, 6, 8]))]
+        for i in range(anzahl)
+    ]
+
+
+# ======================================================
+# ÜBERSICHT UND KALENDERWOCHEN
+# ======================================================
+
+def board(filialen: list, schichten: list, rng: random.Random) -> dict:
+    names = [s[0] for s in schichten]
+    return {"mode": "schicht", "data": [
+        {
+            "filiale": f[0],
+            "tage": {
+                tag: {
+                    "schicht": rng.choice(names) if tag != "Sonntag" else "",
+                    "notiz": rng.choice(["", "", "", "", "Inventur", "Lieferung 6 Uhr"]),
+                    "mitarbeiter": [],
+                }
+                for tag in TAGE
+            },
+        }
+        for f in filialen
+    ]}
+
+
+def write_dataset(
+    directory: str,
+    mitarbeiter: int = 3000,
+    filialen: int = 400,
+    schichten: int = 30,
+    arbeit: int = 150,
+    jahre: int = 2,
+    aenderung: float = 0.15,
+    seed: int = 1,
+    log=print,
+) -> dict:
+    """
+    Schreibt den Datensatz nach directory (Dateinamen wie backend/main.py)
+    und liefert die Anzahl der Einträge je Store.
+    """
+    from backend.kalenderwochen import KalenderwochenStore
+    from backend.planner import plan_week
+    from backend.records import MitarbeiterRecord, SchichtRecord, records_from_rows
+    from backend.storage import save_json
+
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    def path(name: str) -> str:
+        return os.path.join(directory, name)
+
+    s_rows = schichten_rows(schichten, rng)
+    m_rows = mitarbeiter_rows(mitarbeiter, s_rows, rng)
+    f_rows = filialen_rows(filialen, rng)
+
+    save_json(path("schichten.json"), s_rows)
+    save_json(path("mitarbeiter.json"), m_rows)
+    save_json(path("filialen.json"), f_rows)
+    save_json(path("arbeitstaetigkeiten.json"), arbeit_rows(arbeit, rng))
+    # Teams-Seite pflegt die Schichten direkt am Mitarbeiter (Spalte 10)
+    save_json(path("teams.json"), [])
+
+    m_records = records_from_rows(m_rows, MitarbeiterRecord)
+    s_records = records_from_rows(s_rows, SchichtRecord)
+
+    # Aktuelle Woche: vom Planer besetzt, wie nach "Schichtplan erstellen"
+    current, _ = plan_week(board(f_rows, s_rows, rng), m_records, s_records, time_limit=0)
+    save_json(path("uebersicht.json"), current)
+    log(f"Stammdaten und Übersicht: {mitarbeiter} Mitarbeiter, {filialen} Filialen")
+
+    # Historie: Woche für Woche ändert sich ein Teil der Filialen
+    store = KalenderwochenStore(path("kalenderwochen"))
+    week = current
+    wochen = 0
+    start = time.perf_counter()
+
+    for jahr in range(2026 - jahre, 2026):
+        for kw in range(1, 53):
+            data = list(week["data"])
+            changed = rng.sample(range(len(data)), int(len(data) * aenderung))
+            planned, _ = plan_week(
+                board([f_rows[f] for f in changed], s_rows, rng),
+                m_records, s_records, time_limit=0,
+            )
+            for f, entry in zip(changed, planned["data"]):
+                data[f] = entry
+            week = {**week, "data": data}
+
+            store.put({
+                "kalenderwoche": kw,
+                "jahr": jahr,
+                "tage": {tag: f"{jahr}-W{kw:02d}-{i + 1}" for i, tag in enumerate(TAGE)},
+                "uebersicht": week,
+            })
+            wochen += 1
+
+        log(f"Kalenderwochen {jahr}: {time.perf_counter() - start:.1f} s")
+
+    return {
+        "mitarbeiter": len(m_rows),
+        "filialen": len(f_rows),
+        "schichten": len(s_rows),
+        "arbeitstaetigkeiten": arbeit,
+        "kalenderwochen": wochen,
+    }
+
+
+def configure_engine(directory: str, engine: str):
+    """
+    Umgebung für backend.* setzen – vor dem ersten Storage-Zugriff.
+    """
+    os.environ["GMATRIX_DATA_DIR"] = directory
+    os.environ["GMATRIX_STORAGE"] = engine
+    os.environ["GMATRIX_SQLITE_PATH"] = os.path.join(directory, "gmatrix.sqlite3")
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument("--mitarbeiter", type=int, default=3000)
+    parser.add_argument("--filialen", type=int, default=400)
+    parser.add_argument("--schichten", type=int, default=30)
+    parser.add_argument("--arbeit", type=int, default=150)
+    parser.add_argument("--jahre", type=int, default=2)
+    parser.add_argument("--aenderung", type=float, default=0.15,
+                        help="Anteil der Filialen, die sich pro Woche ändern")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--engine", default="json", choices=["json", "sqlite", "log"])
+
+
+def dataset_meta(args) -> dict:
+    return {
+        key: getattr(args, key)
+        for key in ("mitarbeiter", "filialen", "schichten", "arbeit", "jahre", "seed", "engine")
+    }
+
+
+@contextlib.contextmanager
+def prepared(args, log=print):
+    """
+    Temporäres Datenverzeichnis für einen Benchmark: Kopie von --daten
+    oder neu erzeugt. Benchmarks schreiben – echte Daten bleiben so
+    unberührt.
+    """
+    with tempfile.TemporaryDirectory(prefix="gmatrix-bench-") as directory:
+        configure_engine(directory, args.engine)
+
+        if getattr(args, "daten", None):
+            shutil.copytree(args.daten, directory, dirs_exist_ok=True)
+        else:
+            write_dataset(
+                directory, args.mitarbeiter, args.filialen, args.schichten, args.arbeit,
+                args.jahre, args.aenderung, args.seed, log=log,
+            )
+
+        yield directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("ziel")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    directory = os.path.abspath(args.ziel)
+    configure_engine(directory, args.engine)
+
+    counts = write_dataset(
+        directory, args.mitarbeiter, args.filialen, args.schichten, args.arbeit,
+        args.jahre, args.aenderung, args.seed,
+    )
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
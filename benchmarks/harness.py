@@ -0,0 +1,220 @@
+"""
+Gemeinsame Messwerkzeuge für benchmarks/storage_io.py und benchmarks/api.py.
+
+    stats = measure(fn, dauer=1.0)     → {"n", "p50_ms", "p99_ms", "ops_s", ...}
+    stats["peak_kib"] = peak_memory(fn)
+    report(ergebnisse, "--json"-Datei, "--vergleich"-Datei, schwelle)
+
+Eine Report-Datei (JSON) enthält Umgebung (Python, Engine, git-Stand,
+Datensatz) und je Messung die Kennzahlen. Mit --vergleich wird gegen
+eine frühere Datei verglichen; p50 oder p99 mehr als --schwelle Prozent
+langsamer gilt als Regression (Exit-Code 1).
+"""
+
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ======================================================
+# MESSEN
+# ======================================================
+
+def percentile(values: list, q: float) -> float:
+    """
+    Perzentil (0–100) einer sortierten Liste, linear interpoliert.
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """
+    Kennzahlen aus Einzeldauern (Sekunden) und der Gesamtdauer.
+    """
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0,
+        "ops_s": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def measure(fn, dauer: float = 1.0, min_runs: int = 5, max_runs: int = 100_000, warmup: int = 1, setup=None) -> dict:
+    """
+    Ruft fn wiederholt auf (mindestens min_runs, sonst bis dauer Sekunden
+    vergangen sind) und liefert Latenz-Perzentile und Durchsatz. setup()
+    läuft vor jedem Aufruf und zählt weder zur Latenz noch zum Durchsatz.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    samples = []
+    start = time.perf_counter()
+    deadline = start + dauer
+
+    while len(samples) < max_runs:
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        t1 = time.perf_counter()
+        samples.append(t1 - t0)
+        if len(samples) >= min_runs and t1 >= deadline:
+            break
+
+    # Mit setup: Durchsatz nur über die gemessenen Aufrufe
+    elapsed = sum(samples) if setup else time.perf_counter() - start
+    return summarize(samples, elapsed)
+
+
+def peak_memory(fn, setup=None) -> float:
+    """
+    Spitze der Python-Allokationen (KiB) während eines Aufrufs.
+    """
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def max_rss_mib() -> float:
+    # ru_maxrss: Linux in KiB, macOS in Bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() == "Darwin":
+        rss /= 1024
+    return round(rss / 1024, 1)
+
+
+# ======================================================
+# BERICHT
+# ======================================================
+
+def environment(**extra) -> dict:
+    try:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT, capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ""
+
+    return {
+        "git": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "storage": os.environ.get("GMATRIX_STORAGE", "json"),
+        "json": os.environ.get("GMATRIX_JSON", "auto"),
+        "zeit": time.strftime("%Y-%m-%d %H:%M:%S"),
+        **extra,
+    }
+
+
+COLUMNS = [("n", 7), ("p50_ms", 10), ("p99_ms", 10), ("ops_s", 10), ("peak_kib", 10)]
+
+
+def print_table(results: dict, baseline: dict = None):
+    # Weitere Kennzahlen einzelner Benchmarks (z.B. rss_mib) hinten anhängen
+    known = {c for c, _ in COLUMNS} | {"max_ms"}
+    extra = sorted({k for stats in results.values() for k in stats} - known)
+    columns = COLUMNS + [(c, max(len(c) + 2, 10)) for c in extra]
+
+    width = max([len(name) for name in results] + [10])
+    header = f"{'Messung':<{width}}" + "".join(f"{c:>{w}}" for c, w in columns)
+    if baseline:
+        header += f"{'Δ p50':>9}{'Δ p99':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for name, stats in results.items():
+        line = f"{name:<{width}}" + "".join(
+            f"{stats.get(c, ''):>{w}}" for c, w in columns
+        )
+        before = (baseline or {}).get(name)
+        if before:
+            line += "".join(
+                f"{_delta(before.get(k), stats.get(k)):>9}" for k in ("p50_ms", "p99_ms")
+            )
+        print(line)
+
+
+def _delta(before, after) -> str:
+    if not before or after is None:
+        return ""
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def regressions(results: dict, baseline: dict, schwelle: float) -> list:
+    """
+    Messungen, deren p50 oder p99 um mehr als schwelle Prozent schlechter
+    ist als in baseline.
+    """
+    found = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if before.get(key) and stats[key] > before[key] * (1 + schwelle / 100):
+                found.append(f"{name}: {key} {before[key]} → {stats[key]}")
+    return found
+
+
+def report(results: dict, meta: dict, json_path: str = None, vergleich: str = None, schwelle: float = 20.0) -> int:
+    """
+    Tabelle ausgeben, optional als JSON speichern und mit einer früheren
+    Datei vergleichen. Liefert den Exit-Code (1 bei Regression).
+    """
+    baseline = None
+    if vergleich:
+        with open(vergleich, encoding="utf-8") as file:
+            previous = json.load(file)
+        baseline = previous.get("ergebnisse", {})
+        print(f"Vergleich mit {vergleich} ({previous.get('umgebung', {}).get('git', '?')})\n")
+
+    print_table(results, baseline)
+    print(f"\nmax RSS: {max_rss_mib()} MiB")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump({"umgebung": meta, "ergebnisse": results}, file, indent=2, ensure_ascii=False)
+        print(f"Bericht: {json_path}")
+
+    if baseline:
+        found = regressions(results, baseline, schwelle)
+        if found:
+            print(f"\nRegressionen (> {schwelle:g} %):")
+            for line in found:
+                print(f"  {line}")
+            return 1
+
+    return 0
+
+
+def add_report_arguments(parser):
+    parser.add_argument("--json", metavar="DATEI", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--vergleich", metavar="DATEI", help="mit früherem JSON-Bericht vergleichen")
+    parser.add_argument("--schwelle", type=float, default=20.0,
+                        help="Regression ab so viel Prozent langsamer (Standard 20)")
@@ -0,0 +1,104 @@
+"""
+Benchmark: gepufferte vs. gestreamte Rechnungs-PDFs.
+
+Misst für eine Rechnung mit vielen Positionen die Zeit bis zum ersten
+Byte (TTFB), die Gesamtzeit und den Spitzen-Speicher (max RSS). Jeder
+Modus läuft in einem eigenen Prozess, damit sich die RSS-Werte nicht
+gegenseitig beeinflussen.
+
+    python benchmarks/pdf_stream.py [--positionen 10000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def rechnung(positionen: int) -> dict:
+    return {
+        "nummer": "BENCH-1",
+        "datum": "01.01.2026",
+        "kunde": {"firma": "Kunde GmbH", "adresse": "Hauptstraße 1\n12345 Stadt"},
+        "positionen": [
+            {"datum": "01.01.2026", "text": f"Position {i}", "stunden": 1.5, "satz": 42}
+            for i in range(positionen)
+        ],
+    }
+
+
+BRIEFKOPF = {
+    "name": "GMatrix Service",
+    "adresse": "Musterweg 5\n54321 Musterstadt",
+    "steuer_befreit": False,
+}
+
+
+def run(mode: str, positionen: int) -> dict:
+    from backend.pdf import render_rechnung, stream_rechnung
+
+    payload = rechnung(positionen)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    first = None
+    size = 0
+    start = time.perf_counter()
+
+    if mode == "gepuffert":
+        size = len(render_rechnung(payload, BRIEFKOPF))
+        first = time.perf_counter()
+    else:
+        def emit(chunk: bytes):
+            nonlocal first, size
+            if first is None:
+                first = time.perf_counter()
+            size += len(chunk)
+
+        stream_rechnung(payload, BRIEFKOPF, emit)
+
+    total = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "modus": mode,
+        "ttfb_ms": round((first - start) * 1000, 1),
+        "gesamt_ms": round(total * 1000, 1),
+        "bytes": size,
+        # ru_maxrss ist unter Linux in KiB
+        "rss_zuwachs_mib": round((rss_after - rss_before) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positionen", type=int, default=10000)
+    parser.add_argument("--modus", choices=["gepuffert", "gestreamt"])
+    args = parser.parse_args()
+
+    if args.modus:
+        print(json.dumps(run(args.modus, args.positionen)))
+        return
+
+    print(f"Rechnung mit {args.positionen} Positionen")
+    for mode in ("gepuffert", "gestreamt"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--modus", mode, "--positionen", str(args.positionen)],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout)
+        print(
+            f"  {result['modus']:<10} TTFB {result['ttfb_ms']:>9} ms   "
+            f"gesamt {result['gesamt_ms']:>9} ms   "
+            f"{result['bytes'] / 1024:>8.0f} KiB   "
+            f"RSS +{result['rss_zuwachs_mib']} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
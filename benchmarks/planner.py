@@ -0,0 +1,98 @@
+"""
+Benchmark: automatische Schichtplanung (backend/planner.py).
+
+Erzeugt ein Board mit vielen Filialen (jede Zelle Montag–Samstag mit
+einer zufälligen Schicht) und einen Mitarbeiterstamm mit zufälligen
+Wochenstunden und Schicht-Qualifikationen. Gemessen werden Laufzeit
+und Besetzungsgrad – einmal nur Greedy, einmal mit lokaler Suche.
+
+    python benchmarks/planner.py [--filialen 300] [--mitarbeiter 600]
+                                 [--pro-schicht 1] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.planner import plan_week  # noqa: E402
+from backend.records import MitarbeiterRecord, SchichtRecord, records_from_rows  # noqa: E402
+from backend.uebersicht import TAGE  # noqa: E402
+
+SCHICHTEN = [
+    ["Frühschicht A", "7:00", "12:00", "13:00", "16:00", "8.0"],
+    ["Frühschicht B", "6:30", "11:30", "12:00", "15:30", "8.5"],
+    ["Frühschicht C", "5:30", "10:30", "11:00", "14:30", "8.5"],
+    ["Vormittagsschicht", "8:00", "13:00", "", "", "5.0"],
+    ["Spätschicht A", "14:00", "18:00", "18:30", "22:00", "7.5"],
+    ["Spätschicht B", "15:00", "19:00", "19:30", "23:00", "7.5"],
+    ["Nachtschicht", "22:00", "2:00", "2:30", "6:00", "7.5"],
+    ["Tagestart", "5:00", "9:00", "", "", "4.0"],
+]
+
+
+def generate(filialen: int, mitarbeiter: int, rng: random.Random):
+    names = [s[0] for s in SCHICHTEN]
+
+    board = {"mode": "schicht", "data": [
+        {
+            "filiale": str(1000 + f),
+            "tage": {
+                tag: {"schicht": rng.choice(names), "notiz": "", "mitarbeiter": []}
+                for tag in TAGE[:6]
+            },
+        }
+        for f in range(filialen)
+    ]}
+
+    rows = [
+        [
+            f"Vorname{i}", f"Nachname{i}", "", "", "", "", "",
+            str(rng.choice([20, 30, 40, 40])), "", "",
+            rng.sample(names, rng.randint(1, 3)), "",
+        ]
+        for i in range(mitarbeiter)
+    ]
+
+    return (
+        board,
+        records_from_rows(rows, MitarbeiterRecord),
+        records_from_rows(SCHICHTEN, SchichtRecord),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filialen", type=int, default=300)
+    parser.add_argument("--mitarbeiter", type=int, default=600)
+    parser.add_argument("--pro-schicht", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    board, mitarbeiter, schichten = generate(
+        args.filialen, args.mitarbeiter, random.Random(args.seed)
+    )
+
+    print(f"{args.filialen} Filialen × 6 Tage, {args.mitarbeiter} Mitarbeiter, "
+          f"{args.pro_schicht} pro Schicht")
+
+    for label, time_limit in (("Greedy", 0.0), ("Greedy + lokale Suche", 0.5)):
+        start = time.perf_counter()
+        _, stats = plan_week(
+            board, mitarbeiter, schichten, args.pro_schicht, time_limit=time_limit
+        )
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"  {label:<22} {elapsed * 1000:7.1f} ms   "
+            f"{stats['besetzt']}/{stats['plaetze']} Plätze besetzt "
+            f"({stats['besetzt'] / max(stats['plaetze'], 1):.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: Volltextsuche über Stammdaten (backend/search.py, GET /search).
+
+Erzeugt einen Datensatz (benchmarks/dataset.py) oder kopiert --daten in
+ein temporäres Verzeichnis und misst:
+
+    aufbau              kompletter Index aller Typen (erste Suche ohne Preload)
+    suche "…"           eine Suche über alle Typen, limit 20 – exakt, Präfix,
+                        Tippfehler, Umlaut-Schreibweise, mehrere Wörter
+    sync …              Nachführen nach einer geänderten, angehängten bzw.
+                        vorne gelöschten Mitarbeiter-Zeile (läuft bei jedem
+                        Schreibvorgang) und nach einer neu geparsten Liste
+                        (Schreibvorgang eines anderen Workers)
+
+    python benchmarks/search.py [--engine json|sqlite|log]
+                                [--mitarbeiter 30000] [--filialen 2000]
+                                [--daten VERZEICHNIS] [--dauer 1.0]
+                                [--json bericht.json]
+                                [--vergleich alt.json] [--schwelle 20]
+"""
+
+import argparse
+import copy
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset import add_dataset_arguments, dataset_meta, prepared  # noqa: E402
+from harness import add_report_arguments, environment, measure, report  # noqa: E402
+
+SUCHEN = [
+    "schneider",          # exakt
+    "schn",               # Präfix (Eingabe läuft noch)
+    "schnieder",          # Tippfehler
+    "mueller",            # Umlaut anders geschrieben
+    "lukas gartenweg",    # zwei Wörter
+    "85241",              # PLZ einer Filiale
+    "m",                  # ein Buchstabe – viele Treffer
+]
+
+
+def run(dauer: float) -> dict:
+    # Erst nach prepared() importieren – die Engine liest die Umgebung
+    from backend import main
+    from backend.search import MasterDataSearch
+    from backend.storage import load_json
+
+    results = {}
+    resources = list(main.SUCHE_SPALTEN)
+
+    def bench(name: str, fn, setup=None, **kwargs):
+        stats = measure(fn, dauer, setup=setup, **kwargs)
+        results[name] = stats
+        print(f"  {name}: p50 {stats['p50_ms']} ms", flush=True)
+
+    def build():
+        fresh = MasterDataSearch()
+        for resource, (file, columns) in main.SUCHE_SPALTEN.items():
+            fresh.add(resource, file, columns)
+        fresh.sync_all()
+
+    bench("aufbau", build, min_runs=3, warmup=0)
+
+    main.suche.sync_all()
+    for query in SUCHEN:
+        bench(f'suche "{query}"', lambda q=query: main.suche.search(q, resources, 20))
+
+    index = main.suche.indexes["mitarbeiter"]
+    rows = load_json(main.MITARBEITER_FILE)
+    state = {}
+
+    def changed(make):
+        # Abwechselnd Original und Änderung – jeder Aufruf gleicht eine Änderung ab
+        def setup():
+            state["rows"] = rows if index.rows is not rows else make()
+        return setup
+
+    sync = lambda: index.sync(state["rows"], index.ids)  # noqa: E731
+    bench("sync update", sync, setup=changed(lambda: rows[:-1] + [["Neu"] + rows[-1][1:]]))
+    bench("sync append", sync, setup=changed(lambda: rows + [["Neu", "Person"]]))
+    bench("sync delete vorne", sync, setup=changed(lambda: rows[1:]))
+
+    parsed = copy.deepcopy(rows)
+    parsed[len(parsed) // 2] = ["Neu", "Person"]
+    bench("sync anderer Worker", sync, setup=changed(lambda: parsed))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.set_defaults(mitarbeiter=30000, filialen=2000, jahre=1)
+    parser.add_argument("--daten", help="vorhandenes Datenverzeichnis (wird kopiert)")
+    parser.add_argument("--dauer", type=float, default=1.0, help="Sekunden pro Messung")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with prepared(args) as directory:
+        print(f"Messe ({args.engine}, {directory}) …")
+        results = run(args.dauer)
+
+    print()
+    meta = environment(datensatz=dataset_meta(args), daten=args.daten)
+    sys.exit(report(results, meta, args.json, args.vergleich, args.schwelle))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Benchmark: Start eines Workers – Import, erste Anfragen, Speicher pro Worker.
+
+Jede Messung läuft in einem frischen Interpreter (Unterprozess) auf einem
+erzeugten Datensatz (benchmarks/dataset.py) bzw. einer Kopie von --daten:
+
+    import (lazy)        import backend.main – ReportLab/numpy erst bei Bedarf
+    import (eager)       zusätzlich main.LAZY_MODULES, wie früher beim Import
+    preload              backend.startup.preload im Master (gunicorn.conf.py)
+    erste Anfrage …      erste GET/POST je Route nach dem Import, ohne bzw.
+                         mit Preload (kalte vs. gewärmte Caches)
+    worker …             --worker Kinder per fork wie gunicorn, jedes
+                         bedient dieselbe Last; Zeit bis bereit + Last,
+                         dazu USS (nur eigene Seiten) und PSS (geteilte
+                         Seiten anteilig) aus /proc/<pid>/smaps_rollup
+
+    python benchmarks/startup.py [--engine json|sqlite|log]
+                                 [--mitarbeiter 3000] [--filialen 400] [--jahre 2]
+                                 [--daten VERZEICHNIS] [--wiederholungen 5]
+                                 [--worker 4]
+                                 [--json bericht.json]
+                                 [--vergleich alt.json] [--schwelle 20]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+# Last eines Workers: je Store ein GET, Auswertung und ein kleines PDF
+LAST = [
+    ("GET", "/mitarbeiter"),
+    ("GET", "/filialen"),
+    ("GET", "/schichten"),
+    ("GET", "/uebersicht"),
+    ("GET", "/kalenderwochen?felder=kalenderwoche,jahr"),
+    ("GET", "/auswertung"),
+    ("POST", "/rechnung/pdf"),
+]
+
+RECHNUNG = {
+    "rechnung": {
+        "nummer": "START-1",
+        "datum": "01.01.2026",
+        "kunde": {"firma": "Kunde GmbH", "adresse": "Hauptstraße 1"},
+        "positionen": [
+            {"datum": "01.01.2026", "text": f"Position {i}", "stunden": 1, "satz": 40}
+            for i in range(20)
+        ],
+    },
+    "briefkopf": {"name": "GMatrix Service", "adresse": "Musterweg 5"},
+}
+
+
+# ======================================================
+# IM UNTERPROZESS
+# ======================================================
+#
+# Diese Funktionen laufen in einem frischen Interpreter (--intern) und
+# geben genau eine JSON-Zeile aus. Sie importieren nichts vorab.
+
+def max_rss_mib() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def memory_mib() -> dict:
+    """
+    USS und PSS des eigenen Prozesses (Linux, /proc/self/smaps_rollup).
+    """
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    values[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+
+    uss = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return {"uss_mib": round(uss / 1024, 1), "pss_mib": round(values.get("Pss", 0) / 1024, 1)}
+
+
+def run_load(client) -> dict:
+    timings = {}
+    for method, route in LAST:
+        start = time.perf_counter()
+        if method == "GET":
+            response = client.get(route)
+        else:
+            response = client.post(route, json=RECHNUNG)
+        timings[f"{method} {route.split('?')[0]}"] = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {route}: {response.status_code} {response.text[:200]}")
+    return timings
+
+
+def intern_import(eager: bool):
+    start = time.perf_counter()
+    from backend import main
+    if eager:
+        for name in main.LAZY_MODULES:
+            importlib.import_module(name)
+    ms = (time.perf_counter() - start) * 1000
+    return {"ms": ms, "rss_mib": max_rss_mib()}
+
+
+def intern_preload():
+    from backend import main
+    from backend.startup import preload
+
+    start = time.perf_counter()
+    preload(main)
+    return {"ms": (time.perf_counter() - start) * 1000, "rss_mib": max_rss_mib()}
+
+
+def intern_first_requests(warm: bool):
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    if warm:
+        from backend.startup import preload
+        preload(main)
+
+    return run_load(TestClient(main.app))
+
+
+def intern_workers(warm: bool, count: int):
+    """
+    Master wie gunicorn: mit warm importiert und wärmt er vor dem fork
+    (preload_app), sonst importiert jedes Kind die App selbst.
+    """
+    if warm:
+        from backend import main
+        from backend.startup import preload
+        preload(main)
+
+    done_r, done_w = os.pipe()
+    go_r, go_w = os.pipe()
+    result_r, result_w = os.pipe()
+    children = []
+
+    for _ in range(count):
+        pid = os.fork()
+        if pid:
+            children.append(pid)
+            continue
+
+        # Kind
+        try:
+            start = time.perf_counter()
+            from backend import main
+            ready = (time.perf_counter() - start) * 1000
+
+            from fastapi.testclient import TestClient
+            with TestClient(main.app) as client:
+                load = sum(run_load(client).values())
+
+            os.write(done_w, b".")
+            os.read(go_r, 1)  # alle Kinder leben, bevor gemessen wird
+
+            line = json.dumps({"bereit_ms": ready, "last_ms": load, **memory_mib()})
+            os.write(result_w, line.encode() + b"\n")
+        finally:
+            os._exit(0)
+
+    for _ in range(count):
+        os.read(done_r, 1)
+    os.write(go_w, b"." * count)
+
+    results = []
+    buffer = b""
+    while len(results) < count:
+        buffer += os.read(result_r, 65536)
+        *lines, buffer = buffer.split(b"\n")
+        results.extend(json.loads(line) for line in lines)
+
+    for pid in children:
+        os.waitpid(pid, 0)
+
+    return results
+
+
+def intern(argv: list):
+    mode = argv[0]
+    if mode == "import":
+        result = intern_import(eager=argv[1] == "eager")
+    elif mode == "preload":
+        result = intern_preload()
+    elif mode == "anfragen":
+        result = intern_first_requests(warm=argv[1] == "warm")
+    else:
+        result = intern_workers(warm=argv[1] == "warm", count=int(argv[2]))
+    print("RESULT " + json.dumps(result))
+
+
+# ======================================================
+# ABLAUF
+# ======================================================
+
+def subprocess_result(*argv):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--intern", *argv],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[7:])
+    raise RuntimeError(f"{' '.join(argv)}: {completed.stderr[-2000:]}")
+
+
+def run(args) -> dict:
+    from harness import summarize
+
+    results = {}
+
+    def repeated(name: str, *argv, extra=()):
+        runs = [subprocess_result(*argv) for _ in range(args.wiederholungen)]
+        stats = summarize([r["ms"] / 1000 for r in runs], 0)
+        del stats["ops_s"]
+        for key in extra:
+            stats[key] = round(sorted(r[key] for r in runs)[len(runs) // 2], 1)
+        results[name] = stats
+        print(f"  {name}: p50 {stats['p50_ms']} ms", flush=True)
+
+    repeated("import (lazy)", "import", "lazy", extra=("rss_mib",))
+    repeated("import (eager)", "import", "eager", extra=("rss_mib",))
+    repeated("preload", "preload", extra=("rss_mib",))
+
+    for warm in ("kalt", "warm"):
+        runs = [subprocess_result("anfragen", warm) for _ in range(args.wiederholungen)]
+        for route in runs[0]:
+            stats = summarize([r[route] / 1000 for r in runs], 0)
+            del stats["ops_s"]
+            name = f"erste Anfrage {route} ({warm})"
+            results[name] = stats
+            print(f"  {name}: p50 {stats['p50_ms']} ms", flush=True)
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("  worker: übersprungen (kein /proc/self/smaps_rollup)")
+        return results
+
+    for warm, label in (("kalt", "ohne preload"), ("warm", "mit preload")):
+        children = subprocess_result("worker", warm, str(args.worker))
+        stats = summarize([(c["bereit_ms"] + c["last_ms"]) / 1000 for c in children], 0)
+        del stats["ops_s"]
+        for key in ("uss_mib", "pss_mib"):
+            stats[key] = round(sum(c[key] for c in children) / len(children), 1)
+        name = f"worker x{args.worker} ({label})"
+        results[name] = stats
+        print(f"  {name}: USS {stats['uss_mib']} MiB, PSS {stats['pss_mib']} MiB", flush=True)
+
+    return results
+
+
+def main():
+    from dataset import add_dataset_arguments, dataset_meta, prepared
+    from harness import add_report_arguments, environment, report
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--daten", help="vorhandenes Datenverzeichnis (wird kopiert)")
+    parser.add_argument("--wiederholungen", type=int, default=5, help="Interpreter pro Messung")
+    parser.add_argument("--worker", type=int, default=4, help="Kinder beim fork-Test")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with prepared(args) as directory:
+        print(f"Messe ({args.engine}, {directory}) …")
+        results = run(args)
+
+    print()
+    meta = environment(datensatz=dataset_meta(args), daten=args.daten, worker=args.worker)
+    sys.exit(report(results, meta, args.json, args.vergleich, args.schwelle))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--intern"]:
+        intern(sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,106 @@
+"""
+Micro-Benchmark: storage.load_json / save_json und Einzelschreibzugriffe.
+
+Erzeugt einen Datensatz (benchmarks/dataset.py) oder kopiert --daten in
+ein temporäres Verzeichnis und misst pro Store:
+
+    load kalt     Dokument-Cache geleert (Lesen + Parsen)
+    load          aus dem Dokument-Cache
+    save          ganzes Dokument schreiben
+    update        eine Zeile ersetzen (update_json_index)
+    append        eine Zeile anhängen (und über die ID wieder löschen)
+
+    python benchmarks/storage_io.py [--engine json|sqlite|log]
+                                    [--mitarbeiter 3000] [--filialen 400]
+                                    [--daten VERZEICHNIS] [--dauer 1.0]
+                                    [--json bericht.json]
+                                    [--vergleich alt.json] [--schwelle 20]
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset import add_dataset_arguments, dataset_meta, prepared  # noqa: E402
+from harness import add_report_arguments, environment, measure, peak_memory, report  # noqa: E402
+
+LIST_STORES = ["mitarbeiter", "filialen", "schichten", "arbeitstaetigkeiten"]
+DOCUMENT_STORES = ["uebersicht"]
+
+
+def run(directory: str, dauer: float) -> dict:
+    # Erst nach prepared() importieren – die Engine liest die Umgebung
+    from backend.kalenderwochen import KalenderwochenStore
+    from backend.storage import (
+        append_json, delete_json_id, invalidate_cache, load_json, save_json,
+        update_json_index,
+    )
+
+    results = {}
+
+    def bench(name: str, fn):
+        stats = measure(fn, dauer)
+        stats["peak_kib"] = peak_memory(fn)
+        results[name] = stats
+        print(f"  {name}: p50 {stats['p50_ms']} ms", flush=True)
+
+    for store in LIST_STORES + DOCUMENT_STORES:
+        path = os.path.join(directory, f"{store}.json")
+        data = load_json(path)
+
+        def cold(path=path):
+            invalidate_cache(path)
+            load_json(path)
+
+        bench(f"{store}: load kalt", cold)
+        bench(f"{store}: load", lambda path=path: load_json(path))
+        bench(f"{store}: save", lambda path=path, data=data: save_json(path, data))
+
+        if store in LIST_STORES:
+            row = data[0]
+            bench(f"{store}: update", lambda path=path, row=row: update_json_index(path, 0, row))
+
+            def append(path=path, row=row):
+                delete_json_id(path, append_json(path, row))
+
+            bench(f"{store}: append+delete", append)
+
+    # Eine Kalenderwoche: Datensatz + alle Chunks
+    store = KalenderwochenStore(os.path.join(directory, "kalenderwochen"))
+    keys = store.index().sorted_keys
+    if keys:
+        jahr, kw = keys[-1]
+
+        def week_cold():
+            invalidate_cache()
+            store.get(kw, jahr)
+
+        bench("kalenderwoche: get kalt", week_cold)
+        bench("kalenderwoche: get", lambda: store.get(kw, jahr))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--daten", help="vorhandenes Datenverzeichnis (wird kopiert)")
+    parser.add_argument("--dauer", type=float, default=1.0, help="Sekunden pro Messung")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with prepared(args) as directory:
+        print(f"Messe ({args.engine}) …")
+        results = run(directory, args.dauer)
+
+    print()
+    meta = environment(datensatz=dataset_meta(args), daten=args.daten)
+    sys.exit(report(results, meta, args.json, args.vergleich, args.schwelle))
+
+
+if __name__ == "__main__":
+    main()
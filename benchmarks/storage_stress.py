@@ -0,0 +1,195 @@
+"""
+Stresstest: parallele Schreibzugriffe über mehrere Worker-Prozesse.
+
+Startet die API mit mehreren uvicorn-Workern auf einem leeren
+Datenverzeichnis und lässt viele Client-Prozesse gleichzeitig
+Mitarbeiter anlegen, per Batch einfügen und Übersichts-Zellen ändern.
+Danach wird geprüft, dass keine Änderung verloren ging:
+
+  - jeder angelegte Mitarbeiter ist genau einmal vorhanden
+  - alle IDs sind eindeutig
+  - jede geänderte Zelle der Übersicht hat ihren Wert
+
+    python benchmarks/storage_stress.py [--workers 4] [--clients 16] [--runden 50]
+                                        [--engine json|sqlite|log]
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.uebersicht import TAGE  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, data_dir: str, engine: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        GMATRIX_DATA_DIR=data_dir,
+        GMATRIX_STORAGE=engine,
+        GMATRIX_SQLITE_PATH=os.path.join(data_dir, "gmatrix.sqlite3"),
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        start_new_session=True,
+    )
+
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.05)
+
+    stop_server(server)
+    raise RuntimeError("Server startet nicht")
+
+
+def stop_server(server: subprocess.Popen):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+
+def client(args) -> int:
+    """
+    Ein Client-Prozess. Liefert (anfragen, fehlgeschlagene anfragen).
+    """
+    base, nummer, runden = args
+    filiale = f"S{nummer:03d}"
+    requests = failed = 0
+
+    with httpx.Client(base_url=base, timeout=30) as http:
+        for runde in range(runden):
+            calls = [
+                ("POST", "/mitarbeiter", [f"C{nummer}-{runde}", "Stress"]),
+                ("POST", "/mitarbeiter/batch", {"operations": [
+                    {"op": "insert", "item": [f"B{nummer}-{runde}", "Stress"]},
+                ]}),
+                # Ohne If-Match: jede Zelle muss trotzdem ankommen
+                ("PATCH", "/uebersicht", {"aenderungen": [{
+                    "filiale": filiale,
+                    "tag": TAGE[runde % len(TAGE)],
+                    "notiz": f"{nummer}-{runde}",
+                }]}),
+            ]
+
+            for method, url, body in calls:
+                requests += 1
+                try:
+                    http.request(method, url, json=body).raise_for_status()
+                except httpx.HTTPError:
+                    failed += 1
+
+    return requests, failed
+
+
+def check(base: str, clients: int, runden: int) -> list:
+    errors = []
+
+    with httpx.Client(base_url=base, timeout=60) as http:
+        rows = http.get("/mitarbeiter").json()
+        ids = http.get("/mitarbeiter/ids").json()
+        board = http.get("/uebersicht").json()
+
+    names = [row[0] for row in rows if len(row) > 1 and row[1] == "Stress"]
+    expected = {
+        f"{prefix}{n}-{r}"
+        for prefix in ("C", "B") for n in range(clients) for r in range(runden)
+    }
+
+    if len(names) != len(expected) or set(names) != expected:
+        errors.append(
+            f"Mitarbeiter: {len(names)} statt {len(expected)} "
+            f"({len(expected - set(names))} fehlen)"
+        )
+
+    if len(set(ids)) != len(ids) or len(ids) != len(rows):
+        errors.append("Mitarbeiter-IDs nicht eindeutig oder unvollständig")
+
+    cells = {
+        (row["filiale"], tag): cell.get("notiz")
+        for row in board.get("data", [])
+        for tag, cell in row.get("tage", {}).items()
+    }
+
+    for n in range(clients):
+        for tag_index, tag in enumerate(TAGE):
+            runden_am_tag = [r for r in range(runden) if r % len(TAGE) == tag_index]
+            if not runden_am_tag:
+                continue
+            if cells.get((f"S{n:03d}", tag)) != f"{n}-{runden_am_tag[-1]}":
+                errors.append(f"Zelle S{n:03d}/{tag} verloren")
+
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--runden", type=int, default=50)
+    parser.add_argument("--engine", default="json", choices=["json", "sqlite", "log"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="gmatrix-stress-") as data_dir:
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        server = start_server(args.workers, port, data_dir, args.engine)
+
+        try:
+            start = time.perf_counter()
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.map(
+                    client, [(base, n, args.runden) for n in range(args.clients)]
+                )
+            elapsed = time.perf_counter() - start
+
+            requests = sum(r for r, _ in results)
+            failed = sum(f for _, f in results)
+
+            errors = check(base, args.clients, args.runden)
+            if failed:
+                errors.insert(0, f"{failed} Anfragen fehlgeschlagen")
+        finally:
+            stop_server(server)
+
+    print(
+        f"{args.engine}: {requests} Schreibanfragen von {args.clients} Clients "
+        f"auf {args.workers} Workern in {elapsed:.1f}s ({requests / elapsed:.0f}/s)"
+    )
+
+    if errors:
+        for error in errors:
+            print("FEHLER:", error)
+        sys.exit(1)
+
+    print("OK – keine verlorenen Änderungen")
+
+
+if __name__ == "__main__":
+    main()
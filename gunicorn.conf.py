@@ -0,0 +1,50 @@
+# ======================================================
+# GUNICORN (PRODUKTION)
+# ======================================================
+#
+#   gunicorn backend.main:app          (liest diese Datei aus dem
+#                                      Arbeitsverzeichnis automatisch)
+#
+# Mit preload_app lädt der Master die App, importiert ReportLab/numpy und
+# parst alle Stores einmal (backend/startup.py); die Worker werden danach
+# geforkt und teilen diese Seiten copy-on-write. GMATRIX_PRELOAD=0 lädt
+# die App stattdessen in jedem Worker neu (z.B. für Code-Reload per HUP).
+#
+# Umgebungsvariablen:
+#   GMATRIX_BIND           Adresse (Standard 0.0.0.0:8000)
+#   GMATRIX_WORKERS        Anzahl Worker (Standard: CPU-Kerne)
+#   GMATRIX_PDF_WORKERS    PDF-Prozesse pro Worker (Standard: CPU-Kerne
+#                          geteilt durch die Anzahl Worker, mindestens 1)
+#   GMATRIX_WORKER_CLASS   Standard uvicorn.workers.UvicornWorker; mit dem
+#                          Paket uvicorn-worker: uvicorn_worker.UvicornWorker
+#   GMATRIX_PRELOAD        1/0 (Standard 1)
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GMATRIX_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GMATRIX_WORKERS", multiprocessing.cpu_count()))
+worker_class = os.environ.get("GMATRIX_WORKER_CLASS", "uvicorn.workers.UvicornWorker")
+
+preload_app = os.environ.get("GMATRIX_PRELOAD", "1") not in ("", "0")
+
+
+def on_starting(server):
+    # Vor dem Laden der App: backend/executors.py teilt die CPU-Kerne für
+    # die PDF-Prozesse durch die tatsächliche Anzahl Worker (auch mit -w)
+    os.environ["GMATRIX_WORKERS"] = str(server.cfg.workers)
+
+
+def when_ready(server):
+    # Läuft im Master nach dem Laden der App, vor dem Fork der Worker
+    if not preload_app:
+        return
+
+    from backend import main
+    from backend.startup import preload
+
+    stats = preload(main)
+    server.log.info(
+        "Preload: %(dateien)d Stores, %(kalenderwochen)d Kalenderwochen in %(dauer_ms)s ms",
+        stats,
+    )